@@ -33,6 +33,10 @@ def create_app(config_class=None):
     
     # Initialize extensions
     db.init_app(app)  
+
+    # SQLite pragmas (WAL etc.) for the write engine and the read-only analytics bind
+    from app.services import database
+    database.init_app(app)
     
     # Choose migrations directory based on environment name rather than just DEBUG flag
     migrations_directory = 'migrations_dev' if config_name == 'development' else 'migrations'
@@ -51,9 +55,24 @@ def create_app(config_class=None):
         app.config['SECRET_KEY'] = 'temporary-secret-key'
         print("WARNING: Using temporary secret key")
 
+    # Analytics process pool
+    from app.services import executor
+    executor.init_app(app, config_obj)
+    from app.services import admission
+    admission.init_app(app)
+
     # CLI commands
     from app.services.fetch_price import refresh_history_command
     app.cli.add_command(refresh_history_command)
+    from app.services.coverage import rebuild_coverage_command
+    app.cli.add_command(rebuild_coverage_command)
+    from app.services.price_chunks import rebuild_price_chunks_command
+    app.cli.add_command(rebuild_price_chunks_command)
+    from app.services.price_matrix import export_price_matrix_command
+    app.cli.add_command(export_price_matrix_command)
+    from app.services.asset_registry import add_asset_command, init_app as init_asset_registry
+    app.cli.add_command(add_asset_command)
+    init_asset_registry(app)
     
     # Register custom commands
     with app.app_context():
@@ -66,6 +85,7 @@ def create_app(config_class=None):
     from app.routes.user import user
     from app.routes.comparison import comparison
     from app.services.api import api_bp
+    from app.services.jobs import jobs_bp, init_app as init_jobs
     from app.routes.dashboard import dashboard
 
     app.register_blueprint(main)
@@ -74,6 +94,9 @@ def create_app(config_class=None):
     app.register_blueprint(comparison)
     csrf.exempt(api_bp)
     app.register_blueprint(api_bp)
+    # Jobs act for the session user, so submitting one needs the X-CSRFToken header
+    app.register_blueprint(jobs_bp)
+    init_jobs(app)
     app.register_blueprint(dashboard)
 
     import sys
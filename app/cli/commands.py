@@ -7,21 +7,17 @@ from werkzeug.security import generate_password_hash
 from flask_migrate import init as migrate_init, migrate, upgrade
 
 @click.command('refresh-user-info')
+@click.option('--chunk-size', default=5000, show_default=True, help='Portfolios updated per transaction.')
 @with_appcontext
-def refresh_user_info_command():
+def refresh_user_info_command(chunk_size):
     """Refresh all user information in portfolio summaries."""
-    from app import db
-    from app.models.portfolio import PortfolioSummary
-    
-    portfolios = PortfolioSummary.query.all()
-    updated_count = 0
-    
-    for portfolio in portfolios:
-        portfolio.update_user_info()
-        updated_count += 1
-    
-    db.session.commit()
-    click.echo(f"Updated user information for {updated_count} portfolios.")
+    from app.services.user_info import refresh_all_user_info
+
+    def report(done, total):
+        click.echo(f"  {done}/{total} portfolios checked")
+
+    updated_count = refresh_all_user_info(chunk_size=chunk_size, progress=report)
+    click.echo(f"Updated user information on {updated_count} portfolio rows.")
 
 def setup_dev_environment():
     """Setup test users and other configurations in development environment"""
@@ -24,6 +24,74 @@ class Config:
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
     MAIL_DEFAULT_SENDER = os.environ.get('MAIL_DEFAULT_SENDER')
 
+    # Analytics process pool (see app/services/executor.py)
+    # 0 workers runs calculations inline in the request thread
+    ANALYTICS_WORKERS = int(os.environ.get('ANALYTICS_WORKERS', os.cpu_count() or 2))
+    ANALYTICS_MAX_PENDING = int(os.environ.get('ANALYTICS_MAX_PENDING', '32'))  # Extra calls get a 503
+    ANALYTICS_TIMEOUT = float(os.environ.get('ANALYTICS_TIMEOUT', '30'))  # Seconds per calculation
+    ANALYTICS_START_METHOD = os.environ.get('ANALYTICS_START_METHOD', 'forkserver')
+
+    # Per-worker price store (see app/services/price_store.py): resident histories
+    # are evicted least recently used first once their arrays exceed this many bytes
+    PRICE_STORE_MAX_BYTES = int(os.environ.get('PRICE_STORE_MAX_BYTES', str(64 * 1024 * 1024)))
+    PRICE_STORE_WARM = True  # Fill the budget when a worker starts instead of on first use
+
+    # Memory-mapped price matrix shared by every worker process on the host
+    # (see app/services/price_matrix.py); None reads prices per process instead
+    PRICE_MATRIX_PATH = os.environ.get('PRICE_MATRIX_PATH', os.path.join(basedir, 'db', 'price-matrix.bin'))
+
+    # Pre-fork WSGI server (see gunicorn.conf.py): seconds between the master's
+    # price data version checks; a new version re-warms it and replaces the workers
+    PREFORK_VERSION_CHECK_INTERVAL = 5.0
+
+    # Admission control for calculation endpoints (see app/services/admission.py):
+    # a token bucket per user or IP, in pipeline-cost units, and a cap on heavy
+    # requests running at once in each web process
+    ANALYTICS_RATE = float(os.environ.get('ANALYTICS_RATE', '3'))  # Cost units refilled per second
+    ANALYTICS_BURST = int(os.environ.get('ANALYTICS_BURST', '30'))
+    ANALYTICS_MAX_CONCURRENT = int(os.environ.get('ANALYTICS_MAX_CONCURRENT', '8'))
+
+    # /api/what-if: normalized price paths kept per (asset set, start date)
+    WHAT_IF_CACHE_SIZE = 64
+
+    # Price data version checks and the /api/prices/stream SSE endpoint
+    PRICE_VERSION_CHECK_INTERVAL = 1.0  # Seconds between version reads per process
+    PRICE_STREAM_POLL_INTERVAL = 1.0
+    PRICE_STREAM_HEARTBEAT = 15.0  # Seconds between keep-alive comments on an idle stream
+    PRICE_STREAM_MAX_DURATION = 60.0  # Clients reconnect after this many seconds
+    # Each open stream holds a request thread, so streaming is off unless the server
+    # runs a worker class built for it; pages poll instead (see README, Production server)
+    PRICE_STREAM_ENABLED = os.environ.get('PRICE_STREAM_ENABLED', 'false').lower() in ['true', 'on', '1']
+    PRICE_STREAM_MAX_CONNECTIONS = int(os.environ.get('PRICE_STREAM_MAX_CONNECTIONS', '100'))  # Per process
+
+    # Asynchronous analytics jobs (see app/services/jobs.py)
+    # 0 job workers runs each job inline while handling the submit request
+    ANALYTICS_JOB_WORKERS = int(os.environ.get('ANALYTICS_JOB_WORKERS', '2'))
+    ANALYTICS_JOB_MAX_QUEUED = int(os.environ.get('ANALYTICS_JOB_MAX_QUEUED', '50'))
+    ANALYTICS_JOB_TIMEOUT = float(os.environ.get('ANALYTICS_JOB_TIMEOUT', '600'))  # Seconds per job
+    ANALYTICS_JOB_RETRY_DELAY = 0.5  # First wait before retrying a job the workers were too busy for; doubles
+    ANALYTICS_JOB_TTL = int(os.environ.get('ANALYTICS_JOB_TTL', '3600'))  # Seconds results are kept
+
+    # Asset registry: background threads loading a new ticker's history on first request
+    ASSET_LOADER_WORKERS = int(os.environ.get('ASSET_LOADER_WORKERS', '1'))
+    ASSET_HISTORY_RETRY_AFTER = 600  # Seconds before a failed or stuck loading ticker is downloaded again
+
+    # Portfolio history: every Nth version is a full snapshot, the rest are deltas
+    PORTFOLIO_VERSION_SNAPSHOT_INTERVAL = 20
+
+    # Keyset page sizes for portfolios.list and the share dialog user directory
+    PORTFOLIO_PAGE_SIZE = 50
+    USER_DIRECTORY_PAGE_SIZE = 50
+
+    # Share dialog type-ahead: token bucket per user (searches per second, burst size)
+    USER_SEARCH_RATE = 5.0
+    USER_SEARCH_BURST = 10
+
+    # PRAGMAs run on every new SQLite connection (see app/services/database.py)
+    SQLITE_PRAGMAS = {}
+    SQLITE_READ_PRAGMAS = {}
+    ANALYTICS_DATABASE_URI = None  # None = analytics read through the default engine
+
 
 class DevelopmentConfig(Config):
     DEBUG = True
@@ -43,11 +111,36 @@ class TestConfig(Config):
         'connect_args': {'check_same_thread': False},
         'poolclass': StaticPool
     }
+    # Worker processes cannot see the in-memory database, so run analytics inline
+    ANALYTICS_WORKERS = 0
+    ANALYTICS_JOB_WORKERS = 0
+    ASSET_LOADER_WORKERS = 0
+    PRICE_MATRIX_PATH = None
 
 
 class ProductionConfig(Config):
     DEBUG = False
-    SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(basedir, 'db', 'portfolio_data.db')
+    DATABASE_PATH = os.path.join(basedir, 'db', 'portfolio_data.db')
+    SQLALCHEMY_DATABASE_URI = "sqlite:///" + DATABASE_PATH
+
+    # Analytics reads go through a separate read-only engine on the same file
+    ANALYTICS_DATABASE_URI = f"sqlite:///file:{DATABASE_PATH}?mode=ro&uri=true"
+
+    # WAL lets readers continue while a price refresh is writing
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # Safe with WAL; only the last commits can be lost on power failure
+        'mmap_size': 268435456,  # 256 MB of memory-mapped reads
+        'cache_size': -65536,  # 64 MB page cache (negative = KiB)
+        'busy_timeout': 5000,  # Wait up to 5 s for a lock instead of failing
+        'temp_store': 'MEMORY',
+    }
+    SQLITE_READ_PRAGMAS = {
+        'mmap_size': 268435456,
+        'cache_size': -65536,
+        'busy_timeout': 5000,
+        'query_only': 'ON',
+    }
 
 
 # Ensure the database folder exists
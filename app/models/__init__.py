@@ -5,12 +5,13 @@ from app import db
 
 # Direct re-exports of all models
 from app.models.user import User
-from app.models.asset import Asset, Price
+from app.models.asset import Asset, Price, PriceDataVersion, AssetCoverage, PriceChunk, PriceQualityReport
 from app.models.portfolio import (
     PortfolioSummary, 
     PortfolioVersion, 
     PortfolioChangeLog, 
     PortfolioShareLog
 )
+from app.models.job import AnalyticsJob
 
 # Add any additional models here when created
\ No newline at end of file
@@ -3,9 +3,14 @@ from app import db
 # --- Price Table ---
 class Price(db.Model):
     __tablename__ = 'prices'
+    # Clustered on the primary key: rows are stored in (asset_code, date) order, so a
+    # per-asset range read is one B-tree range scan with close_price in the same pages
+    __table_args__ = {'sqlite_with_rowid': False}
 
+    # Per-asset date ranges are served by the (asset_code, date) primary key;
+    # the date index covers global min/max(date) lookups
     asset_code = db.Column(db.String, db.ForeignKey('assets.asset_code'), primary_key=True)
-    date = db.Column(db.Date, primary_key=True)
+    date = db.Column(db.Date, primary_key=True, index=True)
     close_price = db.Column(db.Float)
 
     asset = db.relationship("Asset", back_populates="prices")
@@ -21,4 +26,92 @@ class Asset(db.Model):
     logo_url = db.Column(db.String)
     strategy_description = db.Column(db.String(256))
 
+    # Registry state (see app/services/asset_registry.py). Tickers added through
+    # register_asset start as 'pending'; pending -> loading -> ready / failed
+    is_active = db.Column(db.Boolean, nullable=False, default=True, server_default=db.true())
+    history_status = db.Column(db.String(16), nullable=False, default='ready', server_default='ready')
+    history_updated_at = db.Column(db.DateTime, nullable=True)
+    history_error = db.Column(db.String(500), nullable=True)
+
     prices = db.relationship("Price", back_populates="asset", cascade="all, delete-orphan")
+
+# --- PriceDataVersion Table ---
+# Single row (id = 1) describing the current price data; version is bumped
+# every time fetch_all_history completes (see app/services/data_version.py)
+class PriceDataVersion(db.Model):
+    __tablename__ = 'price_data_version'
+
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    # idle / running / complete / failed
+    status = db.Column(db.String(16), nullable=False, default='idle')
+    tickers_total = db.Column(db.Integer, nullable=False, default=0)
+    tickers_done = db.Column(db.Integer, nullable=False, default=0)
+    current_ticker = db.Column(db.String, nullable=True)
+    latest_date = db.Column(db.Date, nullable=True)
+
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+# --- AssetCoverage Table ---
+# Per-asset summary of the prices table, rebuilt for each ticker during ingest
+# (see app/services/coverage.py) so date windows never need to scan prices
+class AssetCoverage(db.Model):
+    __tablename__ = 'asset_coverage'
+
+    asset_code = db.Column(db.String, db.ForeignKey('assets.asset_code'), primary_key=True)
+    first_date = db.Column(db.Date, nullable=True)
+    last_date = db.Column(db.Date, nullable=True)
+    row_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Number of holes between consecutive prices longer than coverage.GAP_DAYS
+    gap_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=True)
+
+# --- PriceChunk Table ---
+# Compact copy of prices: one row per asset per calendar year holding the day
+# offsets (uint16, days since 1 January) and closes (float64) as packed arrays.
+# Rebuilt per ticker during ingest (see app/services/price_chunks.py)
+class PriceChunk(db.Model):
+    __tablename__ = 'price_chunks'
+
+    asset_code = db.Column(db.String, db.ForeignKey('assets.asset_code'), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    row_count = db.Column(db.Integer, nullable=False)
+    day_offsets = db.Column(db.LargeBinary, nullable=False)
+    closes = db.Column(db.LargeBinary, nullable=False)
+
+# --- PriceQualityReport Table ---
+# One row per ticker per ingest: what the validation stage found and whether the
+# download was written (see app/services/price_quality.py)
+class PriceQualityReport(db.Model):
+    __tablename__ = 'price_quality_reports'
+    __table_args__ = (
+        db.Index('ix_price_quality_reports_asset_code_checked_at', 'asset_code', 'checked_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    asset_code = db.Column(db.String, nullable=False)
+    checked_at = db.Column(db.DateTime, nullable=False)
+    source = db.Column(db.String(16), nullable=True)  # yfinance / stooq / cache
+
+    # accepted (clean as downloaded) / repaired / rejected (nothing written)
+    status = db.Column(db.String(16), nullable=False)
+    rows_in = db.Column(db.Integer, nullable=False, default=0)
+    rows_out = db.Column(db.Integer, nullable=False, default=0)
+    first_date = db.Column(db.Date, nullable=True)
+    last_date = db.Column(db.Date, nullable=True)
+
+    # Rows dropped per problem
+    missing_count = db.Column(db.Integer, nullable=False, default=0)
+    non_positive_count = db.Column(db.Integer, nullable=False, default=0)
+    duplicate_count = db.Column(db.Integer, nullable=False, default=0)
+    spike_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Flagged but kept
+    jump_count = db.Column(db.Integer, nullable=False, default=0)
+    gap_count = db.Column(db.Integer, nullable=False, default=0)
+    max_gap_days = db.Column(db.Integer, nullable=False, default=0)
+
+    message = db.Column(db.String(500), nullable=True)
@@ -0,0 +1,26 @@
+from app import db
+from sqlalchemy import DateTime, ForeignKey, Text
+from datetime import datetime
+
+# --- AnalyticsJob Table ---
+# Long-running calculations submitted through /api/jobs (see app/services/jobs.py)
+class AnalyticsJob(db.Model):
+    __tablename__ = 'analytics_job'
+
+    job_id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    job_type = db.Column(db.String(64), nullable=False)
+    user_id = db.Column(db.Integer, ForeignKey('user.id'), nullable=True)
+
+    # queued -> running -> succeeded / failed
+    status = db.Column(db.String(16), nullable=False, default='queued')
+    params_json = db.Column(Text, nullable=False)
+    result_json = db.Column(Text, nullable=True)
+    error = db.Column(Text, nullable=True)
+
+    created_at = db.Column(DateTime, default=datetime.utcnow)
+    started_at = db.Column(DateTime, nullable=True)
+    finished_at = db.Column(DateTime, nullable=True)
+    expires_at = db.Column(DateTime, nullable=True, index=True)
+
+    def __repr__(self):
+        return f'<AnalyticsJob {self.job_id} {self.status}>'
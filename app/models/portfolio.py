@@ -6,6 +6,18 @@ from datetime import datetime
 # --- PortfolioSummary Table ---
 class PortfolioSummary(db.Model):
     __tablename__ = 'portfolio_summary'
+    __table_args__ = (
+        # portfolios.list: one index per keyset sort key (the primary key is the implicit
+        # tiebreaker), and portfolios recently shared with the user
+        db.Index('ix_portfolio_summary_user_id_is_shown_portfolio_name', 'user_id', 'is_shown', 'portfolio_name'),
+        db.Index('ix_portfolio_summary_user_id_is_shown_created_at', 'user_id', 'is_shown', 'created_at'),
+        db.Index('ix_portfolio_summary_user_id_is_shown_return_percent', 'user_id', 'is_shown', 'return_percent'),
+        db.Index('ix_portfolio_summary_user_id_is_shown_current_value', 'user_id', 'is_shown', 'current_value'),
+        db.Index('ix_portfolio_summary_user_id_is_shown_cagr', 'user_id', 'is_shown', 'cagr'),
+        db.Index('ix_portfolio_summary_user_id_is_shown_volatility', 'user_id', 'is_shown', 'volatility'),
+        db.Index('ix_portfolio_summary_user_id_is_shown_max_drawdown', 'user_id', 'is_shown', 'max_drawdown'),
+        db.Index('ix_portfolio_summary_user_id_shared_from_id_created_at', 'user_id', 'shared_from_id', 'created_at'),
+    )
 
     portfolio_id = db.Column(db.Integer, primary_key=True)
     portfolio_name = db.Column(db.String(255), nullable=False)
@@ -29,6 +41,9 @@ class PortfolioSummary(db.Model):
     calculated_at = db.Column(Date, nullable=True)
     allocation_json = db.Column(Text, nullable=False)
 
+    # Highest PortfolioVersion.version_number, so new versions need no max() query
+    latest_version_number = db.Column(db.Integer, nullable=True)
+
     start_date = db.Column(Date, nullable=False)
     initial_amount = db.Column(Float, nullable=False)
 
@@ -52,32 +67,13 @@ class PortfolioSummary(db.Model):
     def __repr__(self):
         return f'<PortfolioSummary {self.portfolio_name}>'
 
-    # Helper method to update user info from related users
-    def update_user_info(self):
-        from app.models.user import User
-        
-        # Update owner info
-        owner = User.query.get(self.user_id)
-        if owner:
-            self.user_username = owner.username
-            self.user_email = owner.user_email
-            
-        # Update creator info  
-        creator = User.query.get(self.creator_id)
-        if creator:
-            self.creator_username = creator.username
-            self.creator_email = creator.user_email
-            
-        # Update shared_from info if applicable
-        if self.shared_from_id:
-            shared_from = User.query.get(self.shared_from_id)
-            if shared_from:
-                self.shared_from_username = shared_from.username
-                self.shared_from_email = shared_from.user_email
-
 # --- PortfolioVersion Table ---
 class PortfolioVersion(db.Model):
     __tablename__ = 'portfolio_version'
+    __table_args__ = (
+        # Latest version lookup: max(version_number) for one portfolio
+        db.Index('ix_portfolio_version_portfolio_id_version_number', 'portfolio_id', 'version_number'),
+    )
 
     portfolio_version_id = db.Column(db.Integer, primary_key=True)
     portfolio_id = db.Column(db.Integer, ForeignKey('portfolio_summary.portfolio_id'), nullable=False)
@@ -85,13 +81,22 @@ class PortfolioVersion(db.Model):
     updated_by = db.Column(db.Integer, ForeignKey('user.id'), nullable=False)
     updated_at = db.Column(DateTime, default=datetime.utcnow)
 
-    allocation_json = db.Column(Text, nullable=False)
+    # Snapshots store the full state below; other versions only store delta_json,
+    # the changes since the previous version (see app/services/versions.py)
+    is_snapshot = db.Column(Boolean, nullable=False, default=True)
+    delta_json = db.Column(Text, nullable=True)
+
+    allocation_json = db.Column(Text, nullable=True)
 
     # Optional fields (can be duplicated for easier recovery)
     portfolio_name = db.Column(db.String(255), nullable=True)
     start_date = db.Column(Date, nullable=True)
     initial_amount = db.Column(Float, nullable=True)
 
+    # Metrics of this version, computed on demand for the given price data version
+    metrics_json = db.Column(Text, nullable=True)
+    metrics_data_version = db.Column(db.Integer, nullable=True)
+
     def __repr__(self):
         return f'<PortfolioVersion {self.portfolio_version_id}>'
 
@@ -120,7 +125,7 @@ class PortfolioShareLog(db.Model):
     from_user_id = db.Column(db.Integer, ForeignKey('user.id'), nullable=False)
     to_user_id = db.Column(db.Integer, ForeignKey('user.id'), nullable=False)
 
-    from_portfolio_id = db.Column(db.Integer, ForeignKey('portfolio_summary.portfolio_id'), nullable=False)
+    from_portfolio_id = db.Column(db.Integer, ForeignKey('portfolio_summary.portfolio_id'), nullable=False, index=True)
     to_portfolio_id = db.Column(db.Integer, ForeignKey('portfolio_summary.portfolio_id'), nullable=False)
 
     shared_at = db.Column(DateTime, default=datetime.utcnow)
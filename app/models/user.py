@@ -1,5 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
+from sqlalchemy import event
 from sqlalchemy.orm import relationship
 from app import db
 from datetime import datetime
@@ -8,14 +9,35 @@ class User(db.Model, UserMixin):
     __tablename__ = 'user'
 
     id = db.Column(db.Integer, primary_key=True)
-    username = db.Column(db.String(200), nullable=False)  # New username field
+    username = db.Column(db.String(200), nullable=False, index=True)  # New username field
     user_email = db.Column(db.String(200), nullable=False, unique=True)
     user_pswd = db.Column(db.String(200), nullable=False)
     user_fName = db.Column(db.String(200), nullable=False)
     user_lName = db.Column(db.String(200), nullable=False)
     user_token = db.Column(db.String(1000), nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=True)
+
+    # Lower-cased copies for indexed prefix search (see app/services/user_search.py),
+    # kept in sync by the listeners below
+    username_norm = db.Column(db.String(200), nullable=True, index=True)
+    first_name_norm = db.Column(db.String(200), nullable=True, index=True)
+    last_name_norm = db.Column(db.String(200), nullable=True, index=True)
+    email_norm = db.Column(db.String(200), nullable=True, index=True)
     
     portfolio_summaries = relationship("PortfolioSummary", foreign_keys='PortfolioSummary.user_id', back_populates="user")
     created_portfolios = relationship("PortfolioSummary", foreign_keys='PortfolioSummary.creator_id', back_populates="creator")
     shared_portfolios = relationship("PortfolioSummary", foreign_keys='PortfolioSummary.shared_from_id', back_populates="shared_from")
+
+
+def normalize_search_text(value):
+    """Lower-case and trim a value the way the *_norm search columns store it."""
+    return value.strip().lower() if value else None
+
+
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+def _sync_search_columns(mapper, connection, user):
+    user.username_norm = normalize_search_text(user.username)
+    user.first_name_norm = normalize_search_text(user.user_fName)
+    user.last_name_norm = normalize_search_text(user.user_lName)
+    user.email_norm = normalize_search_text(user.user_email)
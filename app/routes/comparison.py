@@ -1,9 +1,8 @@
 from flask import Blueprint, render_template, abort, request
 from flask_login import login_required, current_user
-from sqlalchemy import func
 from app.models.portfolio import PortfolioSummary
-from app.models.asset import Price, Asset
-from app import db
+from app.services.asset_catalog import get_asset_catalog
+from app.services.coverage import common_window
 import json
 from datetime import datetime
 
@@ -56,22 +55,11 @@ def view_comparison():
     asset_codes = list(set(weights_a) | set(weights_b) | set(weights_spy))
 
     # Acumulate start_date and end_date
-    start_date_result = (
-        db.session.query(func.min(Price.date))
-                  .filter(Price.asset_code.in_(asset_codes))
-                  .group_by(Price.asset_code)
-                  .all()
-    )
-    start_date = max((r[0] for r in start_date_result), default=datetime(2015,1,1))
+    first_date, last_date = common_window(asset_codes)
+    start_date = first_date or datetime(2015,1,1)
     start_str = start_date.strftime("%Y-%m-%d")
 
-    end_date_result = (
-        db.session.query(func.max(Price.date))
-                  .filter(Price.asset_code.in_(asset_codes))
-                  .group_by(Price.asset_code)
-                  .all()
-    )
-    end_date = min((r[0] for r in end_date_result), default=datetime.today())
+    end_date = last_date or datetime.today()
     end_str = end_date.strftime("%Y-%m-%d")
 
     # Get the last updated date
@@ -81,7 +69,7 @@ def view_comparison():
         updated_at = datetime.today().strftime("%b %d %Y") if not p_a else "Unknown"
 
     # Fetch asset info for descriptions
-    assets_info_a = Asset.query.filter(Asset.asset_code.in_(weights_a.keys())).all()
+    assets_info_a = get_asset_catalog().lookup(weights_a.keys())
 
     # Construct { name, description, weight, ticker, logo_url } list for Portfolio A
     descriptions_a = []
@@ -97,7 +85,7 @@ def view_comparison():
             })
 
     # Process assets for Portfolio B
-    assets_info_b = Asset.query.filter(Asset.asset_code.in_(weights_b.keys())).all()
+    assets_info_b = get_asset_catalog().lookup(weights_b.keys())
     
     # Construct { name, description, weight, ticker, logo_url } list for Portfolio B
     descriptions_b = []
@@ -1,13 +1,14 @@
 from flask import Blueprint, render_template, abort
 from flask_login import login_required, current_user
-from sqlalchemy import func
 from app.models.portfolio import PortfolioSummary
-from app.models.asset import Price
-from app import db
 import json
 from datetime import datetime
-from flask import request, jsonify
-from app.services.calculation import calculate_portfolio_metrics
+from flask import current_app, request, jsonify
+from app.services.calculation import calculate_portfolio_metrics, calculate_drawdown_series
+from app.services.executor import run_analytics
+from app.services.admission import admit
+from app.services.data_version import current_price_version
+from app.services.coverage import common_window
 
 dashboard = Blueprint("dashboard", __name__)
 
@@ -40,15 +41,9 @@ def show(portfolio_id):
         updated_at = portfolio.metric_updated_at.strftime("%b %d %Y") if portfolio.metric_updated_at else "Unknown"
 
     # Compute shared start and end dates
-    start_date_result = db.session.query(func.min(Price.date)).filter(
-        Price.asset_code.in_(asset_codes)
-    ).group_by(Price.asset_code).all()
-    start_date = max((r[0] for r in start_date_result), default=datetime(2015, 1, 1)).strftime("%Y-%m-%d")
-
-    end_date_result = db.session.query(func.max(Price.date)).filter(
-        Price.asset_code.in_(asset_codes)
-    ).group_by(Price.asset_code).all()
-    end_date = min((r[0] for r in end_date_result), default=datetime.today()).strftime("%Y-%m-%d")
+    first_date, last_date = common_window(asset_codes)
+    start_date = (first_date or datetime(2015, 1, 1)).strftime("%Y-%m-%d")
+    end_date = (last_date or datetime.today()).strftime("%Y-%m-%d")
 
     # Allocation summary string
     asset_string = " + ".join([f"{int(w * 100)}% {code}" for code, w in weights.items()])
@@ -61,10 +56,25 @@ def show(portfolio_id):
         updated_at=updated_at,
         start_date=start_date,
         end_date=end_date,
-        initial_investment=initial_investment
+        initial_investment=initial_investment,
+        data_version=current_price_version(),
+        price_stream=current_app.config.get("PRICE_STREAM_ENABLED", False)
     )
+
+# Rank the assets of a portfolio by their own return since start_date (runs in the analytics pool)
+def rank_asset_returns(weights, start_date, initial_amount):
+    asset_returns = []
+    for asset, weight in weights.items():
+        metrics = calculate_portfolio_metrics({asset: 1.0}, start_date, initial_amount, fields=["return_percent"])
+        if metrics and "return_percent" in metrics:
+            asset_returns.append((asset, round(metrics["return_percent"] * 100, 2)))
+
+    asset_returns.sort(key=lambda x: x[1], reverse=True)
+    return asset_returns
+
 @dashboard.route("/api/portfolio-top-movers", methods=["POST"])
 @login_required
+@admit(cost=3)
 def top_movers():
     data = request.get_json()
     weights = data.get("weights", {})
@@ -74,13 +84,7 @@ def top_movers():
     start_date = "2015-01-01"
     initial_amount = 1000
 
-    asset_returns = []
-    for asset, weight in weights.items():
-        metrics = calculate_portfolio_metrics({asset: 1.0}, start_date, initial_amount, fields=["return_percent"])
-        if metrics and "return_percent" in metrics:
-            asset_returns.append((asset, round(metrics["return_percent"] * 100, 2)))
-
-    asset_returns.sort(key=lambda x: x[1], reverse=True)
+    asset_returns = run_analytics(rank_asset_returns, weights, start_date, initial_amount)
     top = asset_returns[:3]
     bottom = asset_returns[-3:] if len(asset_returns) > 3 else []
 
@@ -92,9 +96,8 @@ def top_movers():
 
 @dashboard.route("/api/portfolio-drawdown", methods=["POST"])
 @login_required
+@admit(cost=1)
 def portfolio_drawdown():
-    from app.services.calculation import calculate_drawdown_series
-
     data = request.get_json(force=True)
     weights = data.get("weights", {})
     start_date = data.get("start_date")
@@ -103,7 +106,7 @@ def portfolio_drawdown():
     if not weights or not start_date:
         return jsonify({"error": "Missing required parameters"}), 400
 
-    result = calculate_drawdown_series(weights, start_date, initial_amount)
+    result = run_analytics(calculate_drawdown_series, weights, start_date, initial_amount)
     if not result:
         return jsonify({"labels": [], "values": []})
 
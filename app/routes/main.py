@@ -1,4 +1,9 @@
-from flask import Blueprint, render_template, redirect, url_for
+import os
+
+from flask import Blueprint, current_app, jsonify, render_template, redirect, url_for
+from sqlalchemy import text
+
+from app import db
 
 # Define main blueprint and portfolios blueprint
 main = Blueprint("main", __name__)
@@ -11,3 +16,34 @@ def home():
 @portfolios.route("/")
 def list():
     return render_template("portfolio_list.html")
+
+# Liveness: the process is up and serving requests
+@main.route("/healthz")
+def healthz():
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+# Readiness: the database answers and holds prices, so the worker can take traffic
+@main.route("/readyz")
+def readyz():
+    from app.services.coverage import global_window
+    from app.services.data_version import current_price_version
+
+    checks = {"database": False, "prices": False}
+    try:
+        db.session.execute(text("SELECT 1"))
+        checks["database"] = True
+        checks["prices"] = global_window()[0] is not None
+        version = current_price_version()
+    except Exception:
+        db.session.rollback()
+        version = None
+
+    warm = current_app.extensions.get("warm_state")
+    ready = all(checks.values())
+    return jsonify({
+        "status": "ready" if ready else "unavailable",
+        "checks": checks,
+        "data_version": version,
+        "warm_version": warm["version"] if warm else None,
+        "pid": os.getpid(),
+    }), 200 if ready else 503
@@ -1,17 +1,23 @@
 import json
-import sqlite3
 import traceback
 import os
 from datetime import datetime, timedelta 
 
-from flask import Blueprint, redirect, render_template, request, url_for, abort, jsonify, current_app
+from flask import Blueprint, current_app, redirect, render_template, request, url_for, abort, jsonify
 from flask_login import login_required, current_user
 
 from app.services.calculation import calculate_portfolio_metrics
+from app.services.asset_catalog import get_asset_catalog
+from app.services.coverage import global_window
+from app.services.sharing import share_portfolio_with_users
+from app.services.rate_limit import get_limiter, rate_limited_response
+from app.services.user_search import search_users
+from app.services.pagination import DEFAULT_PAGE_SIZE, InvalidCursor, keyset_paginate, parse_page_size
+from app.services.versions import (
+    record_version, reconstruct_version, serialize_version, version_metrics, state_from_portfolio, diff_states
+)
 from app.models.portfolio import PortfolioSummary, PortfolioChangeLog, PortfolioShareLog, PortfolioVersion
-from app.models.asset import Price
 from app.models.user import User 
-from sqlalchemy import func
 from app import db  
 
 # Define portfolios blueprint
@@ -21,41 +27,17 @@ portfolios = Blueprint("portfolios", __name__, url_prefix="/portfolios")
 @portfolios.route("/")
 @login_required
 def list():
-    # Get portfolios for the current user from database (only shown portfolios)
-    user_portfolios = PortfolioSummary.query.filter_by(
-        user_id=current_user.id, 
-        is_shown=True
-    ).all()
-    
-    # Check for recently shared portfolios (within the last 24 hours)
-    one_day_ago = datetime.utcnow() - timedelta(hours=24)
-    recent_shares = PortfolioSummary.query.filter(
-        PortfolioSummary.user_id == current_user.id,
-        PortfolioSummary.shared_from_id.isnot(None),
-        PortfolioSummary.created_at >= one_day_ago,
-        PortfolioSummary.is_shown == True
-    ).all()
-    
-    # Prepare the alert message if there are recent shares
-    share_alert = None
-    if recent_shares:
-        # Get unique sharers' usernames
-        sharer_usernames = set(share.creator_username for share in recent_shares)
-        portfolio_count = len(recent_shares)
-        
-        if len(sharer_usernames) == 1:
-            # Single sharer
-            sharer = next(iter(sharer_usernames))
-            if portfolio_count == 1:
-                share_alert = f"{sharer} has shared a portfolio with you."
-            else:
-                share_alert = f"{sharer} has shared {portfolio_count} portfolios with you."
-        else:
-            # Multiple sharers
-            share_alert = f"{len(sharer_usernames)} users have shared {portfolio_count} portfolios with you."
+    sort, order = _sort_params(request.args)
+    try:
+        page = _portfolio_page(sort, order, request.args)
+    except InvalidCursor as e:
+        abort(400, description=str(e))
+    user_portfolios = page.items
+
+    share_alert = _recent_share_alert()
     
     # If user has no portfolios, create a demo portfolio
-    if not user_portfolios:
+    if not user_portfolios and not request.args.get("cursor"):
         try:
             print(f"No portfolios found for user {current_user.username}, creating demo portfolio")
             
@@ -141,52 +123,120 @@ def list():
             db.session.commit()
             
             # Create initial version record
-            initial_version = PortfolioVersion(
-                portfolio_id=demo_portfolio.portfolio_id,
-                version_number=1,  # First version
-                updated_by=current_user.id,
-                updated_at=datetime.utcnow(),
-                allocation_json=json.dumps(successful_allocation),
-                portfolio_name=demo_portfolio.portfolio_name,
-                start_date=demo_portfolio.start_date,
-                initial_amount=initial_amount
-            )
-            db.session.add(initial_version)
+            record_version(demo_portfolio, updated_by=current_user.id)
             db.session.commit()
             
-            # Get updated portfolio list including the demo (ALSO FILTER BY is_shown=True)
-            user_portfolios = PortfolioSummary.query.filter_by(
-                user_id=current_user.id,
-                is_shown=True
-            ).all()
+            # Get updated portfolio list including the demo
+            page = _portfolio_page(sort, order, request.args)
+            user_portfolios = page.items
             
         except Exception as e:
             print(f"Error creating demo portfolio: {str(e)}")
             print(traceback.format_exc())
     
-    # Convert database objects to dictionaries for template
+    portfolios_list = _serialize_portfolios(user_portfolios)
+    
+    earliest_date, latest_date = global_window()
+    return render_template("portfolio/portfolio_list.html", 
+                          portfolios=portfolios_list, 
+                          earliest_date=earliest_date, 
+                          latest_date=latest_date,
+                          share_alert=share_alert,
+                          sort=sort,
+                          order=order,
+                          cursor=request.args.get("cursor"),
+                          next_cursor=page.next_cursor)
+
+# Sort keys accepted by the paginated portfolio list
+PORTFOLIO_SORTS = {
+    "name": PortfolioSummary.portfolio_name,
+    "created_at": PortfolioSummary.created_at,
+    "return_percent": PortfolioSummary.return_percent,
+    "current_value": PortfolioSummary.current_value,
+    "cagr": PortfolioSummary.cagr,
+    "volatility": PortfolioSummary.volatility,
+    "max_drawdown": PortfolioSummary.max_drawdown,
+}
+
+def _sort_params(args):
+    """Return (sort, order) from the query string, falling back to created_at asc."""
+    sort = args.get("sort", "created_at")
+    if sort not in PORTFOLIO_SORTS:
+        sort = "created_at"
+    order = "desc" if args.get("order") == "desc" else "asc"
+    return sort, order
+
+def _portfolio_page(sort, order, args):
+    """One keyset page of the current user's shown portfolios."""
+    query = PortfolioSummary.query.filter_by(user_id=current_user.id, is_shown=True)
+    return keyset_paginate(
+        query,
+        sort_key=sort,
+        sort_column=PORTFOLIO_SORTS[sort],
+        id_column=PortfolioSummary.portfolio_id,
+        descending=order == "desc",
+        cursor=args.get("cursor"),
+        limit=parse_page_size(args.get("limit"), current_app.config.get("PORTFOLIO_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+    )
+
+def _recent_share_alert():
+    """Alert text for portfolios shared with the current user in the last 24 hours."""
+    one_day_ago = datetime.utcnow() - timedelta(hours=24)
+    recent_shares = db.session.query(
+        PortfolioSummary.creator_username,
+        db.func.count(PortfolioSummary.portfolio_id)
+    ).filter(
+        PortfolioSummary.user_id == current_user.id,
+        PortfolioSummary.shared_from_id.isnot(None),
+        PortfolioSummary.created_at >= one_day_ago,
+        PortfolioSummary.is_shown == True
+    ).group_by(PortfolioSummary.creator_username).all()
+
+    if not recent_shares:
+        return None
+
+    portfolio_count = sum(count for _, count in recent_shares)
+    if len(recent_shares) == 1:
+        # Single sharer
+        sharer = recent_shares[0][0]
+        if portfolio_count == 1:
+            return f"{sharer} has shared a portfolio with you."
+        return f"{sharer} has shared {portfolio_count} portfolios with you."
+
+    # Multiple sharers
+    return f"{len(recent_shares)} users have shared {portfolio_count} portfolios with you."
+
+def _serialize_portfolios(user_portfolios):
+    """Convert a page of portfolios to the dictionaries used by the list template and API."""
+    # Share history of the portfolios on this page created by the current user, in one
+    # query, together with the username of the user each one was shared with
+    own_ids = [p.portfolio_id for p in user_portfolios if p.creator_id == current_user.id]
+    share_history_by_portfolio = {}
+    if own_ids:
+        share_logs = db.session.query(
+            PortfolioShareLog.from_portfolio_id,
+            PortfolioShareLog.shared_at,
+            User.username
+        ).join(
+            User, User.id == PortfolioShareLog.to_user_id
+        ).filter(
+            PortfolioShareLog.from_portfolio_id.in_(own_ids)
+        ).order_by(PortfolioShareLog.portfolio_share_id).all()
+
+        for from_portfolio_id, shared_at, username in share_logs:
+            # Convert UTC time to Perth time (+8 hours) for display
+            perth_time = shared_at + timedelta(hours=8)
+            share_history_by_portfolio.setdefault(from_portfolio_id, []).append({
+                'username': username,
+                'shared_at': perth_time.strftime('%d/%m/%Y %H:%M')
+            })
+
     portfolios_list = []
     for p in user_portfolios:
         # Convert allocation JSON string to a readable format
         allocation_dict = json.loads(p.allocation_json)
         allocation_str = ", ".join([f"{k}: {int(v*100)}%" for k, v in allocation_dict.items()])
         
-        # Get share history for this portfolio
-        share_history = []
-        if p.creator_id == current_user.id:  # Only get share history for portfolios created by current user
-            share_logs = PortfolioShareLog.query.filter_by(from_portfolio_id=p.portfolio_id).all()
-            
-            for log in share_logs:
-                # Get the username of the user this portfolio was shared with
-                shared_user = User.query.get(log.to_user_id)
-                if shared_user:
-                    # Convert UTC time to Perth time (+8 hours) for display
-                    perth_time = log.shared_at + timedelta(hours=8)
-                    share_history.append({
-                        'username': shared_user.username,
-                        'shared_at': perth_time.strftime('%d/%m/%Y %H:%M') 
-                    })
-        
         portfolios_list.append({
             "portfolio_id": p.portfolio_id,
             "portfolio_name": p.portfolio_name,
@@ -195,37 +245,44 @@ def list():
             "is_shared": p.shared_from_id is not None,
             "is_editable": p.is_editable and p.creator_id == current_user.id,  
             "is_shareable": p.is_shareable and p.creator_id == current_user.id, 
-            "share_history": share_history,  # Add share history to the portfolio object
+            # Only portfolios created by the current user have a share history
+            "share_history": share_history_by_portfolio.get(p.portfolio_id, []),
+            "created_at": p.created_at.isoformat() if p.created_at else None,
             "current_value": p.current_value,
             "return_percent": p.return_percent,
             "cagr": p.cagr,
             "volatility": p.volatility,
             "max_drawdown": p.max_drawdown
         })
-    
-    earliest_date = db.session.query(func.min(Price.date)).scalar()
-    latest_date = db.session.query(func.max(Price.date)).scalar()
-    return render_template("portfolio/portfolio_list.html", 
-                          portfolios=portfolios_list, 
-                          earliest_date=earliest_date, 
-                          latest_date=latest_date,
-                          share_alert=share_alert)
+    return portfolios_list
 
-from app.models.asset import Asset  # Import existing model
+# Paginated portfolio list as JSON
+@portfolios.route("/api/list", methods=["GET"])
+@login_required
+def list_api():
+    """API endpoint returning one page of the user's portfolios.
+
+    Query parameters: sort (name, created_at, current_value, return_percent, cagr,
+    volatility, max_drawdown), order (asc, desc), limit and cursor (the next_cursor
+    of the previous page).
+    """
+    sort, order = _sort_params(request.args)
+    try:
+        page = _portfolio_page(sort, order, request.args)
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "portfolios": _serialize_portfolios(page.items),
+        "sort": sort,
+        "order": order,
+        "next_cursor": page.next_cursor
+    })
 
 def get_assets():
-    """Get assets using SQLAlchemy instead of raw sqlite3, to support memory DB."""
+    """Assets offered in the portfolio form, from the cached asset catalog."""
     try:
-        results = Asset.query.filter(Asset.type != 'etf').all()
-        return [
-            {
-                'code': asset.asset_code,
-                'name': asset.display_name,
-                'company': asset.full_name,
-                'logo_url': asset.logo_url
-            }
-            for asset in results
-        ]
+        return get_asset_catalog().form_options()
     except Exception as db_error:
         print(f"Database error when fetching assets: {str(db_error)}")
         print(traceback.format_exc())
@@ -302,17 +359,7 @@ def create():
                     new_portfolio.portfolio_name = f"{current_user.username}'s portfolio{new_portfolio.portfolio_id}"
                 
                 # Create initial version record
-                initial_version = PortfolioVersion(
-                    portfolio_id=new_portfolio.portfolio_id,
-                    version_number=1,  # First version
-                    updated_by=current_user.id,
-                    updated_at=datetime.utcnow(),
-                    allocation_json=json.dumps(allocation),
-                    portfolio_name=new_portfolio.portfolio_name,
-                    start_date=new_portfolio.start_date,
-                    initial_amount=initial_amount
-                )
-                db.session.add(initial_version)
+                record_version(new_portfolio, updated_by=current_user.id)
                 
                 # Commit the changes
                 db.session.commit()
@@ -356,7 +403,7 @@ def edit(portfolio_id):
     
     if request.method == "POST":
         # Get the updated portfolio name from the form
-        portfolio_name = request.form.get("portfolio_name")
+        portfolio_name = request.form.get("portfolio_name") or portfolio.portfolio_name
         original_portfolio_name = portfolio.portfolio_name  # Store original name for comparison
         
         # Collect allocation data and convert to the correct format
@@ -376,81 +423,69 @@ def edit(portfolio_id):
         initial_amount = 1000.0
         start_date = "2015-01-01"
 
+        # Work out what actually changed; an unchanged form writes nothing
+        old_state = state_from_portfolio(portfolio)
+        changes = diff_states(old_state, dict(old_state, allocation=allocation, portfolio_name=portfolio_name))
+        allocation_changed = "set" in changes or "remove" in changes
+        if not changes:
+            return redirect(url_for('portfolios.list', portfolio_id=portfolio.portfolio_id))
+
+        # Everything below is one transaction: summary, version and change logs
         try:
-            metrics = calculate_portfolio_metrics(
-                allocation=allocation,
-                start_date=start_date,
-                initial_amount=initial_amount
-            )
+            now = datetime.utcnow()
+            
+            # Metrics only depend on the allocation
+            if allocation_changed:
+                metrics = calculate_portfolio_metrics(
+                    allocation=allocation,
+                    start_date=start_date,
+                    initial_amount=initial_amount
+                )
+                
+                portfolio.allocation_json = json.dumps(allocation)
+                # Use dictionary get() method with original values as defaults
+                portfolio.current_value = metrics.get('current_value', portfolio.current_value or initial_amount)
+                portfolio.profit = metrics.get('profit', portfolio.profit or 0.0)  # Update profit
+                portfolio.return_percent = metrics.get('return_percent', portfolio.return_percent or 0.0)
+                portfolio.cagr = metrics.get('cagr', portfolio.cagr or 0.0)
+                portfolio.volatility = metrics.get('volatility', portfolio.volatility or 0.0)
+                portfolio.max_drawdown = metrics.get('max_drawdown', portfolio.max_drawdown or 0.0)
+                portfolio.metric_updated_at = now  # Update metric_updated_at
             
-            # Update the existing portfolio in the database
             portfolio.portfolio_name = portfolio_name
-            portfolio.allocation_json = json.dumps(allocation)
-            # Use dictionary get() method with original values as defaults
-            portfolio.current_value = metrics.get('current_value', portfolio.current_value or initial_amount)
-            portfolio.profit = metrics.get('profit', portfolio.profit or 0.0)  # Update profit
-            portfolio.return_percent = metrics.get('return_percent', portfolio.return_percent or 0.0)
-            portfolio.cagr = metrics.get('cagr', portfolio.cagr or 0.0)
-            portfolio.volatility = metrics.get('volatility', portfolio.volatility or 0.0)
-            portfolio.max_drawdown = metrics.get('max_drawdown', portfolio.max_drawdown or 0.0)
-            portfolio.input_updated_at = datetime.utcnow()
-            portfolio.metric_updated_at = datetime.utcnow()  # Update metric_updated_at
+            portfolio.input_updated_at = now
             
             # Update user information in case it changed
             portfolio.user_username = current_user.username
             portfolio.user_email = current_user.user_email
             
-            # Get the latest version number
-            latest_version = db.session.query(func.max(PortfolioVersion.version_number))\
-                .filter_by(portfolio_id=portfolio.portfolio_id).scalar() or 0
-            
-            # Create a new version record
-            new_version = PortfolioVersion(
-                portfolio_id=portfolio.portfolio_id,
-                version_number=latest_version + 1,
-                updated_by=current_user.id,
-                updated_at=datetime.utcnow(),
-                allocation_json=json.dumps(allocation),
-                portfolio_name=portfolio_name,
-                start_date=portfolio.start_date,
-                initial_amount=portfolio.initial_amount
-            )
-            db.session.add(new_version)
+            # Create a new version record (a delta against the previous version)
+            record_version(portfolio, updated_by=current_user.id, updated_at=now)
             
-            db.session.commit()
-            
-            # Record change in portfolio history with correct field names
-            try:
-                # Create a log entry for this change using the correct model fields
-                change_log = PortfolioChangeLog(
+            # Record only the fields that really changed
+            if allocation_changed:
+                db.session.add(PortfolioChangeLog(
                     portfolio_id=portfolio.portfolio_id,
                     changed_by=current_user.id,
                     field_changed="allocation", 
                     old_value=json.dumps(current_allocation), 
                     new_value=json.dumps(allocation),
-                    timestamp=datetime.utcnow()  
-                )
-                
-                db.session.add(change_log)
-                db.session.commit()
-                
-                if portfolio_name != original_portfolio_name:  # Compare with original name
-                    name_change_log = PortfolioChangeLog(
-                        portfolio_id=portfolio.portfolio_id,
-                        changed_by=current_user.id,
-                        field_changed="portfolio_name",
-                        old_value=original_portfolio_name,
-                        new_value=portfolio_name,
-                        timestamp=datetime.utcnow() 
-                    )
-                    db.session.add(name_change_log)
-                    db.session.commit()
-                
-            except Exception as log_error:
-                print(f"Could not record portfolio change: {str(log_error)}")
-                # Continue even if logging fails
+                    timestamp=now
+                ))
+            if portfolio_name != original_portfolio_name:  # Compare with original name
+                db.session.add(PortfolioChangeLog(
+                    portfolio_id=portfolio.portfolio_id,
+                    changed_by=current_user.id,
+                    field_changed="portfolio_name",
+                    old_value=original_portfolio_name,
+                    new_value=portfolio_name,
+                    timestamp=now
+                ))
+            
+            db.session.commit()
             
         except Exception as e:
+            db.session.rollback()
             print(f"Calculation or DB error: {e}")
             print(traceback.format_exc())
             return render_template("portfolio/portfolio_form.html", 
@@ -461,40 +496,8 @@ def edit(portfolio_id):
 
         return redirect(url_for('portfolios.list', portfolio_id=portfolio.portfolio_id))
     
-    # Fetch assets from the database, excluding 'etf' type
-    try:
-        # Get database path from app config
-        db_uri = current_app.config['SQLALCHEMY_DATABASE_URI']
-        
-        # Extract SQLite file path from URI
-        if db_uri.startswith('sqlite:///'):
-            db_path = db_uri.replace('sqlite:///', '')
-        else:
-            # If not using SQLite, raise exception
-            raise Exception("Only SQLite database is supported for direct connection")
-            
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-
-        cursor.execute("""
-            SELECT asset_code, display_name, full_name, logo_url 
-            FROM assets
-            WHERE type != 'etf'  -- Exclude 'etf' assets
-            ORDER BY display_name
-        """)
-        assets = []
-        for row in cursor.fetchall():
-            assets.append({
-                'code': row[0],
-                'name': row[1],
-                'company': row[2],
-                'logo_url': row[3]
-            })
-
-        conn.close()
-    except Exception as db_error:
-        print(f"Database error when fetching assets: {str(db_error)}")
-        assets = []
+    # Assets for the form, excluding 'etf' type
+    assets = get_assets()
     
     # Show edit form for GET request with current portfolio data
     return render_template("portfolio/portfolio_form.html", 
@@ -502,6 +505,39 @@ def edit(portfolio_id):
                           current_allocation=current_allocation, 
                           assets=assets)
 
+# Version history of a portfolio (newest first, without the allocation details)
+@portfolios.route("/<int:portfolio_id>/versions", methods=["GET"])
+@login_required
+def versions(portfolio_id):
+    portfolio = PortfolioSummary.query.get_or_404(portfolio_id)
+    if portfolio.user_id != current_user.id:
+        abort(403, description="You don't have permission to view this portfolio")
+
+    rows = PortfolioVersion.query.filter_by(portfolio_id=portfolio_id)\
+        .order_by(PortfolioVersion.version_number.desc()).all()
+    return jsonify({
+        "portfolio_id": portfolio_id,
+        "latest_version_number": portfolio.latest_version_number,
+        "versions": [serialize_version(row) for row in rows]
+    })
+
+# A single version, rebuilt from the nearest snapshot; ?metrics=1 adds its metrics
+@portfolios.route("/<int:portfolio_id>/versions/<int:version_number>", methods=["GET"])
+@login_required
+def version_detail(portfolio_id, version_number):
+    portfolio = PortfolioSummary.query.get_or_404(portfolio_id)
+    if portfolio.user_id != current_user.id:
+        abort(403, description="You don't have permission to view this portfolio")
+
+    row, state = reconstruct_version(portfolio_id, version_number)
+    if row is None:
+        return jsonify({"error": "Version not found"}), 404
+
+    data = serialize_version(row, state)
+    if request.args.get("metrics") in ("1", "true"):
+        data["metrics"] = version_metrics(row, state)
+    return jsonify(data)
+
 # Delete Portfolio (Soft Delete)
 @portfolios.route("/<int:portfolio_id>/delete", methods=["POST"])
 @login_required
@@ -542,9 +578,22 @@ def delete(portfolio_id):
 @portfolios.route("/api/users", methods=["GET"])
 @login_required
 def get_users():
-    """API endpoint to fetch all users except the current user"""
-    # Query all users except the current user
-    users = User.query.filter(User.id != current_user.id).all()
+    """API endpoint to fetch one page of users (except the current user), by username.
+
+    Query parameters: limit and cursor (the next_cursor of the previous page).
+    """
+    query = User.query.filter(User.id != current_user.id)
+    try:
+        page = keyset_paginate(
+            query,
+            sort_key="username",
+            sort_column=User.username,
+            id_column=User.id,
+            cursor=request.args.get("cursor"),
+            limit=parse_page_size(request.args.get("limit"), current_app.config.get("USER_DIRECTORY_PAGE_SIZE", DEFAULT_PAGE_SIZE))
+        )
+    except InvalidCursor as e:
+        return jsonify({"error": str(e)}), 400
     
     # Format user data for response
     user_list = [
@@ -552,10 +601,34 @@ def get_users():
             "id": user.id,
             "username": user.username
         }
-        for user in users
+        for user in page.items
     ]
     
-    return jsonify({"users": user_list})
+    return jsonify({"users": user_list, "next_cursor": page.next_cursor})
+
+# API to search users for sharing (type-ahead)
+@portfolios.route("/api/users/search", methods=["GET"])
+@login_required
+def search_users_api():
+    """API endpoint returning the top matches for a username, name or email prefix.
+
+    Query parameters: q (the prefix) and limit (at most 20).
+    """
+    limiter = get_limiter(
+        "user_search",
+        rate=current_app.config.get("USER_SEARCH_RATE", 5),
+        burst=current_app.config.get("USER_SEARCH_BURST", 10)
+    )
+    retry_after = limiter.acquire(current_user.id)
+    if retry_after:
+        return rate_limited_response(retry_after)
+
+    users = search_users(
+        request.args.get("q", ""),
+        exclude_user_id=current_user.id,
+        limit=request.args.get("limit", 10, type=int)
+    )
+    return jsonify({"users": users})
 
 # API to share a portfolio
 @portfolios.route("/api/portfolios/share", methods=["POST"])
@@ -584,69 +657,13 @@ def share_portfolio():
     if not portfolio.is_shareable:
         return jsonify({"error": "This portfolio cannot be shared"}), 403
     
-    shared_with = []
-    for user_id in user_ids:
-        # Validate the target user exists
-        target_user = User.query.get(user_id)
-        if not target_user:
-            continue
-        
-        # Create a new portfolio for the target user
-        shared_portfolio = PortfolioSummary(
-            portfolio_name=f"{portfolio.portfolio_name} (Shared by {current_user.username})",
-            user_id=target_user.id,
-            creator_id=current_user.id,
-            shared_from_id=current_user.id,
-            allocation_json=portfolio.allocation_json,
-            start_date=portfolio.start_date,
-            initial_amount=portfolio.initial_amount,
-            current_value=portfolio.current_value,
-            profit=portfolio.profit,
-            return_percent=portfolio.return_percent,
-            cagr=portfolio.cagr,
-            volatility=portfolio.volatility,
-            max_drawdown=portfolio.max_drawdown,
-            created_at=datetime.utcnow(),
-            input_updated_at=datetime.utcnow(),
-            metric_updated_at=datetime.utcnow(),
-            is_editable=False,  # Shared portfolios are read-only
-            is_shareable=False,  # Shared portfolios cannot be shared further
-            is_deletable=False   # Shared portfolios cannot be deleted
-        )
-        
-        # Update user information for the shared portfolio
-        shared_portfolio.user_username = target_user.username
-        shared_portfolio.user_email = target_user.user_email
-        shared_portfolio.creator_username = current_user.username
-        shared_portfolio.creator_email = current_user.user_email
-        
-        db.session.add(shared_portfolio)
-        db.session.flush()  # Flush to get the new portfolio ID
-        
-        # Record the share in the PortfolioShareLog
-        share_log = PortfolioShareLog(
-            from_user_id=current_user.id,
-            to_user_id=target_user.id,
-            from_portfolio_id=portfolio.portfolio_id,
-            to_portfolio_id=shared_portfolio.portfolio_id,
-            shared_at=datetime.utcnow()
-        )
-        db.session.add(share_log)
-        
-        # Create initial version for shared portfolio
-        shared_version = PortfolioVersion(
-            portfolio_id=shared_portfolio.portfolio_id,
-            version_number=1,  
-            updated_by=current_user.id,
-            updated_at=datetime.utcnow(),
-            allocation_json=portfolio.allocation_json,
-            portfolio_name=shared_portfolio.portfolio_name,
-            start_date=shared_portfolio.start_date,
-            initial_amount=shared_portfolio.initial_amount
-        )
-        db.session.add(shared_version)
-        
-        shared_with.append(target_user.username)
+    # Copies, share logs and versions for all recipients are written in bulk
+    try:
+        shared_with = share_portfolio_with_users(portfolio, current_user, user_ids)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error sharing portfolio: {str(e)}")
+        return jsonify({"error": "Failed to share portfolio"}), 500
     
     try:
         db.session.commit()
@@ -6,6 +6,7 @@ from flask_mail import Message
 
 from app.forms.user import LoginForm, RegistrationForm, ResetRequestForm, ChangePasswordForm
 from app.models.user import User
+from app.services.user_info import refresh_user_info_for
 from app import db, mail
 
 user = Blueprint("user", __name__, url_prefix="/user")
@@ -85,6 +86,11 @@ def update():
         my_data.user_fName = request.form['firstname']
         my_data.user_lName = request.form['lastname']
         my_data.user_email = request.form['email']
+
+        # Keep the username/email copies on portfolio summaries in sync
+        if db.session.is_modified(my_data):
+            db.session.flush()
+            refresh_user_info_for([my_data.id])
         db.session.commit()
         flash("User updated successfully", "success")
         return redirect(url_for('user.account'))
@@ -0,0 +1,121 @@
+import threading
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, request
+from flask_login import current_user
+
+from app.services.executor import AnalyticsBusy, unavailable_response
+from app.services.rate_limit import get_limiter, rate_limited_response
+
+# Admission control for the endpoints that run full-history calculations.
+# Each is decorated with @admit(cost): the client (the user when logged in, the
+# IP address otherwise) spends `cost` tokens from its bucket in the shared
+# "analytics" limiter, so an endpoint that runs six pipelines uses up a client's
+# budget six times faster than one that runs a single pipeline. Heavy endpoints
+# also need one of ANALYTICS_MAX_CONCURRENT slots for as long as they run.
+# Refusals are immediate: 429 with Retry-After when the client is over its
+# budget, 503 with Retry-After when every slot is taken. Like the rate limiters,
+# all of this is per web process.
+
+
+class Admission:
+    """The heavy-request slots of a process and its admission counters."""
+
+    def __init__(self, max_concurrent):
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.admitted = Counter()  # endpoint -> count
+        self.rejected = Counter()  # (endpoint, reason) -> count
+
+    def enter(self):
+        """Take a heavy slot; False when all are in use."""
+        if not self._slots.acquire(blocking=False):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def record(self, endpoint, reason=None):
+        with self._lock:
+            if reason is None:
+                self.admitted[endpoint] += 1
+            else:
+                self.rejected[(endpoint, reason)] += 1
+
+    def stats(self):
+        with self._lock:
+            rejected = {}
+            for (endpoint, reason), count in self.rejected.items():
+                rejected.setdefault(endpoint, {})[reason] = count
+            return {
+                "max_concurrent": self.max_concurrent,
+                "in_flight": self.in_flight,
+                "admitted": dict(self.admitted),
+                "rejected": rejected,
+                "rejected_total": sum(self.rejected.values()),
+            }
+
+
+def init_app(app):
+    app.extensions["admission"] = Admission(app.config.get("ANALYTICS_MAX_CONCURRENT", 8))
+
+
+def client_key():
+    """Who a request is charged to: the logged-in user, else the client address."""
+    if current_user.is_authenticated:
+        return f"user:{current_user.id}"
+    return f"ip:{request.remote_addr}"
+
+
+def analytics_limiter():
+    return get_limiter(
+        "analytics",
+        rate=current_app.config.get("ANALYTICS_RATE", 3.0),
+        burst=current_app.config.get("ANALYTICS_BURST", 30)
+    )
+
+
+def admit(cost, heavy=True):
+    """Charge each request cost tokens and, when heavy, hold a concurrency slot while it runs."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            admission = current_app.extensions["admission"]
+            limiter = analytics_limiter()
+
+            # A cost above the burst size could never be paid in full
+            retry_after = limiter.acquire(client_key(), min(cost, limiter.burst))
+            if retry_after:
+                admission.record(request.endpoint, "rate_limited")
+                return rate_limited_response(retry_after)
+
+            if not heavy:
+                admission.record(request.endpoint)
+                return view(*args, **kwargs)
+
+            if not admission.enter():
+                admission.record(request.endpoint, "busy")
+                return unavailable_response(AnalyticsBusy("Server is busy with other calculations, please retry shortly"))
+            try:
+                admission.record(request.endpoint)
+                return view(*args, **kwargs)
+            finally:
+                admission.leave()
+        return wrapped
+    return decorator
+
+
+def admission_stats():
+    """Admission counters of this process, ready to be sent as JSON."""
+    stats = current_app.extensions["admission"].stats()
+    limiter = analytics_limiter()
+    stats.update({"rate": limiter.rate, "burst": limiter.burst})
+    return stats
@@ -1,17 +1,52 @@
-from flask import Blueprint, request, jsonify
+import json
+import threading
+import time
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from flask_login import current_user
+from app import csrf, db
 from app.services.calculation import calculate_portfolio_metrics, get_portfolio_timeseries, get_spy_cumulative_returns, calculate_comparison_radar_metrics
+from app.services.executor import run_analytics, AnalyticsUnavailable, unavailable_response
+from app.services.data_version import price_version_snapshot
+from app.services.admission import admit, admission_stats
+from app.services.rebalance import check_rebalance_weights, parse_rebalance
 import pandas as pd
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
+# Endpoints that run calculations are admitted through @admit(cost), where cost
+# is roughly the number of full-history pipelines they run (see app/services/admission.py).
+# The heavy part of each endpoint lives in a module-level function so that
+# run_analytics() can ship it to a worker process in a single round trip.
+# Calculation endpoints take an optional "rebalance" mode ("monthly", "quarterly",
+# "annual" or "threshold" with "rebalance_threshold"); buy and hold by default.
+
+def request_rebalance(data, *allocations):
+    """(rebalance setting, None) for a request body, or (None, 400 response) when it is
+    invalid or any of the allocations it will rebalance has weights adding up to 0 or less."""
+    try:
+        rebalance = parse_rebalance(data.get("rebalance"), data.get("rebalance_threshold"))
+        if rebalance:
+            for allocation in allocations:
+                check_rebalance_weights(allocation)
+        return rebalance, None
+    except (AttributeError, TypeError, ValueError) as e:
+        return None, (jsonify({"error": f"Invalid rebalance: {e}"}), 400)
+
 # 1. Summary statistics
 @api_bp.route("/portfolio-summary", methods=["POST"])
+@admit(cost=1)
 def portfolio_summary():
     data = request.json
-    result = calculate_portfolio_metrics(
+    rebalance, error = request_rebalance(data, data["weights"])
+    if error:
+        return error
+
+    result = run_analytics(
+        calculate_portfolio_metrics,
         allocation=data["weights"],
         start_date=data["start_date"],
-        initial_amount=data["initial_investment"]
+        initial_amount=data["initial_investment"],
+        rebalance=rebalance
     )
 
     if not result:
@@ -30,24 +65,22 @@ def portfolio_summary():
     return jsonify(summary)
 
 # 2. Time series data for plotting + heatmap
-@api_bp.route("/timeseries", methods=["POST"])
-def timeseries():
-    data = request.json
-
+def build_timeseries_payload(weights, start_date, initial_investment, rebalance=None):
     ts_data = get_portfolio_timeseries(
-        allocation=data["weights"],
-        start_date=data["start_date"],
-        initial_amount=data["initial_investment"]
+        allocation=weights,
+        start_date=start_date,
+        initial_amount=initial_investment,
+        rebalance=rebalance
     )
 
     if not ts_data or "cumulative_returns_series" not in ts_data:
-        return jsonify({"error": "No time series data"}), 400
+        return None
 
     labels = list(ts_data["cumulative_returns_series"].keys())
     strategy = list(ts_data["cumulative_returns_series"].values())
 
     benchmark = get_spy_cumulative_returns(
-        start_date=data["start_date"],
+        start_date=start_date,
         match_dates=labels
     )
 
@@ -83,7 +116,7 @@ def timeseries():
         heatmap_labels = []
         heatmap_datasets = []
 
-    return jsonify({
+    return {
         "labels": labels,
         "strategy": strategy,
         "benchmark": benchmark,
@@ -91,10 +124,73 @@ def timeseries():
             "labels": heatmap_labels,
             "datasets": heatmap_datasets
         }
-    })
+    }
+
+@api_bp.route("/timeseries", methods=["POST"])
+@admit(cost=2)
+def timeseries():
+    data = request.json
+    rebalance, error = request_rebalance(data, data["weights"])
+    if error:
+        return error
+
+    payload = run_analytics(
+        build_timeseries_payload,
+        weights=data["weights"],
+        start_date=data["start_date"],
+        initial_investment=data["initial_investment"],
+        rebalance=rebalance
+    )
+
+    if payload is None:
+        return jsonify({"error": "No time series data"}), 400
+
+    return jsonify(payload)
+
+# Summary metrics for portfolio A, portfolio B and the SPY benchmark
+def build_comparison_summary(weights_a, weights_b, start_date, initial_amount, rebalance=None):
+    def summarize(allocation, rebalance):
+        m = calculate_portfolio_metrics(
+            allocation=allocation,
+            start_date=start_date,
+            initial_amount=initial_amount,
+            rebalance=rebalance
+        )
+        return {
+            "cagr":        m["cagr"],
+            "volatility":  m["volatility"],
+            "maxDrawdown": m["max_drawdown"]
+        }
+
+    return {
+        "portfolio_a":   summarize(weights_a, rebalance),
+        "portfolio_b":   summarize(weights_b, rebalance),
+        "portfolio_spy": summarize({"SPY": 1.0}, None)
+    }
 
 # 3. Comparison chart: Portfolio A vs Portfolio B
+def build_comparison_timeseries(weights_a, weights_b, start_date, initial_amount, rebalance=None):
+    ts_a = get_portfolio_timeseries(allocation=weights_a, start_date=start_date, initial_amount=initial_amount, rebalance=rebalance)
+    ts_b = get_portfolio_timeseries(allocation=weights_b, start_date=start_date, initial_amount=initial_amount, rebalance=rebalance)
+    if not ts_a or not ts_b:
+        return None
+
+    labels       = list(ts_a["cumulative_returns_series"].keys())
+    cumulative_a = list(ts_a["cumulative_returns_series"].values())
+    cumulative_b = list(ts_b["cumulative_returns_series"].values())
+
+    portfolio_spy = get_spy_cumulative_returns(start_date=start_date, match_dates=labels)
+
+    return {
+        "labels":        labels,
+        "portfolio_a":   cumulative_a,
+        "portfolio_b":   cumulative_b,
+        "portfolio_spy": portfolio_spy,
+        "summary":       build_comparison_summary(weights_a, weights_b, start_date, initial_amount, rebalance)
+    }
+
 @api_bp.route("/comparison_timeseries", methods=["POST"])
+@admit(cost=6)
 def comparison_timeseries():
     try:
         data = request.get_json(force=True)
@@ -102,49 +198,24 @@ def comparison_timeseries():
         weights_b = data["weights_b"]
         start_date = data.get("start_date", "2015-01-01")
         initial_amount = float(data.get("initial_investment", 1000))
+        rebalance, error = request_rebalance(data, weights_a, weights_b)
+        if error:
+            return error
 
-        ts_a = get_portfolio_timeseries(allocation=weights_a, start_date=start_date, initial_amount=initial_amount)
-        ts_b = get_portfolio_timeseries(allocation=weights_b, start_date=start_date, initial_amount=initial_amount)
-        if not ts_a or not ts_b:
+        payload = run_analytics(build_comparison_timeseries, weights_a, weights_b, start_date, initial_amount, rebalance)
+        if payload is None:
             return jsonify({"error": "No time series data"}), 400
 
-        labels       = list(ts_a["cumulative_returns_series"].keys())
-        cumulative_a = list(ts_a["cumulative_returns_series"].values())
-        cumulative_b = list(ts_b["cumulative_returns_series"].values())
-
-        portfolio_spy = get_spy_cumulative_returns(start_date=start_date, match_dates=labels)
-
-        def summarize(allocation):
-            m = calculate_portfolio_metrics(
-                allocation=allocation,
-                start_date=start_date,
-                initial_amount=initial_amount
-            )
-            return {
-                "cagr":        m["cagr"],
-                "volatility":  m["volatility"],
-                "maxDrawdown": m["max_drawdown"]
-            }
-
-        summary = {
-            "portfolio_a":   summarize(weights_a),
-            "portfolio_b":   summarize(weights_b),
-            "portfolio_spy": summarize({"SPY": 1.0})
-        }
-
-        return jsonify({
-            "labels":        labels,
-            "portfolio_a":   cumulative_a,
-            "portfolio_b":   cumulative_b,
-            "portfolio_spy": portfolio_spy,
-            "summary":       summary
-        }), 200
+        return jsonify(payload), 200
 
+    except AnalyticsUnavailable as e:
+        return unavailable_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # 4. Comparison metrics: Portfolio A vs Portfolio B metrics
 @api_bp.route("/comparison_metrics", methods=["POST"])
+@admit(cost=3)
 def comparison_metrics():
     try:
         data = request.get_json(force=True)
@@ -152,34 +223,24 @@ def comparison_metrics():
         weights_b = data["weights_b"]
         start_date = data.get("start_date", "2015-01-01")
         initial_amount = float(data.get("initial_investment", 1000))
+        rebalance, error = request_rebalance(data, weights_a, weights_b)
+        if error:
+            return error
 
-        def summarize(allocation):
-            m = calculate_portfolio_metrics(
-                allocation=allocation,
-                start_date=start_date,
-                initial_amount=initial_amount
-            )
-            return {
-                "cagr": m["cagr"],
-                "volatility": m["volatility"],
-                "maxDrawdown": m["max_drawdown"]
-            }
-
-        summary = {
-            "portfolio_a": summarize(weights_a),
-            "portfolio_b": summarize(weights_b),
-            "portfolio_spy": summarize({"SPY": 1.0})
-        }
+        summary = run_analytics(build_comparison_summary, weights_a, weights_b, start_date, initial_amount, rebalance)
 
         return jsonify({
             "summary": summary
         }), 200
 
+    except AnalyticsUnavailable as e:
+        return unavailable_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # 5. radar chart
 @api_bp.route("/comparison-radar", methods=["POST"])
+@admit(cost=2)
 def comparison_radar():
     try:
         data = request.get_json(force=True)
@@ -187,13 +248,18 @@ def comparison_radar():
         weights_b = data["weights_b"]
         start_date = data.get("start_date", "2015-01-01")
         initial_amount = float(data.get("initial_investment", 10000))
+        rebalance, error = request_rebalance(data, weights_a, weights_b)
+        if error:
+            return error
 
         # calculate radar chart metrics
-        metrics = calculate_comparison_radar_metrics(
+        metrics = run_analytics(
+            calculate_comparison_radar_metrics,
             weights_a=weights_a,
             weights_b=weights_b,
             start_date=start_date,
-            initial_amount=initial_amount
+            initial_amount=initial_amount,
+            rebalance=rebalance
         )
 
         if not metrics:
@@ -201,5 +267,175 @@ def comparison_radar():
 
         return jsonify(metrics), 200
 
+    except AnalyticsUnavailable as e:
+        return unavailable_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
+
+# Live metrics while the allocation sliders move (see app/services/what_if.py).
+# Runs in the web process: after the first call for an asset set it is a dot
+# product over cached paths, cheaper than a round trip to the analytics pool.
+@api_bp.route("/what-if", methods=["POST"])
+@admit(cost=0.2, heavy=False)
+def what_if():
+    from app.services.what_if import what_if_metrics
+
+    data = request.get_json(silent=True) or {}
+    began = time.perf_counter()
+    try:
+        allocation = {str(code): float(weight) for code, weight in (data.get("weights") or {}).items()}
+        result = what_if_metrics(
+            allocation,
+            start_date=data.get("start_date") or "2015-01-01",
+            initial_amount=float(data.get("initial_investment", 1000))
+        )
+    except (AttributeError, TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+
+    if not result:
+        return jsonify({"error": "No valid price data"}), 400
+    result["elapsed_ms"] = round((time.perf_counter() - began) * 1000, 3)
+    return jsonify(result)
+
+# 6. Price data version and refresh progress
+@api_bp.route("/prices/version", methods=["GET"])
+def price_version():
+    return jsonify(price_version_snapshot())
+
+def serialize_asset(asset, coverage=None):
+    return {
+        "asset_code": asset.asset_code,
+        "display_name": asset.display_name,
+        "full_name": asset.full_name,
+        "type": asset.type,
+        "currency": asset.currency,
+        "history_status": asset.history_status,
+        "history_error": asset.history_error,
+        "first_date": coverage.first_date.isoformat() if coverage and coverage.first_date else None,
+        "last_date": coverage.last_date.isoformat() if coverage and coverage.last_date else None,
+    }
+
+# Asset registry: list and add tickers (see app/services/asset_registry.py)
+@api_bp.route("/assets", methods=["GET", "POST"])
+def assets():
+    from app.models.asset import Asset
+    from app.services.asset_registry import register_asset
+
+    if request.method == "GET":
+        rows = Asset.query.filter(Asset.is_active == True).order_by(Asset.asset_code).all()
+        return jsonify({"assets": [serialize_asset(asset) for asset in rows]})
+
+    if not current_user.is_authenticated:
+        return jsonify({"error": "Login required"}), 401
+    # api_bp is CSRF-exempt, but this write acts for the session user and starts
+    # downloads, so it needs the X-CSRFToken header the pages render
+    if current_app.config.get("WTF_CSRF_ENABLED", True):
+        csrf.protect()
+
+    data = request.get_json(silent=True) or {}
+    asset_type = data.get("type", "stock")
+    if asset_type not in ("stock", "crypto", "etf"):
+        return jsonify({"error": f"Invalid type: {asset_type}"}), 400
+    try:
+        asset, created = register_asset(
+            data.get("code"),
+            display_name=data.get("name"),
+            full_name=data.get("full_name"),
+            type=asset_type,
+            currency=data.get("currency", "USD"),
+            strategy_description=data.get("strategy")
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(serialize_asset(asset)), 201 if created else 200
+
+# One asset; the first request for a new ticker starts loading its history
+@api_bp.route("/assets/<code>", methods=["GET"])
+def asset_detail(code):
+    from app.models.asset import Asset, AssetCoverage
+    from app.services.asset_registry import ensure_asset_history
+
+    asset = db.session.get(Asset, code.upper())
+    if asset is None or not asset.is_active:
+        return jsonify({"error": f"Unknown asset: {code}"}), 404
+
+    status = ensure_asset_history(asset)
+    response = jsonify(serialize_asset(asset, db.session.get(AssetCoverage, asset.asset_code)))
+    if status in ("pending", "loading"):
+        response.status_code = 202
+        response.headers["Retry-After"] = "5"
+    return response
+
+# Latest data quality report for every asset (see app/services/price_quality.py)
+@api_bp.route("/prices/quality", methods=["GET"])
+def price_quality():
+    from app.services.price_quality import latest_quality_reports
+    return jsonify({"reports": latest_quality_reports()})
+
+# Memory use of the price store in an analytics worker (this process when running inline)
+@api_bp.route("/prices/store", methods=["GET"])
+def price_store():
+    from app.services.price_store import price_store_stats
+    return jsonify(run_analytics(price_store_stats))
+
+# Admission counters of this web process: slots in use, admitted and refused requests
+@api_bp.route("/admission", methods=["GET"])
+def admission():
+    return jsonify(admission_stats())
+
+# 7. Server-Sent Events stream of the price data version, so open pages can
+# refetch their charts only when the data really changed instead of polling.
+# Each open stream holds a request thread, so streaming is off unless
+# PRICE_STREAM_ENABLED is set, and a process then serves at most
+# PRICE_STREAM_MAX_CONNECTIONS of them; beyond that clients get a 503 and poll
+# /api/prices/version instead.
+def _price_stream_slots():
+    slots = current_app.extensions.get("price_stream_slots")
+    if slots is None:
+        slots = current_app.extensions.setdefault(
+            "price_stream_slots", threading.BoundedSemaphore(current_app.config.get("PRICE_STREAM_MAX_CONNECTIONS", 100))
+        )
+    return slots
+
+@api_bp.route("/prices/stream", methods=["GET"])
+def price_version_stream():
+    interval = current_app.config.get("PRICE_STREAM_POLL_INTERVAL", 1.0)
+    heartbeat = current_app.config.get("PRICE_STREAM_HEARTBEAT", 15.0)
+    max_duration = current_app.config.get("PRICE_STREAM_MAX_DURATION", 60.0)
+
+    if not current_app.config.get("PRICE_STREAM_ENABLED", False):
+        return jsonify({"error": "Price streaming is disabled, poll /api/prices/version instead"}), 404
+
+    slots = _price_stream_slots()
+    if not slots.acquire(blocking=False):
+        response = jsonify({"error": "Too many open price streams, poll /api/prices/version instead"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(max(1, int(max_duration)))
+        return response
+
+    @stream_with_context
+    def generate():
+        # Ask EventSource to reconnect quickly once we close the stream
+        yield "retry: 3000\n\n"
+
+        started = last_sent = time.monotonic()
+        last_snapshot = None
+        while time.monotonic() - started < max_duration:
+            snapshot = price_version_snapshot()
+            db.session.rollback()  # don't pin a read snapshot between polls
+
+            if snapshot != last_snapshot:
+                last_snapshot = snapshot
+                last_sent = time.monotonic()
+                yield f"id: {snapshot['version']}\nevent: version\ndata: {json.dumps(snapshot)}\n\n"
+            elif time.monotonic() - last_sent >= heartbeat:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+
+            time.sleep(interval)
+
+    response = Response(generate(), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # Runs when the stream ends or the client goes away, even before the first event
+    response.call_on_close(slots.release)
+    return response
@@ -0,0 +1,93 @@
+import threading
+from dataclasses import dataclass
+
+from flask import current_app
+
+from app.models.asset import Asset
+from app.services.data_version import current_price_version
+
+# In-memory copy of the (tiny, rarely changing) assets table.
+# Loaded once per process and reloaded when the price data version moves on,
+# which happens after every fetch_all_history run; fetch_all_history also calls
+# invalidate_asset_catalog() right after upserting the metadata.
+
+
+@dataclass(frozen=True)
+class AssetInfo:
+    asset_code: str
+    display_name: str
+    full_name: str
+    type: str
+    currency: str
+    logo_url: str
+    strategy_description: str
+    history_status: str = 'ready'
+
+    def form_option(self) -> dict:
+        """The shape portfolio_form.html expects for its asset picker."""
+        return {
+            'code': self.asset_code,
+            'name': self.display_name,
+            'company': self.full_name,
+            'logo_url': self.logo_url
+        }
+
+
+class AssetCatalog:
+    def __init__(self, assets, version):
+        self.version = version
+        self._by_code = {asset.asset_code: asset for asset in assets}
+
+    def get(self, code):
+        return self._by_code.get(code)
+
+    def lookup(self, codes):
+        """AssetInfo for each known code, in the order given."""
+        return [self._by_code[code] for code in codes if code in self._by_code]
+
+    def all(self):
+        return list(self._by_code.values())
+
+    def form_options(self):
+        """Non-ETF assets with price history for the portfolio form, ordered by display name."""
+        assets = [asset for asset in self._by_code.values()
+                  if asset.type != 'etf' and asset.history_status == 'ready']
+        assets.sort(key=lambda asset: asset.display_name or '')
+        return [asset.form_option() for asset in assets]
+
+
+_load_lock = threading.Lock()
+
+
+def _load_catalog(version):
+    assets = [
+        AssetInfo(
+            asset_code=row.asset_code,
+            display_name=row.display_name,
+            full_name=row.full_name,
+            type=row.type,
+            currency=row.currency,
+            logo_url=row.logo_url,
+            strategy_description=row.strategy_description,
+            history_status=row.history_status
+        )
+        for row in Asset.query.filter(Asset.is_active == True).order_by(Asset.asset_code).all()
+    ]
+    return AssetCatalog(assets, version)
+
+
+def get_asset_catalog() -> AssetCatalog:
+    """The current app's asset catalog, loading it if missing or stale."""
+    version = current_price_version()
+    catalog = current_app.extensions.get("asset_catalog")
+    if catalog is None or catalog.version != version:
+        with _load_lock:
+            catalog = current_app.extensions.get("asset_catalog")
+            if catalog is None or catalog.version != version:
+                catalog = _load_catalog(version)
+                current_app.extensions["asset_catalog"] = catalog
+    return catalog
+
+
+def invalidate_asset_catalog():
+    current_app.extensions.pop("asset_catalog", None)
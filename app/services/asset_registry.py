@@ -0,0 +1,244 @@
+import re
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import or_, update
+
+from app import db
+from app.models.asset import Asset, AssetCoverage
+
+# The assets table is the registry of tickers. The defaults below are seeded on
+# the first refresh; more tickers are added through register_asset (the add-asset
+# CLI command or POST /api/assets) and start with history_status 'pending'.
+# A pending ticker's history is downloaded in the background the first time it
+# is requested (ensure_asset_history), on its own, without a full refresh.
+#
+# history_status: pending -> loading -> ready / failed
+# A failed ticker, or one left 'loading' by a worker that died, is picked up
+# again once ASSET_HISTORY_RETRY_AFTER seconds have passed since its last update.
+
+HISTORY_START_DATE = "2015-01-01"
+
+# Tickers as yfinance spells them: AAPL, BRK-B, BTC-USD, ^GSPC, EURUSD=X
+TICKER_PATTERN = re.compile(r"^[A-Z0-9^][A-Z0-9.\-=^]{0,19}$")
+
+# code: (display name, full name, type, currency, strategy description)
+DEFAULT_ASSETS = {
+    "AAPL":    ("AAPL", "Apple Inc.", "stock", "USD", "Innovation"),
+    "MSFT":    ("MSFT", "Microsoft Corp", "stock", "USD", "Cloud"),
+    "TSLA":    ("TSLA", "Tesla Inc.", "stock", "USD", "Electric"),
+    "NVDA":    ("NVDA", "NVIDIA Corp", "stock", "USD", "AI"),
+    "AMZN":    ("AMZN", "Amazon.com Inc.", "stock", "USD", "Commerce"),
+    "GOOGL":   ("GOOGL", "Alphabet Inc.", "stock", "USD", "Advertising"),
+    "BRK-B":   ("BRK.B", "Berkshire Hathaway", "stock", "USD", "Value"),
+    "BTC-USD": ("BTC", "Bitcoin", "crypto", "USD", "Volatility"),
+    "MSTR":    ("MSTR", "MicroStrategy", "stock", "USD", "Leverage"),
+    "AMD":     ("AMD", "Advanced Micro Devices", "stock", "USD", "Performance"),
+    "SPY":     ("SPY", "S&P 500 ETF", "etf", "USD", "Benchmark"),
+}
+
+
+def default_logo_url(code):
+    return f"/static/icons/{code.lower().replace('.', '-')}.svg"
+
+
+def normalize_ticker(code):
+    """Upper-cased ticker, or ValueError when it cannot be a ticker."""
+    code = (code or "").strip().upper()
+    if not TICKER_PATTERN.match(code):
+        raise ValueError(f"Invalid ticker: {code!r}")
+    return code
+
+
+def seed_default_assets():
+    """Insert the default tickers that are missing; returns how many. The caller commits."""
+    existing = set(db.session.execute(db.select(Asset.asset_code)).scalars())
+    added = 0
+    for code, (display, full, typ, currency, strategy) in DEFAULT_ASSETS.items():
+        if code in existing:
+            continue
+        db.session.add(Asset(
+            asset_code=code, display_name=display, full_name=full, type=typ, currency=currency,
+            logo_url=default_logo_url(code), strategy_description=strategy,
+            is_active=True, history_status="pending"
+        ))
+        added += 1
+    return added
+
+
+def active_asset_codes():
+    """Codes of every active asset, in code order."""
+    return db.session.execute(
+        db.select(Asset.asset_code).where(Asset.is_active == True).order_by(Asset.asset_code)
+    ).scalars().all()
+
+
+def register_asset(code, display_name=None, full_name=None, type="stock", currency="USD",
+                   strategy_description=None, logo_url=None):
+    """Add a ticker to the registry; returns (asset, created). Commits."""
+    from app.services.asset_catalog import invalidate_asset_catalog
+
+    code = normalize_ticker(code)
+    asset = db.session.get(Asset, code)
+    if asset is not None:
+        if not asset.is_active:
+            asset.is_active = True
+            db.session.commit()
+            invalidate_asset_catalog()
+        return asset, False
+
+    asset = Asset(
+        asset_code=code,
+        display_name=display_name or code,
+        full_name=full_name or display_name or code,
+        type=type,
+        currency=currency,
+        logo_url=logo_url or default_logo_url(code),
+        strategy_description=strategy_description,
+        is_active=True,
+        history_status="pending",
+        history_updated_at=datetime.utcnow()
+    )
+    db.session.add(asset)
+    db.session.commit()
+    invalidate_asset_catalog()
+    return asset, True
+
+
+def finish_history(code, error=None):
+    """Mark code ready when it has prices, failed otherwise. The caller commits."""
+    has_prices = error is None and db.session.get(AssetCoverage, code) is not None
+    db.session.execute(update(Asset).where(Asset.asset_code == code).values(
+        history_status="ready" if has_prices else "failed",
+        history_error=None if has_prices else (error or "No prices downloaded")[:500],
+        history_updated_at=datetime.utcnow()
+    ))
+
+
+def _claim(code, retry_before):
+    """Atomically move code to 'loading'; False when another worker or process owns it.
+    Failed and 'loading' rows last updated before retry_before are taken over."""
+    result = db.session.execute(
+        update(Asset).where(
+            Asset.asset_code == code,
+            or_(
+                Asset.history_status == "pending",
+                Asset.history_status.in_(("failed", "loading"))
+                & or_(Asset.history_updated_at.is_(None), Asset.history_updated_at < retry_before)
+            )
+        ).values(history_status="loading", history_updated_at=datetime.utcnow())
+    )
+    db.session.commit()
+    return result.rowcount == 1
+
+
+def load_asset_history(code):
+    """Download one ticker's history and publish it; returns the final history_status."""
+    from app.services.fetch_price import store_ticker_history
+    from app.services.coverage import refresh_asset_coverage
+    from app.services.price_chunks import refresh_price_chunks
+    from app.services.data_version import bump_price_version
+    from app.services.price_matrix import publish_price_matrix
+
+    retry_before = datetime.utcnow() - timedelta(seconds=current_app.config.get("ASSET_HISTORY_RETRY_AFTER", 600))
+    if not _claim(code, retry_before):
+        return db.session.get(Asset, code).history_status
+
+    try:
+        store_ticker_history(code, HISTORY_START_DATE, datetime.today().strftime("%Y-%m-%d"))
+        refresh_asset_coverage([code])
+        refresh_price_chunks([code])
+        finish_history(code)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        finish_history(code, error=str(e) or type(e).__name__)
+        db.session.commit()
+
+    status = db.session.get(Asset, code).history_status
+    if status == "ready":
+        # Caches, the asset catalog and analytics workers pick up the new prices
+        bump_price_version()
+        publish_price_matrix()
+    return status
+
+
+class AssetHistoryLoader:
+    """Loads pending tickers on background threads (or inline when workers = 0)."""
+
+    def __init__(self, app, workers):
+        self.app = app
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="asset-history") if workers > 0 else None
+        self._in_flight = set()
+        self._lock = threading.Lock()
+
+    def submit(self, code):
+        """Queue a load unless one is already running in this process."""
+        with self._lock:
+            if code in self._in_flight:
+                return
+            self._in_flight.add(code)
+
+        if self._executor is None:
+            self._run(code)
+        else:
+            self._executor.submit(self._run, code)
+
+    def _run(self, code):
+        try:
+            if self._executor is None:
+                load_asset_history(code)
+                return
+            with self.app.app_context():
+                load_asset_history(code)
+                db.session.remove()
+        except Exception as e:
+            print(f"Loading history for {code} failed: {e}")
+        finally:
+            with self._lock:
+                self._in_flight.discard(code)
+
+
+def init_app(app):
+    app.extensions["asset_history_loader"] = AssetHistoryLoader(
+        app, workers=app.config.get("ASSET_LOADER_WORKERS", 1)
+    )
+
+
+def ensure_asset_history(asset):
+    """Start loading asset's history if it has none yet; returns its history_status."""
+    retry_before = datetime.utcnow() - timedelta(seconds=current_app.config.get("ASSET_HISTORY_RETRY_AFTER", 600))
+    needs_load = asset.history_status == "pending" or (
+        asset.history_status in ("failed", "loading")
+        and (asset.history_updated_at is None or asset.history_updated_at < retry_before)
+    )
+    if needs_load:
+        current_app.extensions["asset_history_loader"].submit(asset.asset_code)
+        db.session.refresh(asset)
+    return asset.history_status
+
+
+# Flask CLI command to add a ticker to the registry
+@click.command("add-asset")
+@click.argument("code")
+@click.option("--name", "display_name", help="Display name (defaults to the ticker).")
+@click.option("--full-name", help="Full name, e.g. the company name.")
+@click.option("--type", "asset_type", default="stock", show_default=True, help="stock, crypto or etf.")
+@click.option("--currency", default="USD", show_default=True)
+@click.option("--strategy", help="Strategy description shown in the asset picker.")
+@click.option("--load/--no-load", default=False, help="Download the history now instead of on first request.")
+@with_appcontext
+def add_asset_command(code, display_name, full_name, asset_type, currency, strategy, load):
+    """Register a ticker in the asset registry."""
+    try:
+        asset, created = register_asset(code, display_name, full_name, asset_type, currency, strategy)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+    click.echo(f"{'Added' if created else 'Already registered'}: {asset.asset_code} ({asset.history_status})")
+    if load:
+        click.echo(f"✔ {asset.asset_code} history: {load_asset_history(asset.asset_code)}")
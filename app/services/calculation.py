@@ -1,47 +1,90 @@
 import pandas as pd
 import quantstats.stats as qs_stats
+from sqlalchemy import select
 from app.models import db, Price
-
-# This function calculates key performance metrics for a given portfolio allocation.
-# You can optionally specify which metrics to return using the 'fields' argument.
-# Example usage: calculate_portfolio_metrics(allocation, "2020-01-01", 10000, fields=["cagr", "return_percent"])
-def calculate_portfolio_metrics(allocation: dict[str, float], start_date: str, initial_amount: float, fields: list[str] = None) -> dict:
-    all_df = []
-
-    # Query the database for price records of each asset starting from a given date
-    for asset, weight in allocation.items():
-        records = Price.query.filter(
+from app.services.database import analytics_bind
+from app.services.executor import check_deadline
+from app.services.price_chunks import load_asset_history
+from app.services.price_matrix import get_price_matrix
+from app.services.price_store import activate_price_store, active_price_store
+from app.services.rebalance import rebalanced_value
+
+# Load prices into this process's price store (see app/services/price_store.py),
+# so analytics workers serve calculations from memory, within a fixed byte budget,
+# instead of hitting the database for each one. Returns how many assets are resident.
+# The store is left cold when the shared price matrix file is mapped: that already
+# holds every history without a per-process copy.
+def preload_prices():
+    return activate_price_store(warm=get_price_matrix() is None).stats()["resident_assets"]
+
+
+# Return a one-column DataFrame (indexed by date, column named after the asset)
+# with the asset's closing prices from start_date onwards, or None if there are none.
+def _load_asset_prices(asset: str, start_date: str):
+    matrix = get_price_matrix()
+    if matrix is not None:
+        return matrix.frame(asset, start_date)
+
+    store = active_price_store()
+    if store is not None:
+        return store.frame(asset, start_date)
+
+    df = load_asset_history(asset, start_date)
+    if df is not None:
+        return df
+
+    # No chunks for this asset (not rebuilt since the prices were written)
+    records = db.session.execute(
+        select(Price.date, Price.close_price).where(
             Price.asset_code == asset,
             Price.date >= start_date
-        ).order_by(Price.date.asc()).all()
+        ).order_by(Price.date.asc()),
+        bind_arguments={"bind": analytics_bind()}
+    ).all()
+
+    if not records:
+        return None
 
-        if not records:
-            continue
+    # Convert the query result into a Pandas DataFrame
+    df = pd.DataFrame([{
+        "date": r.date,
+        "close": r.close_price
+    } for r in records])
 
-        # Convert the query result into a Pandas DataFrame
-        df = pd.DataFrame([{
-            "date": r.date,
-            "close": r.close_price
-        } for r in records])
+    # Format the 'date' column and set it as the index
+    df["date"] = pd.to_datetime(df["date"])
+    df.set_index("date", inplace=True)
 
-        # Format the 'date' column and set it as the index
-        df["date"] = pd.to_datetime(df["date"])
-        df.set_index("date", inplace=True)
+    # Rename the 'close' column to the asset code for identification
+    df.rename(columns={"close": asset}, inplace=True)
+    return df
 
-        # Rename the 'close' column to the asset code for identification
-        df.rename(columns={"close": asset}, inplace=True)
 
-        # Append the processed DataFrame to the list
-        all_df.append(df)
+# Merge the price histories of all assets in the allocation on their common dates.
+# Returns None when no asset has data or the assets share no dates.
+def _load_price_frame(allocation: dict[str, float], start_date: str):
+    all_df = []
+    for asset in allocation:
+        check_deadline("load")
+        df = _load_asset_prices(asset, start_date)
+        if df is not None:
+            all_df.append(df)
 
-    # If no data was retrieved, return an empty dictionary
     if not all_df:
-        return {}
+        return None
 
-    # Merge all asset DataFrames on the date index
+    check_deadline("align")
     combined = pd.concat(all_df, axis=1, join="inner").dropna()
     if combined.empty:
-        return {}
+        return None
+    return combined
+
+
+# Value of the portfolio on each date of combined. Buy and hold unless rebalance
+# is a setting from parse_rebalance() (see app/services/rebalance.py).
+def _portfolio_value(combined, allocation: dict[str, float], initial_amount: float, rebalance: str = None):
+    if rebalance:
+        return rebalanced_value(combined, allocation, initial_amount, rebalance)
 
     # Get the starting price of each asset
     start_prices = combined.iloc[0]
@@ -55,6 +98,22 @@ def calculate_portfolio_metrics(allocation: dict[str, float], start_date: str, i
     # Sum the value of all asset holdings over time
     for asset in allocation:
         portfolio_value += combined[asset] * shares[asset]
+    return portfolio_value
+
+
+# This function calculates key performance metrics for a given portfolio allocation.
+# You can optionally specify which metrics to return using the 'fields' argument.
+# Example usage: calculate_portfolio_metrics(allocation, "2020-01-01", 10000, fields=["cagr", "return_percent"])
+def calculate_portfolio_metrics(allocation: dict[str, float], start_date: str, initial_amount: float, fields: list[str] = None, rebalance: str = None) -> dict:
+    # Load the price history of each asset and merge them on the date index
+    combined = _load_price_frame(allocation, start_date)
+
+    # If no data was retrieved, return an empty dictionary
+    if combined is None:
+        return {}
+
+    # Value the holdings over time (bought on the start date, optionally rebalanced)
+    portfolio_value = _portfolio_value(combined, allocation, initial_amount, rebalance)
 
     # Compute daily returns
     returns = portfolio_value.pct_change().dropna()
@@ -65,6 +124,8 @@ def calculate_portfolio_metrics(allocation: dict[str, float], start_date: str, i
     profit = current_value - initial_amount
     return_percent = profit / initial_amount
 
+    check_deadline("metrics")
+
     # Selectively return requested fields (or all if none specified)
     result = {}
 
@@ -101,43 +162,17 @@ def calculate_portfolio_metrics(allocation: dict[str, float], start_date: str, i
 
 # This function returns time series data for plotting or visualization.
 # It includes portfolio value over time, daily returns, and cumulative returns.
-def get_portfolio_timeseries(allocation: dict[str, float], start_date: str, initial_amount: float) -> dict:
-    all_df = []
-
-    for asset, weight in allocation.items():
-        records = Price.query.filter(
-            Price.asset_code == asset,
-            Price.date >= start_date
-        ).order_by(Price.date.asc()).all()
-
-        if not records:
-            continue
-
-        df = pd.DataFrame([{
-            "date": r.date,
-            "close": r.close_price
-        } for r in records])
-        df["date"] = pd.to_datetime(df["date"])
-        df.set_index("date", inplace=True)
-        df.rename(columns={"close": asset}, inplace=True)
-        all_df.append(df)
-
-    if not all_df:
+def get_portfolio_timeseries(allocation: dict[str, float], start_date: str, initial_amount: float, rebalance: str = None) -> dict:
+    combined = _load_price_frame(allocation, start_date)
+    if combined is None:
         return {}
 
-    combined = pd.concat(all_df, axis=1, join="inner").dropna()
-    if combined.empty:
-        return {}
-
-    start_prices = combined.iloc[0]
-    shares = {a: (initial_amount * w) / start_prices[a] for a, w in allocation.items()}
-    portfolio_value = pd.Series(0.0, index=combined.index)
-    for asset in allocation:
-        portfolio_value += combined[asset] * shares[asset]
+    portfolio_value = _portfolio_value(combined, allocation, initial_amount, rebalance)
 
     returns = portfolio_value.pct_change().dropna()
     cum_returns = (1 + returns).cumprod()
 
+    check_deadline("series")
     return {
         "portfolio_value_series": portfolio_value.to_dict(),
         "daily_returns_series": returns.to_dict(),
@@ -147,58 +182,26 @@ def get_portfolio_timeseries(allocation: dict[str, float], start_date: str, init
 
 # This function returns the cumulative returns of SPY from a given start date.
 def get_spy_cumulative_returns(start_date: str, match_dates: list[str]) -> list[float]:
-    records = db.session.query(Price).filter(
-        Price.asset_code == "SPY",
-        Price.date >= start_date
-    ).order_by(Price.date.asc()).all()
-
-    if not records:
+    check_deadline("load")
+    df = _load_asset_prices("SPY", start_date)
+    if df is None:
         return []
 
-    df = pd.DataFrame([{
-        "date": r.date,
-        "close": r.close_price
-    } for r in records])
-    df["date"] = pd.to_datetime(df["date"])
-    df.set_index("date", inplace=True)
-
-    returns = df["close"].pct_change().dropna()
+    returns = df["SPY"].pct_change().dropna()
     cum_returns = (1 + returns).cumprod()
     cum_returns = cum_returns.loc[cum_returns.index.intersection(pd.to_datetime(match_dates))]
 
     return cum_returns.tolist()
 
-def calculate_drawdown_series(allocation: dict, start_date: str, initial_amount: float) -> dict:
-    from app.models import Price
-
-    all_df = []
-    for asset, weight in allocation.items():
-        records = Price.query.filter(
-            Price.asset_code == asset,
-            Price.date >= start_date
-        ).order_by(Price.date.asc()).all()
-
-        if not records:
-            continue
-
-        df = pd.DataFrame([{"date": r.date, "close": r.close_price} for r in records])
-        df["date"] = pd.to_datetime(df["date"])
-        df.set_index("date", inplace=True)
-        df.rename(columns={"close": asset}, inplace=True)
-        all_df.append(df)
-
-    if not all_df:
-        return {}
-
-    combined = pd.concat(all_df, axis=1, join="inner").dropna()
-    if combined.empty:
+def calculate_drawdown_series(allocation: dict, start_date: str, initial_amount: float, rebalance: str = None) -> dict:
+    combined = _load_price_frame(allocation, start_date)
+    if combined is None:
         return {}
 
-    start_prices = combined.iloc[0]
-    shares = {a: (initial_amount * w) / start_prices[a] for a, w in allocation.items()}
-    portfolio_value = sum(combined[a] * shares[a] for a in allocation)
+    portfolio_value = _portfolio_value(combined, allocation, initial_amount, rebalance)
 
     returns = portfolio_value.pct_change().dropna()
+    check_deadline("metrics")
     drawdowns = qs_stats.to_drawdown_series(returns).fillna(0)
 
     return {
@@ -207,12 +210,12 @@ def calculate_drawdown_series(allocation: dict, start_date: str, initial_amount:
     }
 
 # calculate radar chart metrics
-def calculate_comparison_radar_metrics(weights_a: dict[str, float], weights_b: dict[str, float], start_date: str, initial_amount: float) -> dict:
+def calculate_comparison_radar_metrics(weights_a: dict[str, float], weights_b: dict[str, float], start_date: str, initial_amount: float, rebalance: str = None) -> dict:
     
     # get portfolio A time series data
-    portfolio_a_data = get_portfolio_timeseries(weights_a, start_date, initial_amount)
+    portfolio_a_data = get_portfolio_timeseries(weights_a, start_date, initial_amount, rebalance)
     # get portfolio B time series data
-    portfolio_b_data = get_portfolio_timeseries(weights_b, start_date, initial_amount)
+    portfolio_b_data = get_portfolio_timeseries(weights_b, start_date, initial_amount, rebalance)
     
     if not portfolio_a_data or not portfolio_b_data:
         return {}
@@ -226,11 +229,13 @@ def calculate_comparison_radar_metrics(weights_a: dict[str, float], weights_b: d
     portfolio_b_returns.index = pd.to_datetime(portfolio_b_returns.index)
     
     # ensure two time series have the same dates
+    check_deadline("align")
     common_dates = portfolio_a_returns.index.intersection(portfolio_b_returns.index)
     portfolio_a_returns = portfolio_a_returns.loc[common_dates]
     portfolio_b_returns = portfolio_b_returns.loc[common_dates]
     
     # calculate portfolio A metrics
+    check_deadline("metrics")
     portfolio_a_metrics = {
         "cagr": float(qs_stats.cagr(portfolio_a_returns)),
         "volatility": float(qs_stats.volatility(portfolio_a_returns)),
@@ -246,6 +251,7 @@ def calculate_comparison_radar_metrics(weights_a: dict[str, float], weights_b: d
     portfolio_a_metrics["win_rate"] = float(positive_days_a / total_days) if total_days > 0 else 0
     
     # calculate portfolio B metrics
+    check_deadline("metrics")
     portfolio_b_metrics = {
         "cagr": float(qs_stats.cagr(portfolio_b_returns)),
         "volatility": float(qs_stats.volatility(portfolio_b_returns)),
@@ -0,0 +1,128 @@
+from dataclasses import dataclass
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import DateTime, bindparam, func, select, text
+
+from app import db
+from app.models.asset import AssetCoverage, Price
+from app.services.data_version import current_price_version
+
+# Date windows for allocations, answered from asset_coverage instead of
+# min/max(date) GROUP BY scans over prices on every page view. Rows are rebuilt
+# per ticker during ingest; the in-memory copy is reloaded per price data version.
+
+# Consecutive prices further apart than this many calendar days count as a gap
+# (a long weekend is 4 days from Friday to Tuesday)
+GAP_DAYS = 4
+
+_REFRESH_SQL = text("""
+    INSERT INTO asset_coverage (asset_code, first_date, last_date, row_count, gap_count, updated_at)
+    SELECT asset_code, MIN(date), MAX(date), COUNT(*),
+           SUM(CASE WHEN julianday(date) - julianday(prev_date) > :gap_days THEN 1 ELSE 0 END),
+           :now
+    FROM (
+        SELECT asset_code, date,
+               LAG(date) OVER (PARTITION BY asset_code ORDER BY date) AS prev_date
+        FROM prices
+        WHERE asset_code IN :codes
+    )
+    GROUP BY asset_code
+""").bindparams(bindparam("codes", expanding=True), bindparam("now", type_=DateTime))
+
+
+@dataclass(frozen=True)
+class Coverage:
+    asset_code: str
+    first_date: object
+    last_date: object
+    row_count: int
+    gap_count: int
+
+
+def refresh_asset_coverage(asset_codes=None):
+    """Rebuild coverage rows from prices; all assets when asset_codes is None. The caller commits."""
+    if asset_codes is None:
+        asset_codes = db.session.execute(select(Price.asset_code).distinct()).scalars().all()
+        db.session.query(AssetCoverage).delete(synchronize_session=False)
+    else:
+        asset_codes = list(asset_codes)
+        db.session.query(AssetCoverage).filter(
+            AssetCoverage.asset_code.in_(asset_codes)
+        ).delete(synchronize_session=False)
+
+    if asset_codes:
+        db.session.execute(_REFRESH_SQL, {"codes": asset_codes, "gap_days": GAP_DAYS, "now": datetime.utcnow()})
+    current_app.extensions.pop("asset_coverage", None)
+
+
+def _cached_coverage():
+    """{"version", "rows": coverage from the table, "fallback": coverage read from prices}."""
+    version = current_price_version()
+    cached = current_app.extensions.get("asset_coverage")
+    if cached is None or cached["version"] != version:
+        cached = {
+            "version": version,
+            "rows": {
+                row.asset_code: Coverage(row.asset_code, row.first_date, row.last_date, row.row_count, row.gap_count)
+                for row in AssetCoverage.query.all()
+            },
+            "fallback": {},
+        }
+        current_app.extensions["asset_coverage"] = cached
+    return cached
+
+
+def get_coverage(asset_codes):
+    """Coverage for each asset with prices; assets missing from the table are read from prices."""
+    cached = _cached_coverage()
+    rows, fallback = cached["rows"], cached["fallback"]
+
+    # Fallback for databases whose coverage has not been backfilled yet. The answer
+    # (including "no prices", stored as None) is kept until the next data version.
+    missing = [code for code in asset_codes if code not in rows and code not in fallback]
+    if missing:
+        found = db.session.query(
+            Price.asset_code, func.min(Price.date), func.max(Price.date), func.count()
+        ).filter(Price.asset_code.in_(missing)).group_by(Price.asset_code).all()
+        found = {code: Coverage(code, first, last, count, 0) for code, first, last, count in found}
+        for code in missing:
+            fallback[code] = found.get(code)
+
+    result = {}
+    for code in asset_codes:
+        coverage = rows.get(code) or fallback.get(code)
+        if coverage is not None:
+            result[code] = coverage
+    return result
+
+
+def common_window(asset_codes):
+    """(start, end) of the dates every asset with prices covers, or (None, None)."""
+    coverage = get_coverage(asset_codes).values()
+    if not coverage:
+        return None, None
+    return max(c.first_date for c in coverage), min(c.last_date for c in coverage)
+
+
+def global_window():
+    """(earliest, latest) price date over all assets, or (None, None)."""
+    coverage = _cached_coverage()["rows"].values()
+    if not coverage:
+        return db.session.query(
+            select(func.min(Price.date)).scalar_subquery(),
+            select(func.max(Price.date)).scalar_subquery()
+        ).one()
+    return min(c.first_date for c in coverage), max(c.last_date for c in coverage)
+
+
+# Flask CLI command to rebuild the whole coverage table
+@click.command("rebuild-coverage")
+@with_appcontext
+def rebuild_coverage_command():
+    """Recompute asset_coverage from the prices table."""
+    refresh_asset_coverage()
+    db.session.commit()
+    click.echo(f"✔ Rebuilt coverage for {AssetCoverage.query.count()} assets.")
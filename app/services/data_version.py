@@ -0,0 +1,121 @@
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app import db
+from app.models.asset import Price, PriceDataVersion
+
+# The price data version is a counter bumped each time fetch_all_history completes.
+# It lives in the database so every process (web workers, analytics workers, the
+# CLI refresh) agrees on it. Anything derived from prices can be cached per version.
+
+VERSION_ROW_ID = 1
+
+
+def _get_row():
+    row = db.session.get(PriceDataVersion, VERSION_ROW_ID)
+    if row is None:
+        row = PriceDataVersion(id=VERSION_ROW_ID, version=0, status="idle",
+                               tickers_total=0, tickers_done=0)
+        db.session.add(row)
+    return row
+
+
+def price_version_snapshot() -> dict:
+    """Current version and refresh progress, ready to be sent as JSON."""
+    try:
+        row = db.session.execute(
+            select(PriceDataVersion).where(PriceDataVersion.id == VERSION_ROW_ID)
+        ).scalar_one_or_none()
+    except OperationalError:
+        row = None  # Table not created yet
+
+    if row is None:
+        return {"version": 0, "status": "idle", "tickers_done": 0, "tickers_total": 0,
+                "current_ticker": None, "latest_date": None, "finished_at": None}
+
+    return {
+        "version": row.version,
+        "status": row.status,
+        "tickers_done": row.tickers_done,
+        "tickers_total": row.tickers_total,
+        "current_ticker": row.current_ticker,
+        "latest_date": row.latest_date.isoformat() if row.latest_date else None,
+        "finished_at": row.finished_at.isoformat() if row.finished_at else None,
+    }
+
+
+def current_price_version() -> int:
+    """The price data version, re-read at most every PRICE_VERSION_CHECK_INTERVAL seconds."""
+    cache = current_app.extensions.setdefault("price_version_cache", {"version": None, "checked_at": 0.0})
+    interval = current_app.config.get("PRICE_VERSION_CHECK_INTERVAL", 1.0)
+
+    now = time.monotonic()
+    if cache["version"] is None or now - cache["checked_at"] >= interval:
+        try:
+            version = db.session.execute(
+                select(PriceDataVersion.version).where(PriceDataVersion.id == VERSION_ROW_ID)
+            ).scalar()
+        except OperationalError:
+            version = None
+        cache["version"] = version or 0
+        cache["checked_at"] = now
+    return cache["version"]
+
+
+# --- Called by fetch_all_history; each call commits so other processes see progress ---
+
+def begin_refresh(tickers_total: int):
+    row = _get_row()
+    row.status = "running"
+    row.tickers_total = tickers_total
+    row.tickers_done = 0
+    row.current_ticker = None
+    row.started_at = datetime.utcnow()
+    row.finished_at = None
+    db.session.commit()
+
+
+def report_refresh_progress(ticker: str, tickers_done: int):
+    """Record progress; commits together with the prices written for the ticker."""
+    row = _get_row()
+    row.current_ticker = ticker
+    row.tickers_done = tickers_done
+    db.session.commit()
+
+
+def complete_refresh():
+    row = _get_row()
+    row.version = (row.version or 0) + 1
+    row.status = "complete"
+    row.current_ticker = None
+    row.latest_date = db.session.query(func.max(Price.date)).scalar()
+    row.finished_at = datetime.utcnow()
+    db.session.commit()
+
+    # Make the new version visible to this process immediately
+    current_app.extensions.pop("price_version_cache", None)
+    return row.version
+
+
+def bump_price_version():
+    """Advance the version after prices changed outside a full refresh (e.g. one new ticker)."""
+    row = _get_row()
+    row.version = (row.version or 0) + 1
+    row.latest_date = db.session.query(func.max(Price.date)).scalar()
+    db.session.commit()
+
+    current_app.extensions.pop("price_version_cache", None)
+    return row.version
+
+
+def fail_refresh():
+    db.session.rollback()
+    row = _get_row()
+    row.status = "failed"
+    row.current_ticker = None
+    row.finished_at = datetime.utcnow()
+    db.session.commit()
@@ -0,0 +1,53 @@
+from flask import current_app
+from sqlalchemy import create_engine, event
+
+from app import db
+
+# SQLite connection tuning and the read-only analytics engine.
+# ProductionConfig turns on WAL so readers keep working while fetch_all_history
+# holds its long write transaction, and points ANALYTICS_DATABASE_URI at the same
+# file opened read-only. Configs without it read through the default engine.
+# (The analytics engine is kept out of SQLALCHEMY_BINDS so create_all and
+# migrations never try to write through it.)
+
+
+def _pragma_listener(pragmas: dict):
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+    return set_pragmas
+
+
+def init_app(app):
+    """Apply SQLITE_PRAGMAS to the write engine and build the analytics engine."""
+    write_pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+    read_pragmas = app.config.get("SQLITE_READ_PRAGMAS") or {}
+
+    with app.app_context():
+        if write_pragmas and db.engine.dialect.name == "sqlite":
+            event.listen(db.engine, "connect", _pragma_listener(write_pragmas))
+
+    read_uri = app.config.get("ANALYTICS_DATABASE_URI")
+    if read_uri:
+        engine = create_engine(read_uri, **app.config.get("ANALYTICS_ENGINE_OPTIONS", {}))
+        if read_pragmas and engine.dialect.name == "sqlite":
+            event.listen(engine, "connect", _pragma_listener(read_pragmas))
+        app.extensions["analytics_engine"] = engine
+
+
+def analytics_bind():
+    """Engine for read-only analytics queries.
+
+    Pass it as db.session.execute(stmt, bind_arguments={"bind": analytics_bind()}).
+    """
+    return current_app.extensions.get("analytics_engine") or db.engine
+
+
+def dispose_engines(close=True):
+    """Drop pooled connections, e.g. in a freshly forked worker process."""
+    db.engine.dispose(close=close)
+    engine = current_app.extensions.get("analytics_engine")
+    if engine is not None:
+        engine.dispose(close=close)
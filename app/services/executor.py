@@ -0,0 +1,263 @@
+import os
+import time
+import threading
+import multiprocessing
+from contextlib import contextmanager
+from contextvars import ContextVar
+from concurrent.futures import CancelledError, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from flask import current_app, jsonify
+
+# This module runs CPU-bound analytics (pandas / quantstats) in a pool of warm
+# worker processes, so the GIL-heavy work never blocks the request threads.
+# Usage: result = run_analytics(calculate_portfolio_metrics, allocation, "2015-01-01", 1000)
+# The callable must be a module-level function so it can be pickled by reference.
+
+
+# Raised when analytics cannot be served right now; carries the HTTP status to return.
+class AnalyticsUnavailable(Exception):
+    status_code = 503
+    retry_after = 1
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        if retry_after is not None:
+            self.retry_after = retry_after
+
+
+# The pool already has the maximum number of calculations queued or running.
+class AnalyticsBusy(AnalyticsUnavailable):
+    status_code = 503
+
+
+# A calculation did not finish within its time budget.
+class AnalyticsTimeout(AnalyticsUnavailable):
+    status_code = 504
+    retry_after = None
+
+
+# A calculation checked its deadline at a stage boundary and gave up.
+class DeadlineExceeded(AnalyticsTimeout):
+    pass
+
+
+class Deadline:
+    """A wall-clock instant after which a calculation should stop.
+
+    Wall-clock time (not monotonic) so the deadline means the same thing in the
+    worker process that runs the calculation as in the web process that set it.
+    """
+
+    def __init__(self, expires_at):
+        self.expires_at = expires_at
+
+    @classmethod
+    def after(cls, seconds):
+        return cls(time.time() + seconds)
+
+    def remaining(self):
+        return self.expires_at - time.time()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+    def check(self, stage):
+        if self.expired:
+            raise DeadlineExceeded(f"Calculation took too long and was stopped during {stage}")
+
+
+_deadline = ContextVar("analytics_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(deadline):
+    """Make deadline the one check_deadline() sees for the duration of the block."""
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def check_deadline(stage):
+    """Raise DeadlineExceeded if the running calculation is past its deadline.
+
+    Calculations call this between stages (load, align, metrics); outside
+    run_analytics there is no deadline and it does nothing.
+    """
+    deadline = _deadline.get()
+    if deadline is not None:
+        deadline.check(stage)
+
+
+def run_with_deadline(deadline, func, args, kwargs):
+    """Call func under deadline; module-level so the pool can pickle it."""
+    with deadline_scope(deadline):
+        return func(*args, **kwargs)
+
+
+def unavailable_response(error: AnalyticsUnavailable):
+    """Build the JSON error response for an AnalyticsUnavailable exception."""
+    response = jsonify({"error": str(error)})
+    response.status_code = error.status_code
+    if error.retry_after:
+        response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
+
+# --- Worker process side ---
+
+_worker_context = None
+
+
+def _init_worker(config_class):
+    """Build an app in the worker process and preload the price data."""
+    global _worker_context
+
+    # Keep create_app() from treating the worker as a `flask run` launch,
+    # which would trigger a price refresh inside every worker.
+    os.environ["FLASK_CLI_COMMAND"] = "analytics-worker"
+
+    from app import create_app
+    from app.services.calculation import preload_prices
+    from app.services.database import dispose_engines
+
+    worker_app = create_app(config_class)
+    _worker_context = worker_app.app_context()
+    _worker_context.push()
+
+    # Connections inherited from the parent must not be shared with it
+    dispose_engines(close=False)
+    try:
+        preload_prices()
+    except Exception as e:
+        # The worker still serves calculations, straight from the database
+        print(f"Price preload failed in analytics worker: {e}")
+
+
+# --- Parent process side ---
+
+class AnalyticsPool:
+    """A lazily started process pool with a bounded number of pending calls."""
+
+    def __init__(self, config_class, workers, max_pending, timeout, start_method="forkserver"):
+        self.config_class = config_class
+        self.workers = workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.start_method = start_method
+
+        self.data_version = None  # Price data version the current workers preloaded
+
+        self._executor = None
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                methods = multiprocessing.get_all_start_methods()
+                method = self.start_method if self.start_method in methods else "spawn"
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=_init_worker,
+                    initargs=(self.config_class,)
+                )
+            return self._executor
+
+    def run(self, func, args=(), kwargs=None, timeout=None):
+        """Run func(*args, **kwargs) in a worker and wait for its result."""
+        if not self._slots.acquire(blocking=False):
+            raise AnalyticsBusy("Analytics service is busy, please retry shortly")
+
+        try:
+            future = self._get_executor().submit(func, *args, **(kwargs or {}))
+        except (BrokenProcessPool, RuntimeError):
+            self._slots.release()
+            self.shutdown()
+            raise AnalyticsUnavailable("Analytics workers are restarting, please retry shortly")
+
+        # The slot is held until the worker is really done, even if we stop waiting
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=timeout or self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise AnalyticsTimeout("Calculation took too long and was abandoned")
+        except BrokenProcessPool:
+            self.shutdown()
+            raise AnalyticsUnavailable("Analytics workers are restarting, please retry shortly")
+        except CancelledError:
+            raise AnalyticsUnavailable("Analytics workers are restarting, please retry shortly")
+
+    def use_version(self, version):
+        """Retire the workers when they preloaded another price data version than version."""
+        with self._lock:
+            if self.data_version == version:
+                return
+            executor = None
+            if self.data_version is not None:
+                executor, self._executor = self._executor, None
+            self.data_version = version
+        # Calls already queued on the old workers still run there
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def shutdown(self, wait=False):
+        """Stop the workers; the next call starts a fresh pool with fresh price data.
+
+        Calls already queued on the old workers still run there, so concurrent
+        requests finish instead of failing when the pool is replaced.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+def init_app(app, config_class):
+    """Attach an analytics pool to the app (or nothing, when running inline)."""
+    workers = app.config.get("ANALYTICS_WORKERS", 0)
+    if workers > 0:
+        app.extensions["analytics_pool"] = AnalyticsPool(
+            config_class,
+            workers=workers,
+            max_pending=app.config.get("ANALYTICS_MAX_PENDING", workers * 4),
+            timeout=app.config.get("ANALYTICS_TIMEOUT", 30),
+            start_method=app.config.get("ANALYTICS_START_METHOD", "forkserver")
+        )
+
+    app.register_error_handler(AnalyticsUnavailable, unavailable_response)
+
+
+def run_analytics(func, *args, timeout=None, **kwargs):
+    """Run a calculation through the app's analytics pool.
+
+    Falls back to calling func inline when no pool is configured
+    (ANALYTICS_WORKERS = 0), which is what the tests and debugging use.
+    Either way func runs under a deadline of timeout (default ANALYTICS_TIMEOUT)
+    seconds, checked between its stages, so an abandoned calculation stops
+    instead of running to completion.
+    """
+    from app.services.data_version import current_price_version
+
+    deadline = Deadline.after(timeout or current_app.config.get("ANALYTICS_TIMEOUT", 30))
+    pool = current_app.extensions.get("analytics_pool")
+    if pool is None:
+        return run_with_deadline(deadline, func, args, kwargs)
+
+    # Workers hold a snapshot of the prices; start fresh ones when the data changes
+    pool.use_version(current_price_version())
+
+    return pool.run(run_with_deadline, (deadline, func, args, kwargs), timeout=timeout)
+
+
+def reset_analytics_pool():
+    """Drop the current workers so the next calculation sees refreshed prices."""
+    pool = current_app.extensions.get("analytics_pool")
+    if pool is not None:
+        pool.shutdown()
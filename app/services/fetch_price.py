@@ -11,64 +11,22 @@ session = requests.Session(impersonate="chrome")
 
 def fetch_all_history():
     from app import db
-    from app.models import Asset, Price
-
-    # Asset metadata: display name, full name, type, currency
-    asset_metadata = {
-        "AAPL":  ("AAPL", "Apple Inc.", "stock", "USD"),
-        "MSFT":  ("MSFT", "Microsoft Corp", "stock", "USD"),
-        "TSLA":  ("TSLA", "Tesla Inc.", "stock", "USD"),
-        "NVDA":  ("NVDA", "NVIDIA Corp", "stock", "USD"),
-        "AMZN":  ("AMZN", "Amazon.com Inc.", "stock", "USD"),
-        "GOOGL": ("GOOGL", "Alphabet Inc.", "stock", "USD"),
-        "BRK-B": ("BRK.B", "Berkshire Hathaway", "stock", "USD"),
-        "BTC-USD": ("BTC", "Bitcoin", "crypto", "USD"),
-        "MSTR":  ("MSTR", "MicroStrategy", "stock", "USD"),
-        "AMD":   ("AMD", "Advanced Micro Devices", "stock", "USD"),
-        "SPY":   ("SPY", "S&P 500 ETF", "etf", "USD")
-    }
-
-    # Default logo URLs for each asset
-    default_logos = {
-        code: f"/static/icons/{code.lower().replace('.', '-')}.svg"
-        for code in asset_metadata
-    }
-
-
-    # Strategy description for each asset
-    ASSET_STRATEGY = {
-        "AAPL":    "Innovation",
-        "MSFT":    "Cloud",
-        "TSLA":    "Electric",
-        "NVDA":    "AI",
-        "AMZN":    "Commerce",
-        "GOOGL":   "Advertising",
-        "BRK-B":   "Value",
-        "BTC-USD": "Volatility",
-        "MSTR":    "Leverage",
-        "AMD":     "Performance",
-        "SPY":     "Benchmark"
-    }
-
-    print(f"Starting asset metadata upsert for {len(asset_metadata)} assets...")
-    # Insert or update asset metadata
-    for code, (display, full, typ, curr) in asset_metadata.items():
-        existing = db.session.get(Asset, code)
-        logo = existing.logo_url if existing else default_logos.get(code)
-        asset = Asset(
-            asset_code=code,
-            display_name=display,
-            full_name=full,
-            type=typ,
-            currency=curr,
-            logo_url=logo,
-            strategy_description=ASSET_STRATEGY.get(code)
-        )
-        db.session.merge(asset)
+    from app.services.asset_registry import HISTORY_START_DATE, active_asset_codes, finish_history, seed_default_assets
+    from app.services.executor import reset_analytics_pool
+    from app.services.data_version import begin_refresh, report_refresh_progress, complete_refresh, fail_refresh
+    from app.services.asset_catalog import invalidate_asset_catalog
+    from app.services.coverage import refresh_asset_coverage
+    from app.services.price_chunks import refresh_price_chunks
+    from app.services.price_matrix import publish_price_matrix
+
+    # Make sure the default tickers are registered; the assets table is the registry
+    added = seed_default_assets()
     db.session.commit()
-    print("✔ Asset metadata upsert complete.")
+    invalidate_asset_catalog()
+    tickers = active_asset_codes()
+    print(f"✔ Asset registry ready: {len(tickers)} active assets ({added} defaults added).")
 
-    start_date = "2015-01-01"
+    start_date = HISTORY_START_DATE
     end_date = datetime.today().strftime("%Y-%m-%d")
     print(f"Fetching price data from {start_date} to {end_date}...")
 
@@ -79,89 +37,112 @@ def fetch_all_history():
         print(f"Created data directory: {data_dir}")
 
     # Download and insert historical price data
-    for ticker in asset_metadata:
-        print(f"📈 Fetching: {ticker}")
-        df = None
-        data_source = None
-        
-        # Primary: yfinance
+    begin_refresh(len(tickers))
+    try:
+        for index, ticker in enumerate(tickers):
+            # Committing progress also commits the previous ticker's prices
+            report_refresh_progress(ticker, index)
+            store_ticker_history(ticker, start_date, end_date)
+            refresh_asset_coverage([ticker])
+            refresh_price_chunks([ticker])
+            finish_history(ticker)
+        db.session.commit()
+    except Exception:
+        fail_refresh()
+        raise
+    complete_refresh()
+    print("✔ All historical prices saved successfully!")
+
+    # Hand the refreshed prices to every worker process through the shared matrix file
+    publish_price_matrix()
+
+    # Restart analytics workers so they preload the refreshed prices
+    reset_analytics_pool()
+
+# Download one ticker's history (yfinance, then Stooq, then the local CSV cache),
+# clean it (see app/services/price_quality.py) and merge it into the prices
+# table. The caller commits.
+def store_ticker_history(ticker, start_date, end_date):
+    from app.services.coverage import get_coverage
+    from app.services.price_quality import check_price_history, record_quality_report, write_closes
+
+    print(f"📈 Fetching: {ticker}")
+    df = None
+    data_source = None
+    
+    # Primary: yfinance
+    try:
+        df = yf.download(
+            ticker,
+            start=start_date,
+            end=end_date,
+            interval="1d",
+            progress=False,
+            session=session
+        )
+        if df.empty or "Close" not in df:
+            raise ValueError("No 'Close' data returned")
+        data_source = "yfinance"
+    except Exception as e:
+        print(f"✘ yfinance failed for {ticker}: {e}")
+        # Fallback 1: Stooq
         try:
-            df = yf.download(
-                ticker,
-                start=start_date,
-                end=end_date,
-                interval="1d",
-                progress=False,
-                session=session
+            sym = ticker.lower().replace("-", ".")
+            if ".us" not in sym:
+                sym += ".us"
+            d1 = start_date.replace("-", "")
+            d2 = end_date.replace("-", "")
+            url = f"https://stooq.com/q/d/l/?s={sym}&d1={d1}&d2={d2}&i=d"
+            df = pd.read_csv(
+                url,
+                parse_dates=["Date"],
+                index_col="Date",
+                usecols=["Date", "Close"]
             )
-            if df.empty or "Close" not in df:
-                raise ValueError("No 'Close' data returned")
-            data_source = "yfinance"
-        except Exception as e:
-            print(f"✘ yfinance failed for {ticker}: {e}")
-            # Fallback 1: Stooq
-            try:
-                sym = ticker.lower().replace("-", ".")
-                if ".us" not in sym:
-                    sym += ".us"
-                d1 = start_date.replace("-", "")
-                d2 = end_date.replace("-", "")
-                url = f"https://stooq.com/q/d/l/?s={sym}&d1={d1}&d2={d2}&i=d"
-                df = pd.read_csv(
-                    url,
-                    parse_dates=["Date"],
-                    index_col="Date",
-                    usecols=["Date", "Close"]
-                )
-                print(f"Using Stooq data source for {ticker}")
-                data_source = "stooq"
-            except Exception as e1:
-                print(f"✘ Stooq failed for {ticker}: {e1}")
-                # Fallback 2: Local CSV cache
-                cache_file = os.path.join('data', f"{ticker}.csv")
-                if os.path.exists(cache_file):
-                    try:
-                        df = pd.read_csv(
-                            cache_file,
-                            parse_dates=["date"],
-                            index_col="date"
-                        )
-                        df.index.name = "Date" 
-                        df.rename(columns={"close_price": "Close"}, inplace=True)
-                        print(f"Loaded cache for {ticker} from {cache_file}")
-                        data_source = "cache"
-                    except Exception as e2:
-                        print(f"✘ Loading cache failed for {ticker}: {e2}")
-                else:
-                    print(f"✘ All data sources failed for {ticker}")
-
-        if df is None or df.empty or "Close" not in df:
-            print(f"Skipped {ticker}, no 'Close' data available.")
-            continue
-
-        # Save successful data fetch to cache for future use
-        if data_source in ["yfinance", "stooq"]:  # Only save if we didn't load from cache
+            print(f"Using Stooq data source for {ticker}")
+            data_source = "stooq"
+        except Exception as e1:
+            print(f"✘ Stooq failed for {ticker}: {e1}")
+            # Fallback 2: Local CSV cache
             cache_file = os.path.join('data', f"{ticker}.csv")
-            df_to_save = df.reset_index()[["Date", "Close"]]
-            df_to_save.columns = ["date", "close_price"]
-            df_to_save.to_csv(cache_file, index=False)
-            print(f"✓ Saved {ticker} data to cache: {cache_file}")
-
-        # Process for database storage
-        df_for_db = df.reset_index()[["Date", "Close"]]
-        df_for_db.columns = ["date", "close_price"]
-        df_for_db["asset_code"] = ticker
-        df_for_db["date"] = pd.to_datetime(df_for_db["date"]).dt.date
-
-        for _, row in df_for_db.iterrows():
-            price = Price(
-                asset_code=row["asset_code"],
-                date=row["date"],
-                close_price=row["close_price"]
-            )
-            db.session.merge(price)
-    db.session.commit()
-    print("✔ All historical prices saved successfully!")
+            if os.path.exists(cache_file):
+                try:
+                    df = pd.read_csv(
+                        cache_file,
+                        parse_dates=["date"],
+                        index_col="date"
+                    )
+                    df.index.name = "Date" 
+                    df.rename(columns={"close_price": "Close"}, inplace=True)
+                    print(f"Loaded cache for {ticker} from {cache_file}")
+                    data_source = "cache"
+                except Exception as e2:
+                    print(f"✘ Loading cache failed for {ticker}: {e2}")
+            else:
+                print(f"✘ All data sources failed for {ticker}")
+
+    if df is None:
+        print(f"Skipped {ticker}, no 'Close' data available.")
+        return
+
+    # Validate and clean before anything is cached or written
+    existing = get_coverage([ticker]).get(ticker)
+    result = check_price_history(df, ticker, source=data_source, existing=existing)
+    record_quality_report(result.report)
+    if not result.accepted:
+        print(f"✘ Skipped {ticker}: {result.report['message']}")
+        return
+    if result.report["message"]:
+        print(f"⚠ {ticker}: {result.report['message']}")
+
+    # Save successful data fetch to cache for future use
+    if data_source in ["yfinance", "stooq"]:  # Only save if we didn't load from cache
+        cache_file = os.path.join('data', f"{ticker}.csv")
+        df_to_save = result.closes.rename("close_price").rename_axis("date").reset_index()
+        df_to_save.to_csv(cache_file, index=False)
+        print(f"✓ Saved {ticker} data to cache: {cache_file}")
+
+    write_closes(ticker, result.closes)
 
 # Flask CLI command to refresh prices
 @click.command("refresh-history")
@@ -0,0 +1,275 @@
+import json
+import time
+import uuid
+import inspect
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context, url_for
+from flask_login import current_user
+
+from app import db
+from app.models.job import AnalyticsJob
+from app.services.api import build_comparison_timeseries
+from app.services.calculation import calculate_portfolio_metrics, calculate_comparison_radar_metrics, calculate_drawdown_series
+from app.services.executor import AnalyticsTimeout, AnalyticsUnavailable, run_analytics
+from app.services.admission import admit
+from app.services.rebalance import parse_rebalance
+
+# Asynchronous analytics jobs: submit -> job id -> poll / stream status -> fetch result.
+# Jobs run on a small thread pool in the web process; each thread only waits on
+# run_analytics(), so the CPU work itself still happens in the analytics workers.
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+# Calculations that can be submitted as jobs. Params are passed as keyword arguments.
+JOB_TYPES = {
+    "comparison_radar": calculate_comparison_radar_metrics,
+    "comparison_timeseries": build_comparison_timeseries,
+    "portfolio_metrics": calculate_portfolio_metrics,
+    "drawdown": calculate_drawdown_series,
+}
+
+FINISHED_STATES = ("succeeded", "failed")
+
+
+class JobRunner:
+    """Runs queued jobs on background threads (or inline when workers = 0)."""
+
+    def __init__(self, app, workers, max_queued):
+        self.app = app
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analytics-job") if workers > 0 else None
+        self._slots = threading.BoundedSemaphore(max_queued)
+
+    def submit(self, job_id):
+        """Queue a job; returns False when the queue is full."""
+        if self._executor is None:
+            self._execute(job_id)
+            return True
+
+        if not self._slots.acquire(blocking=False):
+            return False
+        future = self._executor.submit(self._execute, job_id)
+        future.add_done_callback(lambda _: self._slots.release())
+        return True
+
+    def _execute(self, job_id):
+        with self.app.app_context():
+            job = db.session.get(AnalyticsJob, job_id)
+            if job is None:
+                return
+
+            try:
+                result = self._run_with_retries(job)
+                job.result_json = json.dumps(result, default=str)
+                job.status = "succeeded"
+            except Exception as e:
+                db.session.rollback()
+                job.error = str(e) or type(e).__name__
+                job.status = "failed"
+
+            job.finished_at = datetime.utcnow()
+            job.expires_at = job.finished_at + timedelta(seconds=self.app.config.get("ANALYTICS_JOB_TTL", 3600))
+            db.session.commit()
+            db.session.remove()
+
+
+    def _run_with_retries(self, job):
+        """Run the job's calculation, waiting out busy or restarting workers until ANALYTICS_JOB_TIMEOUT."""
+        params = json.loads(job.params_json)
+        expires = time.monotonic() + self.app.config.get("ANALYTICS_JOB_TIMEOUT", 600)
+        delay = self.app.config.get("ANALYTICS_JOB_RETRY_DELAY", 0.5)
+        while True:
+            job.status = "running"
+            job.started_at = job.started_at or datetime.utcnow()
+            db.session.commit()
+            try:
+                return run_analytics(JOB_TYPES[job.job_type], timeout=expires - time.monotonic(), **params)
+            except AnalyticsTimeout:
+                raise
+            except AnalyticsUnavailable as e:
+                # The pool is full or restarting: back to the queue, then try again
+                wait = max(delay, e.retry_after or 0)
+                if time.monotonic() + wait >= expires:
+                    raise
+                job.status = "queued"
+                db.session.commit()
+                time.sleep(wait)
+                delay = min(delay * 2, 30.0)
+
+
+def init_app(app):
+    app.extensions["analytics_jobs"] = JobRunner(
+        app,
+        workers=app.config.get("ANALYTICS_JOB_WORKERS", 2),
+        max_queued=app.config.get("ANALYTICS_JOB_MAX_QUEUED", 50)
+    )
+
+
+def purge_expired_jobs():
+    """Delete finished jobs past their TTL and fail jobs orphaned by a restart."""
+    now = datetime.utcnow()
+    AnalyticsJob.query.filter(AnalyticsJob.expires_at < now).delete(synchronize_session=False)
+
+    stale_before = now - timedelta(seconds=2 * current_app.config.get("ANALYTICS_JOB_TIMEOUT", 600))
+    AnalyticsJob.query.filter(
+        AnalyticsJob.status.in_(("queued", "running")),
+        AnalyticsJob.created_at < stale_before
+    ).update({
+        "status": "failed",
+        "error": "Job was interrupted",
+        "finished_at": now,
+        "expires_at": now + timedelta(seconds=current_app.config.get("ANALYTICS_JOB_TTL", 3600))
+    }, synchronize_session=False)
+    db.session.commit()
+
+
+def serialize_job(job):
+    return {
+        "job_id": job.job_id,
+        "type": job.job_type,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "expires_at": job.expires_at.isoformat() if job.expires_at else None,
+        "status_url": url_for("jobs.job_status", job_id=job.job_id),
+        "result_url": url_for("jobs.job_result", job_id=job.job_id),
+    }
+
+
+def _get_job_or_error(job_id):
+    """Return (job, None) or (None, error response) for the requested job."""
+    job = db.session.get(AnalyticsJob, job_id)
+    if job is None:
+        return None, (jsonify({"error": "Job not found"}), 404)
+
+    # Jobs submitted by a logged-in user are only visible to that user
+    if job.user_id is not None and (not current_user.is_authenticated or current_user.id != job.user_id):
+        return None, (jsonify({"error": "Job not found"}), 404)
+
+    if job.expires_at and job.expires_at < datetime.utcnow():
+        db.session.delete(job)
+        db.session.commit()
+        return None, (jsonify({"error": "Job result has expired"}), 410)
+
+    return job, None
+
+
+# 1. Submit a job
+@jobs_bp.route("", methods=["POST"])
+@admit(cost=4, heavy=False)  # The job queue bounds the work itself
+def submit_job():
+    data = request.get_json(silent=True) or {}
+    job_type = data.get("type")
+    params = data.get("params") or {}
+
+    if job_type not in JOB_TYPES:
+        return jsonify({"error": f"Unknown job type: {job_type}", "types": sorted(JOB_TYPES)}), 400
+
+    # Reject bad parameters now rather than as a failed job later. The threshold
+    # is folded into the rebalance setting, as the API endpoints do.
+    rebalance_threshold = params.pop("rebalance_threshold", None)
+    try:
+        inspect.signature(JOB_TYPES[job_type]).bind(**params)
+    except TypeError as e:
+        return jsonify({"error": f"Invalid params: {e}"}), 400
+    if "rebalance" in params:
+        try:
+            params["rebalance"] = parse_rebalance(params["rebalance"], rebalance_threshold)
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid params: {e}"}), 400
+
+    purge_expired_jobs()
+
+    job = AnalyticsJob(
+        job_id=uuid.uuid4().hex,
+        job_type=job_type,
+        user_id=current_user.id if current_user.is_authenticated else None,
+        status="queued",
+        params_json=json.dumps(params),
+        created_at=datetime.utcnow()
+    )
+    db.session.add(job)
+    db.session.commit()
+    job_id = job.job_id
+
+    if not current_app.extensions["analytics_jobs"].submit(job_id):
+        db.session.delete(job)
+        db.session.commit()
+        response = jsonify({"error": "Too many queued jobs, please retry shortly"})
+        response.headers["Retry-After"] = "5"
+        return response, 503
+
+    job = db.session.get(AnalyticsJob, job_id)
+    db.session.refresh(job)
+    response = jsonify(serialize_job(job))
+    response.headers["Location"] = url_for("jobs.job_status", job_id=job_id)
+    return response, 202
+
+
+# 2. Poll job status
+@jobs_bp.route("/<job_id>", methods=["GET"])
+def job_status(job_id):
+    job, error = _get_job_or_error(job_id)
+    if error:
+        return error
+    return jsonify(serialize_job(job))
+
+
+# 3. Stream job status as Server-Sent Events until the job finishes
+@jobs_bp.route("/<job_id>/stream", methods=["GET"])
+def job_stream(job_id):
+    job, error = _get_job_or_error(job_id)
+    if error:
+        return error
+
+    interval = current_app.config.get("ANALYTICS_JOB_POLL_INTERVAL", 0.5)
+    max_duration = current_app.config.get("ANALYTICS_JOB_STREAM_MAX", 300)
+
+    @stream_with_context
+    def generate():
+        deadline = time.monotonic() + max_duration
+        last_status = None
+        while True:
+            db.session.expire_all()
+            current = db.session.get(AnalyticsJob, job_id)
+            if current is None:
+                yield "event: gone\ndata: {}\n\n"
+                return
+
+            if current.status != last_status:
+                last_status = current.status
+                yield f"event: status\ndata: {json.dumps(serialize_job(current))}\n\n"
+            else:
+                yield ": keep-alive\n\n"
+
+            if current.status in FINISHED_STATES or time.monotonic() > deadline:
+                return
+            db.session.rollback()  # end the read transaction between polls
+            time.sleep(interval)
+
+    return Response(generate(), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# 4. Fetch the result of a finished job
+@jobs_bp.route("/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    job, error = _get_job_or_error(job_id)
+    if error:
+        return error
+
+    if job.status == "failed":
+        return jsonify({"job_id": job.job_id, "status": job.status, "error": job.error}), 500
+    if job.status != "succeeded":
+        response = jsonify({"job_id": job.job_id, "status": job.status})
+        response.headers["Retry-After"] = "1"
+        return response, 202
+
+    return current_app.response_class(
+        f'{{"job_id": {json.dumps(job.job_id)}, "status": "succeeded", "result": {job.result_json}}}',
+        mimetype="application/json"
+    )
@@ -0,0 +1,124 @@
+import json
+import base64
+from datetime import date, datetime
+
+from sqlalchemy import Date, DateTime, and_, or_, tuple_
+
+# Keyset (cursor) pagination: instead of OFFSET, each page starts right after the
+# (sort value, id) of the last row of the previous page, so every page is an index
+# seek no matter how deep the client has scrolled.
+#
+# Rows are ordered by (sort column, id) using SQLite's own NULL ordering - NULLs
+# sort first ascending and last descending - so the ORDER BY can be read straight
+# from an index on the sort column. The cursor is opaque to clients: base64 JSON
+# of [sort value, id] for the last row returned.
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+class InvalidCursor(ValueError):
+    """The cursor is malformed or was issued for a different sort."""
+
+
+class Page:
+    """One page of rows plus the cursor for the next page (None on the last page)."""
+
+    def __init__(self, items, next_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def _encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _decode_value(column, value):
+    if value is None:
+        return None
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    if isinstance(column.type, Date):
+        return date.fromisoformat(value)
+    return value
+
+
+def encode_cursor(sort_key: str, value, row_id: int) -> str:
+    payload = json.dumps([sort_key, _encode_value(value), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_key: str):
+    """Return (sort value, id) from a cursor; raises InvalidCursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid cursor") from e
+
+    if key != sort_key or not isinstance(row_id, int):
+        raise InvalidCursor("Cursor does not match the requested sort")
+    return value, row_id
+
+
+def parse_page_size(value, default=DEFAULT_PAGE_SIZE) -> int:
+    """Clamp a ?limit= query parameter to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(value) if value not in (None, "") else default
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def _after_cursor(sort_column, id_column, value, row_id, descending):
+    """WHERE clause selecting the rows that come after (value, row_id)."""
+    if not descending:
+        # NULLs come first, so a non-NULL cursor is already past all of them
+        if value is None:
+            return or_(and_(sort_column.is_(None), id_column > row_id), sort_column.isnot(None))
+        return tuple_(sort_column, id_column) > tuple_(value, row_id)
+
+    # NULLs come last
+    if value is None:
+        return and_(sort_column.is_(None), id_column < row_id)
+    return or_(tuple_(sort_column, id_column) < tuple_(value, row_id), sort_column.is_(None))
+
+
+def keyset_paginate(query, sort_key, sort_column, id_column, descending=False,
+                    cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Return a Page of query results ordered by (sort_column, id_column).
+
+    sort_key names the sort in the cursor, so a cursor from one sort order
+    cannot be replayed against another.
+    """
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort_key)
+        value = _decode_value(sort_column, value)
+        query = query.filter(_after_cursor(sort_column, id_column, value, row_id, descending))
+
+    if descending:
+        query = query.order_by(sort_column.desc(), id_column.desc())
+    else:
+        query = query.order_by(sort_column.asc(), id_column.asc())
+
+    # One extra row tells us whether there is a next page
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(
+            sort_key,
+            getattr(last, sort_column.key),
+            getattr(last, id_column.key)
+        )
+    return Page(items, next_cursor)
@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+from app.services.database import dispose_engines
+
+# Warm state for pre-fork WSGI servers (see wsgi.py and gunicorn.conf.py). The
+# master process builds the app and loads the price store, price matrix mapping,
+# asset catalog and coverage once; workers forked from it inherit all of that
+# copy-on-write instead of each warming up on its first requests. A watcher
+# thread in the master only checks the price data version; when it changed, the
+# server reloads, warming up again on its main thread before it forks the new
+# workers. Forks wait for a running version check, so a worker never inherits a
+# connection or lock the watcher was in the middle of using.
+
+_fork_guard = threading.Lock()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(before=_fork_guard.acquire,
+                        after_in_parent=_fork_guard.release,
+                        after_in_child=_fork_guard.release)
+
+
+def warm_up(app):
+    """Load the per-process caches for the current price data; returns the warm state."""
+    from app.services.asset_catalog import get_asset_catalog
+    from app.services.calculation import preload_prices
+    from app.services.coverage import global_window
+    from app.services.data_version import current_price_version
+    from app.services.price_matrix import get_price_matrix
+
+    began = time.perf_counter()
+    with app.app_context():
+        app.extensions.pop("price_version_cache", None)
+        version = current_price_version()
+        get_asset_catalog()
+        global_window()
+        get_price_matrix()
+        assets = preload_prices()
+        # Forked workers must not share the master's database connections
+        dispose_engines()
+
+    state = {
+        "version": version,
+        "assets": assets,
+        "pid": os.getpid(),
+        "seconds": round(time.perf_counter() - began, 3),
+        "warmed_at": datetime.utcnow().isoformat(),
+    }
+    app.extensions["warm_state"] = state
+    return state
+
+
+def stale_price_version(app):
+    """The price data version when it differs from the one the app warmed up with, else None."""
+    from app.services.data_version import current_price_version
+
+    with _fork_guard, app.app_context():
+        app.extensions.pop("price_version_cache", None)
+        version = current_price_version()
+        dispose_engines()
+
+    warmed = app.extensions.get("warm_state")
+    if warmed is not None and warmed["version"] == version:
+        return None
+    return version
+
+
+def reload_if_stale(app, on_reload):
+    """Warm up again and call on_reload(state) when the price data version moved on.
+
+    Warms up on the calling thread, so a pre-fork master must call this from
+    the thread that forks its workers.
+    """
+    if stale_price_version(app) is None:
+        return False
+    on_reload(warm_up(app))
+    return True
+
+
+def watch_price_version(app, on_change, interval, stop=None):
+    """Call on_change() on a daemon thread once per new price data version, checking every interval seconds."""
+    stop = stop or threading.Event()
+
+    def watch():
+        signalled = None
+        while not stop.wait(interval):
+            try:
+                version = stale_price_version(app)
+                # The reload may take longer than one interval; ask for it once
+                if version is not None and version != signalled:
+                    signalled = version
+                    on_change()
+            except Exception as e:
+                # Keep serving the current workers; try again on the next tick
+                print(f"Price version check failed: {e}")
+
+    thread = threading.Thread(target=watch, name="price-version-watch", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,116 @@
+import click
+import numpy as np
+import pandas as pd
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+
+from app import db
+from app.models.asset import Price, PriceChunk
+from app.services.database import analytics_bind
+
+# price_chunks stores each asset's history as one row per calendar year with the
+# dates and closes packed into little-endian arrays: 2 bytes per day offset and
+# 8 per close, instead of a ~40 byte row per asset-day in prices. A full history
+# load is a handful of blob fetches decoded with np.frombuffer, no per-row objects.
+# prices stays the source of truth; chunks are rebuilt per ticker during ingest.
+
+OFFSET_DTYPE = np.dtype("<u2")
+CLOSE_DTYPE = np.dtype("<f8")
+
+
+def pack_history(asset_code, dates, closes):
+    """Split one asset's sorted history into price_chunks rows, one per year."""
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    closes = np.asarray(closes, dtype=CLOSE_DTYPE)
+    if dates.size == 0:
+        return []
+
+    years = dates.astype("datetime64[Y]")
+    offsets = (dates - years.astype("datetime64[D]")).astype(OFFSET_DTYPE)
+    _, starts = np.unique(years, return_index=True)
+    bounds = list(starts) + [dates.size]
+
+    rows = []
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        rows.append({
+            "asset_code": asset_code,
+            "year": int(years[begin].astype(int)) + 1970,
+            "row_count": int(end - begin),
+            "day_offsets": offsets[begin:end].tobytes(),
+            "closes": closes[begin:end].tobytes(),
+        })
+    return rows
+
+
+def unpack_chunks(chunks):
+    """(dates as datetime64[D], closes) from (year, day_offsets, closes) rows in year order."""
+    dates, closes = [], []
+    for year, day_offsets, packed_closes in chunks:
+        offsets = np.frombuffer(day_offsets, dtype=OFFSET_DTYPE)
+        dates.append(np.datetime64(f"{year:04d}-01-01", "D") + offsets.astype("timedelta64[D]"))
+        closes.append(np.frombuffer(packed_closes, dtype=CLOSE_DTYPE))
+    if not dates:
+        return np.array([], dtype="datetime64[D]"), np.array([], dtype=CLOSE_DTYPE)
+    return np.concatenate(dates), np.concatenate(closes)
+
+
+def _frame(asset, dates, closes):
+    """The one-column DataFrame shape used by the calculation layer."""
+    index = pd.DatetimeIndex(dates.astype("datetime64[ns]"), name="date")
+    return pd.DataFrame({asset: closes}, index=index)
+
+
+def refresh_price_chunks(asset_codes=None):
+    """Rebuild chunks from prices; all assets when asset_codes is None. The caller commits."""
+    query = select(Price.asset_code, Price.date, Price.close_price).order_by(Price.asset_code, Price.date)
+    if asset_codes is None:
+        db.session.query(PriceChunk).delete(synchronize_session=False)
+    else:
+        asset_codes = list(asset_codes)
+        db.session.query(PriceChunk).filter(
+            PriceChunk.asset_code.in_(asset_codes)
+        ).delete(synchronize_session=False)
+        query = query.where(Price.asset_code.in_(asset_codes))
+
+    records = db.session.execute(query).all()
+    if not records:
+        return 0
+
+    df = pd.DataFrame(records, columns=["asset_code", "date", "close"])
+    df["close"] = df["close"].astype(float)
+    rows = []
+    for asset, group in df.groupby("asset_code", sort=False):
+        rows.extend(pack_history(asset, pd.to_datetime(group["date"]).values, group["close"].values))
+
+    db.session.execute(insert(PriceChunk), rows)
+    return len(rows)
+
+
+def load_asset_history(asset, start_date=None):
+    """An asset's closes from start_date onwards from price_chunks, or None when there are no chunks."""
+    query = select(PriceChunk.year, PriceChunk.day_offsets, PriceChunk.closes).where(
+        PriceChunk.asset_code == asset
+    ).order_by(PriceChunk.year)
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        query = query.where(PriceChunk.year >= start.year)
+
+    chunks = db.session.execute(query, bind_arguments={"bind": analytics_bind()}).all()
+    if not chunks:
+        return None
+
+    dates, closes = unpack_chunks(chunks)
+    if start_date is not None:
+        keep = dates >= np.datetime64(start.date(), "D")
+        dates, closes = dates[keep], closes[keep]
+    return _frame(asset, dates, closes) if dates.size else None
+
+
+# Flask CLI command to rebuild every chunk from prices
+@click.command("rebuild-price-chunks")
+@with_appcontext
+def rebuild_price_chunks_command():
+    """Recompute price_chunks from the prices table."""
+    count = refresh_price_chunks()
+    db.session.commit()
+    click.echo(f"✔ Rebuilt {count} price chunks.")
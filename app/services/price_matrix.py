@@ -0,0 +1,195 @@
+import mmap
+import os
+import struct
+import time
+
+import click
+import numpy as np
+import pandas as pd
+from flask import current_app
+from flask.cli import with_appcontext
+
+from app.services.price_store import PriceCalendar, read_asset_history, stored_asset_codes
+
+# The full aligned price matrix in one memory-mapped file (PRICE_MATRIX_PATH), so
+# every web and analytics worker process on the host reads the same physical pages
+# from the OS page cache instead of each holding its own copy, and nothing is
+# deserialized: a history is a slice of the mapping.
+#
+# Layout, little-endian:
+#   header   magic, format, price data version, calendar start (days since
+#            1970-01-01), calendar days, asset count, code table length
+#   codes    asset codes joined by "\n", padded to DATA_ALIGNMENT
+#   closes   float64 [assets x calendar days], NaN where an asset has no close
+#
+# The refresh process writes a new file next to the old one and os.replace()s it
+# in; readers notice the new inode within PRICE_VERSION_CHECK_INTERVAL seconds and
+# remap. Pages of the old file stay valid for as long as a reader still holds them.
+
+MAGIC = b"PRCMATRX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIQiIIQ")
+DATA_ALIGNMENT = 64
+CLOSE_DTYPE = np.dtype("<f8")
+
+
+class PriceMatrixError(ValueError):
+    """The file is not a complete price matrix of a format this code reads."""
+
+
+def _data_offset(codes_length):
+    end = HEADER.size + codes_length
+    return -(-end // DATA_ALIGNMENT) * DATA_ALIGNMENT
+
+
+class PriceMatrix:
+    """A read-only mapping of a price matrix file."""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            info = os.fstat(f.fileno())
+            if info.st_size < HEADER.size:
+                raise PriceMatrixError(f"{path} is too short for a price matrix")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fmt, version, start, days, assets, codes_length = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise PriceMatrixError(f"{path} is not a format {FORMAT_VERSION} price matrix")
+        offset = _data_offset(codes_length)
+        if info.st_size < offset + assets * days * CLOSE_DTYPE.itemsize:
+            raise PriceMatrixError(f"{path} is truncated")
+
+        codes = bytes(self._mmap[HEADER.size:HEADER.size + codes_length]).decode()
+        self.path = path
+        self.file_id = (info.st_dev, info.st_ino)
+        self.version = version
+        self.columns = {code: i for i, code in enumerate(codes.split("\n"))} if assets else {}
+        self.calendar = PriceCalendar(np.datetime64(start, "D"), np.datetime64(start + days - 1, "D"))
+        self.closes = np.frombuffer(self._mmap, dtype=CLOSE_DTYPE, count=assets * days, offset=offset)
+        self.closes = self.closes.reshape(assets, days)
+
+    def frame(self, asset, start_date=None):
+        """One-column DataFrame of asset's closes from start_date onwards, or None."""
+        column = self.columns.get(asset)
+        if column is None:
+            return None
+        first = max(self.calendar.position(start_date), 0) if start_date else 0
+        closes = self.closes[column, first:]
+        positions = np.flatnonzero(~np.isnan(closes))
+        if positions.size == 0:
+            return None
+        return pd.DataFrame({asset: closes[positions]}, index=self.calendar.index(positions + first))
+
+    def matrix(self, assets, start_date=None, end_date=None):
+        """(DatetimeIndex of calendar days, float array days x assets) with NaN where an asset has no close."""
+        first = max(self.calendar.position(start_date), 0) if start_date else 0
+        last = min(self.calendar.position(end_date), self.calendar.size - 1) if end_date else self.calendar.size - 1
+        days = max(last - first + 1, 0)
+
+        values = np.full((days, len(assets)), np.nan)
+        for i, asset in enumerate(assets):
+            column = self.columns.get(asset)
+            if column is not None and days:
+                values[:, i] = self.closes[column, first:last + 1]
+        return self.calendar.index(np.arange(first, first + days)), values
+
+
+def export_price_matrix(path, version):
+    """Write every stored asset's history to path atomically; returns the asset count.
+
+    Histories are read one asset at a time and written straight into the mapped
+    output file, so the export never holds the whole matrix in memory.
+    """
+    codes = stored_asset_codes()
+    calendar = PriceCalendar.from_database()
+    days = calendar.size if codes else 0
+    code_table = "\n".join(codes).encode()
+    offset = _data_offset(len(code_table))
+    size = offset + len(codes) * days * CLOSE_DTYPE.itemsize
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, "wb+") as f:
+            f.truncate(max(size, HEADER.size))
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, version,
+                                int(calendar.start.astype(int)), days, len(codes), len(code_table)))
+            f.write(code_table)
+            f.flush()
+
+            if codes and days:
+                closes = np.memmap(f, dtype=CLOSE_DTYPE, mode="r+", offset=offset, shape=(len(codes), days))
+                closes[:] = np.nan
+                for column, code in enumerate(codes):
+                    dates, values = read_asset_history(code)
+                    closes[column, calendar.positions(dates)] = values
+                closes.flush()
+                del closes
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return len(codes)
+
+
+def publish_price_matrix():
+    """Export the matrix for the current price version when PRICE_MATRIX_PATH is set."""
+    from app.services.data_version import current_price_version
+
+    path = current_app.config.get("PRICE_MATRIX_PATH")
+    if not path:
+        return None
+    try:
+        return export_price_matrix(path, current_price_version())
+    except OSError as e:
+        # Readers keep serving from the database until the next export succeeds
+        print(f"Exporting the price matrix to {path} failed: {e}")
+        return None
+
+
+def get_price_matrix():
+    """This process's mapping of the current price matrix, or None to read prices elsewhere."""
+    from app.services.data_version import current_price_version
+
+    path = current_app.config.get("PRICE_MATRIX_PATH")
+    if not path:
+        return None
+
+    state = current_app.extensions.setdefault("price_matrix", {"matrix": None, "file_id": None, "checked_at": 0.0})
+    now = time.monotonic()
+    if now - state["checked_at"] >= current_app.config.get("PRICE_VERSION_CHECK_INTERVAL", 1.0):
+        state["checked_at"] = now
+        try:
+            info = os.stat(path)
+            file_id = (info.st_dev, info.st_ino)
+        except FileNotFoundError:
+            file_id = None
+
+        # Map each file once; a file that failed to map is retried only once replaced
+        if file_id != state["file_id"]:
+            state["file_id"], state["matrix"] = file_id, None
+            if file_id is not None:
+                try:
+                    state["matrix"] = PriceMatrix(path)
+                except (OSError, ValueError) as e:
+                    print(f"Mapping the price matrix {path} failed: {e}")
+
+    mapped = state["matrix"]
+    # A file from an older version (the export is still running) is not served
+    if mapped is None or mapped.version != current_price_version():
+        return None
+    return mapped
+
+
+# Flask CLI command to write the matrix file for the current prices
+@click.command("export-price-matrix")
+@with_appcontext
+def export_price_matrix_command():
+    """Write the memory-mapped price matrix to PRICE_MATRIX_PATH."""
+    count = publish_price_matrix()
+    if count is None:
+        raise click.ClickException("PRICE_MATRIX_PATH is not set or the export failed.")
+    click.echo(f"✔ Exported {count} assets to {current_app.config['PRICE_MATRIX_PATH']}.")
@@ -0,0 +1,214 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from app import db
+from app.models.asset import Price, PriceQualityReport
+from app.services.coverage import GAP_DAYS
+
+# Validation and cleaning between a download and the prices table. Every check
+# is a vectorized pass over the whole series:
+#   - dropped: missing/non-finite closes, zero or negative closes, duplicate dates
+#     (the last one wins), and one-day spikes that jump by SPIKE_RATIO and come
+#     straight back
+#   - flagged: persistent moves of JUMP_RATIO or more (e.g. an unadjusted split)
+#     and holes longer than coverage.GAP_DAYS
+#   - rejected: downloads that end before, or hold far fewer rows than, the
+#     history already stored, so a truncated response never replaces good data
+# Each check writes a price_quality_reports row.
+
+SPIKE_RATIO = 1.8
+JUMP_RATIO = 1.8
+MIN_ROWS_RATIO = 0.9  # Share of the stored row count a download must reach
+MAX_FLAGGED_DATES = 5  # Dates listed in the report message per problem
+
+
+class QualityResult:
+    """Cleaned closes (a float Series indexed by date) and the report describing them."""
+
+    def __init__(self, closes, report):
+        self.closes = closes
+        self.report = report
+
+    @property
+    def accepted(self):
+        return self.report["status"] != "rejected"
+
+
+def extract_closes(df, ticker):
+    """The Close column of a yfinance / Stooq / cache frame as a float Series indexed by date."""
+    if df is None or len(df) == 0:
+        return pd.Series(dtype=float, name=ticker)
+
+    if isinstance(df, pd.Series):
+        closes = df
+    elif isinstance(df.columns, pd.MultiIndex):
+        # yfinance returns (field, ticker) columns, even for a single ticker
+        level = next((i for i in range(df.columns.nlevels)
+                      if "Close" in df.columns.get_level_values(i)), None)
+        if level is None:
+            return pd.Series(dtype=float, name=ticker)
+        closes = df.xs("Close", axis=1, level=level)
+        if isinstance(closes, pd.DataFrame):
+            closes = closes[ticker] if ticker in closes.columns else closes.iloc[:, 0]
+    elif "Close" in df.columns:
+        closes = df["Close"]
+    else:
+        return pd.Series(dtype=float, name=ticker)
+
+    if isinstance(closes, pd.DataFrame):  # Duplicated column names
+        closes = closes.iloc[:, 0]
+
+    index = pd.to_datetime(closes.index, errors="coerce")
+    if getattr(index, "tz", None) is not None:
+        index = index.tz_localize(None)
+    values = pd.to_numeric(pd.Series(closes.to_numpy()), errors="coerce").to_numpy(dtype=float)
+    return pd.Series(values, index=index.normalize(), name=ticker)
+
+
+def _dates(index, mask, limit=MAX_FLAGGED_DATES):
+    return ", ".join(d.strftime("%Y-%m-%d") for d in index[mask][:limit])
+
+
+def check_price_history(df, ticker, source=None, existing=None):
+    """Clean a downloaded history; existing is the stored coverage (or None)."""
+    closes = extract_closes(df, ticker)
+    report = {
+        "asset_code": ticker, "checked_at": datetime.utcnow(), "source": source,
+        "rows_in": int(len(closes)), "missing_count": 0, "non_positive_count": 0,
+        "duplicate_count": 0, "spike_count": 0, "jump_count": 0, "gap_count": 0, "max_gap_days": 0,
+    }
+    notes = []
+
+    # Missing and invalid values
+    values = closes.to_numpy()
+    missing = ~np.isfinite(values) | closes.index.isna()
+    non_positive = ~missing & (values <= 0)
+    report["missing_count"] = int(missing.sum())
+    report["non_positive_count"] = int(non_positive.sum())
+    if non_positive.any():
+        notes.append(f"non-positive closes on {_dates(closes.index, non_positive)}")
+    closes = closes[~(missing | non_positive)].sort_index(kind="stable")
+
+    # Duplicate dates: keep the last value for each day
+    duplicated = closes.index.duplicated(keep="last")
+    report["duplicate_count"] = int(duplicated.sum())
+    closes = closes[~duplicated]
+
+    # One-day spikes: a big move immediately undone by the next one
+    limit = np.log(SPIKE_RATIO)
+    if len(closes) >= 3:
+        moves = np.diff(np.log(closes.to_numpy()))
+        before, after = moves[:-1], moves[1:]
+        spike = np.zeros(len(closes), dtype=bool)
+        spike[1:-1] = ((np.abs(before) > limit) & (np.abs(after) > limit)
+                       & (np.sign(before) != np.sign(after)) & (np.abs(before + after) < limit / 2))
+        report["spike_count"] = int(spike.sum())
+        if spike.any():
+            notes.append(f"spikes removed on {_dates(closes.index, spike)}")
+        closes = closes[~spike]
+
+    if len(closes) >= 2:
+        # Persistent jumps are kept but flagged
+        moves = np.diff(np.log(closes.to_numpy()))
+        jumps = np.concatenate([[False], np.abs(moves) > np.log(JUMP_RATIO)])
+        report["jump_count"] = int(jumps.sum())
+        if jumps.any():
+            notes.append(f"jumps of {JUMP_RATIO}x or more on {_dates(closes.index, jumps)}")
+
+        gaps = np.diff(closes.index.values).astype("timedelta64[D]").astype(int)
+        report["gap_count"] = int((gaps > GAP_DAYS).sum())
+        report["max_gap_days"] = int(gaps.max())
+
+    report["rows_out"] = int(len(closes))
+    report["first_date"] = closes.index[0].date() if len(closes) else None
+    report["last_date"] = closes.index[-1].date() if len(closes) else None
+
+    # Never replace stored history with a shorter download
+    rejection = None
+    if closes.empty:
+        rejection = "no usable closes"
+    elif existing is not None and existing.last_date and report["last_date"] < existing.last_date:
+        rejection = f"download ends {report['last_date']}, before the stored {existing.last_date}"
+    elif existing is not None and report["rows_out"] < MIN_ROWS_RATIO * existing.row_count:
+        rejection = f"download has {report['rows_out']} rows, the stored history has {existing.row_count}"
+
+    if rejection:
+        report["status"] = "rejected"
+        notes.insert(0, f"rejected: {rejection}")
+    elif report["rows_out"] < report["rows_in"]:
+        report["status"] = "repaired"
+    else:
+        report["status"] = "accepted"
+
+    report["message"] = "; ".join(notes)[:500] or None
+    return QualityResult(closes, report)
+
+
+def record_quality_report(report):
+    """Add a price_quality_reports row; the caller commits."""
+    db.session.add(PriceQualityReport(**report))
+
+
+def write_closes(ticker, closes):
+    """Replace ticker's stored closes over the range of closes; the caller commits.
+
+    Stored dates in that range that the cleaning dropped (bad closes, spikes,
+    duplicates) are deleted, so an earlier bad value does not survive the
+    repair. The rest is one executemany upsert.
+    """
+    if closes.empty:
+        return 0
+    rows = [
+        {"asset_code": ticker, "date": day.date(), "close_price": float(close)}
+        for day, close in zip(closes.index, closes.to_numpy())
+    ]
+    stored = db.session.execute(
+        select(Price.date).where(Price.asset_code == ticker,
+                                 Price.date.between(rows[0]["date"], rows[-1]["date"]))
+    ).scalars()
+    stale = set(stored) - {row["date"] for row in rows}
+    if stale:
+        db.session.execute(
+            delete(Price).where(Price.asset_code == ticker, Price.date.in_(sorted(stale)))
+            .execution_options(synchronize_session=False)
+        )
+    statement = sqlite_insert(Price)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[Price.asset_code, Price.date],
+            set_={"close_price": statement.excluded.close_price}
+        ),
+        rows
+    )
+    return len(rows)
+
+
+def latest_quality_reports():
+    """The most recent report for every asset, as dictionaries."""
+    latest = select(func.max(PriceQualityReport.id)).group_by(PriceQualityReport.asset_code)
+    reports = PriceQualityReport.query.filter(
+        PriceQualityReport.id.in_(latest)
+    ).order_by(PriceQualityReport.asset_code).all()
+
+    return [{
+        "asset_code": r.asset_code,
+        "checked_at": r.checked_at.isoformat(),
+        "source": r.source,
+        "status": r.status,
+        "rows_in": r.rows_in,
+        "rows_out": r.rows_out,
+        "first_date": r.first_date.isoformat() if r.first_date else None,
+        "last_date": r.last_date.isoformat() if r.last_date else None,
+        "missing_count": r.missing_count,
+        "non_positive_count": r.non_positive_count,
+        "duplicate_count": r.duplicate_count,
+        "spike_count": r.spike_count,
+        "jump_count": r.jump_count,
+        "gap_count": r.gap_count,
+        "max_gap_days": r.max_gap_days,
+        "message": r.message,
+    } for r in reports]
@@ -0,0 +1,271 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.models.asset import AssetCoverage, Price, PriceChunk
+from app.services.coverage import global_window
+from app.services.database import analytics_bind
+from app.services.price_chunks import CLOSE_DTYPE, unpack_chunks
+
+# In-process price store for analytics workers. Histories are loaded one asset at
+# a time on first use and kept in an LRU bounded by the bytes of the resident
+# arrays (PRICE_STORE_MAX_BYTES), so a worker's memory stays flat however many
+# tickers the registry holds. Dates are stored once, as a shared daily calendar:
+# each asset keeps int32 day positions on it next to its float64 closes, and
+# lining several assets up is plain array indexing instead of a pandas join.
+#
+# A store is built for one price data version; analytics workers are restarted
+# when the version changes (see app/services/executor.py), taking it with them.
+
+POSITION_DTYPE = np.dtype("int32")
+MISSING_COST = 64  # Bytes charged for remembering that an asset has no prices
+
+
+class PriceCalendar:
+    """Every calendar day from start to end; a date's position is its day offset from start."""
+
+    def __init__(self, start, end):
+        self.start = np.datetime64(start, "D")
+        self.end = np.datetime64(end, "D")
+
+    @classmethod
+    def from_database(cls):
+        first, last = global_window()
+        if first is None:
+            today = np.datetime64("today", "D")
+            return cls(today, today)
+        return cls(first, last)
+
+    @property
+    def size(self):
+        return int((self.end - self.start).astype(int)) + 1
+
+    def position(self, day):
+        return int((np.datetime64(pd.Timestamp(day).date(), "D") - self.start).astype(int))
+
+    def positions(self, dates):
+        return (np.asarray(dates, dtype="datetime64[D]") - self.start).astype(POSITION_DTYPE)
+
+    def dates(self, positions):
+        return self.start + np.asarray(positions).astype("timedelta64[D]")
+
+    def index(self, positions):
+        return pd.DatetimeIndex(self.dates(positions).astype("datetime64[ns]"), name="date")
+
+
+class AssetPrices:
+    """One asset's closes at sorted positions on the store's calendar."""
+
+    __slots__ = ("positions", "closes")
+
+    def __init__(self, positions, closes):
+        self.positions = positions
+        self.closes = closes
+
+    @property
+    def nbytes(self):
+        return self.positions.nbytes + self.closes.nbytes
+
+    def since(self, position):
+        """Slice from the first point at or after position (views, no copy)."""
+        begin = int(np.searchsorted(self.positions, position, side="left"))
+        return self.positions[begin:], self.closes[begin:]
+
+
+def read_asset_history(asset):
+    """(dates as datetime64[D], closes) of asset's full history: chunks first, then rows."""
+    chunks = db.session.execute(
+        select(PriceChunk.year, PriceChunk.day_offsets, PriceChunk.closes)
+        .where(PriceChunk.asset_code == asset).order_by(PriceChunk.year),
+        bind_arguments={"bind": analytics_bind()}
+    ).all()
+    if chunks:
+        return unpack_chunks(chunks)
+
+    rows = db.session.execute(
+        select(Price.date, Price.close_price).where(Price.asset_code == asset).order_by(Price.date),
+        bind_arguments={"bind": analytics_bind()}
+    ).all()
+    dates = np.array([r.date for r in rows], dtype="datetime64[D]")
+    closes = np.array([r.close_price for r in rows], dtype=CLOSE_DTYPE)
+    return dates, closes
+
+
+def stored_asset_codes():
+    """Codes of every asset with prices, in code order."""
+    codes = db.session.execute(
+        select(AssetCoverage.asset_code).order_by(AssetCoverage.asset_code)
+    ).scalars().all()
+    if not codes:
+        codes = db.session.execute(
+            select(Price.asset_code).distinct().order_by(Price.asset_code)
+        ).scalars().all()
+    return codes
+
+
+class PriceStore:
+    """Lazily loaded asset histories in an LRU bounded by max_bytes."""
+
+    def __init__(self, calendar, max_bytes, version=None, loader=read_asset_history):
+        self.calendar = calendar
+        self.max_bytes = max_bytes
+        self.version = version
+        self._loader = loader
+        self._entries = OrderedDict()  # asset -> AssetPrices, or None when it has no prices
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    @staticmethod
+    def _cost(entry):
+        return entry.nbytes if entry is not None else MISSING_COST
+
+    def get(self, asset):
+        """asset's AssetPrices, loading it on a miss; None when it has no prices."""
+        with self._lock:
+            if asset in self._entries:
+                self._entries.move_to_end(asset)
+                self.hits += 1
+                return self._entries[asset]
+            self.misses += 1
+
+        dates, closes = self._loader(asset)
+        entry = AssetPrices(self.calendar.positions(dates), np.ascontiguousarray(closes, dtype=CLOSE_DTYPE)) \
+            if len(dates) else None
+        self._put(asset, entry)
+        return entry
+
+    def _put(self, asset, entry):
+        cost = self._cost(entry)
+        if cost > self.max_bytes:
+            return  # Served once, never resident
+
+        with self._lock:
+            if asset in self._entries:
+                self._bytes -= self._cost(self._entries.pop(asset))
+            self._entries[asset] = entry
+            self._bytes += cost
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= self._cost(evicted)
+                self.evictions += 1
+
+    def frame(self, asset, start_date=None):
+        """One-column DataFrame of asset's closes from start_date onwards, or None."""
+        entry = self.get(asset)
+        if entry is None:
+            return None
+        positions, closes = entry.since(self.calendar.position(start_date)) if start_date else \
+            (entry.positions, entry.closes)
+        if positions.size == 0:
+            return None
+        return pd.DataFrame({asset: closes.copy()}, index=self.calendar.index(positions))
+
+    def matrix(self, assets, start_date=None, end_date=None):
+        """(DatetimeIndex of calendar days, float array days x assets) with NaN where an asset has no close.
+
+        Assets are loaded one at a time, so a universe-wide matrix never needs more
+        than one history resident beyond the LRU bound.
+        """
+        first = self.calendar.position(start_date) if start_date else 0
+        last = self.calendar.position(end_date) if end_date else self.calendar.size - 1
+        days = max(last - first + 1, 0)
+
+        values = np.full((days, len(assets)), np.nan)
+        for column, asset in enumerate(assets):
+            entry = self.get(asset)
+            if entry is None or days == 0:
+                continue
+            positions, closes = entry.since(first)
+            keep = positions <= last
+            values[positions[keep] - first, column] = closes[keep]
+
+        return self.calendar.index(np.arange(first, first + days)), values
+
+    def warm(self, assets):
+        """Load assets in order until the next one would evict; returns how many are resident."""
+        for asset in assets:
+            with self._lock:
+                if self._bytes >= self.max_bytes:
+                    break
+            before = self.evictions
+            self.get(asset)
+            if self.evictions > before:
+                break
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            resident = [entry for entry in self._entries.values() if entry is not None]
+            return {
+                "version": self.version,
+                "calendar_start": str(self.calendar.start),
+                "calendar_end": str(self.calendar.end),
+                "calendar_days": self.calendar.size,
+                "max_bytes": self.max_bytes,
+                "resident_bytes": self._bytes,
+                "resident_assets": len(resident),
+                "resident_points": int(sum(entry.closes.size for entry in resident)),
+                "missing_assets": len(self._entries) - len(resident),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# --- Per-process store ---
+
+_store = None
+
+
+def activate_price_store(warm=True):
+    """Create this process's store for the current price data, warmed unless warm is False; returns it."""
+    from app.services.data_version import current_price_version
+
+    global _store
+    _store = PriceStore(
+        PriceCalendar.from_database(),
+        max_bytes=current_app.config.get("PRICE_STORE_MAX_BYTES", 64 * 1024 * 1024),
+        version=current_price_version()
+    )
+    if warm and current_app.config.get("PRICE_STORE_WARM", True):
+        _store.warm(stored_asset_codes())
+    return _store
+
+
+def active_price_store():
+    """This process's store, or None when prices are read from the database per call.
+
+    A store built for an older price data version is not served; processes that
+    outlive a refresh (e.g. forked web workers) read from the database until they
+    are replaced.
+    """
+    from app.services.data_version import current_price_version
+
+    if _store is None or _store.version != current_price_version():
+        return None
+    return _store
+
+
+def deactivate_price_store():
+    global _store
+    _store = None
+
+
+def price_store_stats():
+    """Stats of this process's store plus its peak memory, ready to be sent as JSON."""
+    stats = {"active": _store is not None}
+    if _store is not None:
+        stats.update(_store.stats())
+    try:
+        import resource
+        # ru_maxrss is in KiB on Linux
+        stats["process_max_rss_bytes"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except ImportError:
+        pass
+    return stats
@@ -0,0 +1,78 @@
+import math
+import time
+import threading
+
+from flask import current_app, jsonify
+
+# In-process token buckets. Each key (usually a user id) gets a bucket that holds
+# up to `burst` tokens and refills at `rate` tokens per second; a request spends
+# one token or is refused with the time until the next token is available.
+# Limits are per web process, which is enough to absorb keystroke bursts.
+
+MAX_BUCKETS = 10000  # Full (idle) buckets are dropped beyond this many keys
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, cost=1.0, now=None):
+        """Spend cost tokens; returns 0 on success or the seconds to wait before retrying."""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def is_full(self, now):
+        self._refill(now)
+        return self.tokens >= self.burst
+
+
+class RateLimiter:
+    """A token bucket per key, created on first use."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key, cost=1.0):
+        with self._lock:
+            now = time.monotonic()
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= MAX_BUCKETS:
+                    self._evict_idle(now)
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst)
+            return bucket.acquire(cost, now)
+
+    def _evict_idle(self, now):
+        for key in [k for k, bucket in self._buckets.items() if bucket.is_full(now)]:
+            del self._buckets[key]
+
+
+def get_limiter(name, rate, burst):
+    """The app's limiter called name, created with rate/burst on first use."""
+    limiters = current_app.extensions.setdefault("rate_limiters", {})
+    limiter = limiters.get(name)
+    if limiter is None:
+        limiter = limiters.setdefault(name, RateLimiter(rate, burst))
+    return limiter
+
+
+def rate_limited_response(retry_after):
+    """The 429 response for a refused request."""
+    response = jsonify({"error": "Too many requests, please slow down"})
+    response.status_code = 429
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
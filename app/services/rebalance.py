@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# Portfolio values with periodic or drift-triggered rebalancing.
+# Between two rebalances the holdings are fixed, so the value compounds like a
+# buy-and-hold portfolio started at the last rebalance:
+#     value[t] = value[r] * sum_i(weight_i * close_i[t] / close_i[r])
+# where r is the last rebalance at or before t and the weights sum to 1. The
+# value at each rebalance is the cumulative product of the segment growths, so
+# the whole series is a handful of numpy operations over the closes instead of a
+# per-day loop. Rebalances happen at the close: "monthly" resets the holdings on
+# the last trading day of every month, "threshold" on the first day any asset's
+# weight is more than the threshold away from its target.
+#
+# A rebalance setting travels through run_analytics() and job parameters as a
+# single string: None (buy and hold), "monthly", "quarterly", "annual" or
+# "threshold:<fraction>", as returned by parse_rebalance().
+
+REBALANCE_MODES = ("none", "monthly", "quarterly", "annual", "threshold")
+DEFAULT_THRESHOLD = 0.05
+
+# Threshold mode scans ahead of each rebalance in blocks that start this long and
+# double until a breach is found, so each scan costs about as much as its segment.
+SCAN_BLOCK = 64
+
+
+def parse_rebalance(mode, threshold=None):
+    """The rebalance setting for a request's mode and threshold; None means buy and hold."""
+    if mode is None:
+        return None
+    mode = str(mode).strip().lower()
+    if mode.startswith("threshold:") and threshold is None:
+        mode, threshold = "threshold", mode.split(":", 1)[1]
+    if mode not in REBALANCE_MODES:
+        raise ValueError(f"rebalance must be one of {', '.join(REBALANCE_MODES)}")
+    if mode == "none":
+        return None
+    if mode != "threshold":
+        return mode
+
+    threshold = DEFAULT_THRESHOLD if threshold is None else float(threshold)
+    if not 0 < threshold < 1:
+        raise ValueError("rebalance_threshold must be between 0 and 1")
+    return f"threshold:{threshold:g}"
+
+
+def check_rebalance_weights(allocation):
+    """Raise ValueError unless allocation's weights add up to more than 0, as rebalancing needs."""
+    if sum(float(w) for w in allocation.values()) <= 0:
+        raise ValueError("Rebalanced weights must add up to more than 0")
+
+
+def period_rebalances(index, mode):
+    """Row positions of the rebalances for a periodic mode: the first row, then each period's last row."""
+    years = index.year.to_numpy()
+    months = index.month.to_numpy()
+    if mode == "monthly":
+        period = years * 12 + months
+    elif mode == "quarterly":
+        period = years * 4 + (months - 1) // 3
+    elif mode == "annual":
+        period = years
+    else:
+        raise ValueError(f"Unknown rebalance period: {mode}")
+
+    # The last row of a period is followed by a row of the next one
+    last_rows = np.flatnonzero(period[1:] != period[:-1])
+    return np.union1d([0], last_rows)
+
+
+def threshold_rebalances(closes, weights, threshold):
+    """Row positions of the rebalances triggered by any weight drifting more than threshold from target."""
+    rows = len(closes)
+    points = [0]
+    anchor = 0
+    start = 1
+    width = SCAN_BLOCK
+    while start < rows:
+        stop = min(rows, start + width)
+        holdings = closes[start:stop] / closes[anchor] * weights
+        drift = np.abs(holdings / holdings.sum(axis=1, keepdims=True) - weights).max(axis=1)
+        breaches = np.flatnonzero(drift > threshold)
+        if breaches.size:
+            anchor = start + int(breaches[0])
+            points.append(anchor)
+            start, width = anchor + 1, SCAN_BLOCK
+        else:
+            start, width = stop, width * 2
+    return np.array(points)
+
+
+def compound_segments(closes, weights, points):
+    """Value per row of 1.0 invested at row 0 and reset to weights at each row in points."""
+    growth = (closes[points[1:]] / closes[points[:-1]]) @ weights
+    values_at = np.concatenate([[1.0], np.cumprod(growth)])
+    segment = np.searchsorted(points, np.arange(len(closes)), side="right") - 1
+    return values_at[segment] * ((closes / closes[points[segment]]) @ weights)
+
+
+def rebalanced_value(combined: pd.DataFrame, allocation: dict[str, float], initial_amount: float, rebalance: str) -> pd.Series:
+    """Portfolio value over combined's dates with allocation rebalanced per the rebalance setting."""
+    assets = list(allocation)
+    closes = combined[assets].to_numpy(dtype=float)
+    check_rebalance_weights(allocation)
+    raw = np.array([float(allocation[a]) for a in assets])
+    # Targets are fractions of the portfolio; weights that do not sum to 1 scale
+    # the amount invested, as they do for buy and hold
+    invested = initial_amount * raw.sum()
+    weights = raw / raw.sum()
+
+    if rebalance.startswith("threshold:"):
+        points = threshold_rebalances(closes, weights, float(rebalance.split(":", 1)[1]))
+    else:
+        points = period_rebalances(combined.index, rebalance)
+
+    return pd.Series(invested * compound_segments(closes, weights, points), index=combined.index)
@@ -0,0 +1,107 @@
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from app import db
+from app.models.portfolio import PortfolioSummary, PortfolioShareLog, PortfolioVersion
+from app.models.user import User
+
+# Sharing a portfolio creates, for every recipient, a read-only copy of the
+# summary, a share log row and the copy's first version. This is done with one
+# recipient query and three set-based INSERTs; the caller commits once.
+
+
+def _parse_user_ids(user_ids):
+    ids = set()
+    if not isinstance(user_ids, (list, tuple, set)):
+        return ids
+    for user_id in user_ids:
+        try:
+            ids.add(int(user_id))
+        except (TypeError, ValueError):
+            continue
+    return ids
+
+
+def share_portfolio_with_users(portfolio, sharer, user_ids):
+    """Copy portfolio to every existing user in user_ids; returns the recipients' usernames."""
+    ids = _parse_user_ids(user_ids)
+    if not ids:
+        return []
+
+    # Validate all recipients with a single query
+    recipients = User.query.filter(User.id.in_(ids)).all()
+    if not recipients:
+        return []
+
+    now = datetime.utcnow()
+    shared_name = f"{portfolio.portfolio_name} (Shared by {sharer.username})"
+
+    summaries = [
+        {
+            "portfolio_name": shared_name,
+            "user_id": recipient.id,
+            "creator_id": sharer.id,
+            "shared_from_id": sharer.id,
+            "user_username": recipient.username,
+            "user_email": recipient.user_email,
+            "creator_username": sharer.username,
+            "creator_email": sharer.user_email,
+            "allocation_json": portfolio.allocation_json,
+            "start_date": portfolio.start_date,
+            "initial_amount": portfolio.initial_amount,
+            "current_value": portfolio.current_value,
+            "profit": portfolio.profit,
+            "return_percent": portfolio.return_percent,
+            "cagr": portfolio.cagr,
+            "volatility": portfolio.volatility,
+            "max_drawdown": portfolio.max_drawdown,
+            "created_at": now,
+            "input_updated_at": now,
+            "metric_updated_at": now,
+            "is_editable": False,  # Shared portfolios are read-only
+            "is_shareable": False,  # Shared portfolios cannot be shared further
+            "is_deletable": False,  # Shared portfolios cannot be deleted
+            "is_shown": True,
+            "latest_version_number": 1,
+        }
+        for recipient in recipients
+    ]
+
+    # Each recipient gets exactly one copy, so the returned user_id identifies it.
+    # (Asking for RETURNING in parameter order would make SQLAlchemy insert row by row.)
+    new_ids_by_user = dict(
+        db.session.execute(
+            insert(PortfolioSummary).returning(PortfolioSummary.user_id, PortfolioSummary.portfolio_id),
+            summaries
+        ).all()
+    )
+    new_ids = [new_ids_by_user[recipient.id] for recipient in recipients]
+
+    db.session.execute(insert(PortfolioShareLog), [
+        {
+            "from_user_id": sharer.id,
+            "to_user_id": recipient.id,
+            "from_portfolio_id": portfolio.portfolio_id,
+            "to_portfolio_id": new_id,
+            "shared_at": now,
+        }
+        for recipient, new_id in zip(recipients, new_ids)
+    ])
+
+    db.session.execute(insert(PortfolioVersion), [
+        {
+            "portfolio_id": new_id,
+            "version_number": 1,
+            "is_snapshot": True,
+            "updated_by": sharer.id,
+            "updated_at": now,
+            "allocation_json": portfolio.allocation_json,
+            "portfolio_name": shared_name,
+            "start_date": portfolio.start_date,
+            "initial_amount": portfolio.initial_amount,
+        }
+        for new_id in new_ids
+    ])
+
+    return [recipient.username for recipient in recipients]
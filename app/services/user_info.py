@@ -0,0 +1,76 @@
+from sqlalchemy import func, or_, update
+
+from app import db
+from app.models.portfolio import PortfolioSummary
+from app.models.user import User
+
+# PortfolioSummary keeps denormalized copies of the owner's, creator's and
+# sharer's username and email. These helpers refresh them with set-based
+# UPDATE ... FROM statements (one per role) instead of per-portfolio lookups.
+
+# (id column, username column, email column) for each user a portfolio refers to
+USER_ROLES = (
+    (PortfolioSummary.user_id, PortfolioSummary.user_username, PortfolioSummary.user_email),
+    (PortfolioSummary.creator_id, PortfolioSummary.creator_username, PortfolioSummary.creator_email),
+    (PortfolioSummary.shared_from_id, PortfolioSummary.shared_from_username, PortfolioSummary.shared_from_email),
+)
+
+
+def _run_updates(*criteria):
+    """Copy username/email into every role's columns for the matching rows; returns rows changed."""
+    changed = 0
+    for id_column, username_column, email_column in USER_ROLES:
+        statement = (
+            update(PortfolioSummary)
+            .where(
+                id_column == User.id,
+                # Only rewrite rows whose copy is out of date
+                or_(username_column.is_distinct_from(User.username),
+                    email_column.is_distinct_from(User.user_email)),
+                *criteria
+            )
+            .values({username_column: User.username, email_column: User.user_email})
+            .execution_options(synchronize_session=False)
+        )
+        changed += db.session.execute(statement).rowcount
+    return changed
+
+
+def refresh_user_info_for(user_ids):
+    """Refresh the portfolios that refer to the given users. The caller commits."""
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    return _run_updates(User.id.in_(user_ids))
+
+
+def refresh_all_user_info(chunk_size=5000, progress=None):
+    """Refresh every portfolio, committing per chunk of portfolio ids.
+
+    progress, if given, is called with (portfolios_done, portfolios_total) after each chunk.
+    """
+    low, high, total = db.session.query(
+        func.min(PortfolioSummary.portfolio_id),
+        func.max(PortfolioSummary.portfolio_id),
+        func.count()
+    ).one()
+    if not total:
+        return 0
+
+    # Portfolios per chunk, counted in one pass so progress costs no query per chunk
+    chunk_sizes = {}
+    if progress:
+        chunk = (PortfolioSummary.portfolio_id - low) // chunk_size
+        chunk_sizes = dict(db.session.query(chunk, func.count()).group_by(chunk).all())
+
+    changed = 0
+    done = 0
+    for number, start in enumerate(range(low, high + 1, chunk_size)):
+        end = start + chunk_size
+        changed += _run_updates(PortfolioSummary.portfolio_id >= start, PortfolioSummary.portfolio_id < end)
+        db.session.commit()  # Keep write transactions short
+
+        if progress:
+            done += chunk_sizes.get(number, 0)
+            progress(done, total)
+    return changed
@@ -0,0 +1,65 @@
+from sqlalchemy import select
+
+from app import db
+from app.models.user import User, normalize_search_text
+
+# Type-ahead user search for the share dialog. Every searchable field has a
+# lower-cased copy with its own index, so a prefix match is an index range scan
+# (col >= 'abc' AND col < 'abc' + U+10FFFF) that stops after `limit` rows. The
+# work per keystroke is a few bounded seeks no matter how large the directory is.
+
+MAX_QUERY_LENGTH = 100
+MAX_RESULTS = 20
+
+_PREFIX_END = "\U0010ffff"  # Sorts after every character that can follow the prefix
+
+# Searched in rank order: username matches are listed before name and email matches
+SEARCH_COLUMNS = (
+    User.username_norm,
+    User.first_name_norm,
+    User.last_name_norm,
+    User.email_norm,
+)
+
+
+def _prefix_query(column, prefix, exclude_user_id, limit):
+    return select(User.id, User.username, User.user_fName, User.user_lName).where(
+        column >= prefix,
+        column < prefix + _PREFIX_END,
+        User.id != exclude_user_id
+    ).order_by(column, User.id).limit(limit)
+
+
+def search_users(query, exclude_user_id=None, limit=10):
+    """Top `limit` users whose username, first/last name or email starts with query.
+
+    "jane sm" additionally matches first name "jane" with a last name starting "sm".
+    """
+    prefix = normalize_search_text((query or "")[:MAX_QUERY_LENGTH])
+    if not prefix:
+        return []
+    limit = max(1, min(limit, MAX_RESULTS))
+
+    statements = [_prefix_query(column, prefix, exclude_user_id, limit) for column in SEARCH_COLUMNS]
+
+    first, _, last = prefix.partition(" ")
+    if last.strip():
+        statements.insert(1, select(User.id, User.username, User.user_fName, User.user_lName).where(
+            User.first_name_norm == first,
+            User.last_name_norm >= last.strip(),
+            User.last_name_norm < last.strip() + _PREFIX_END,
+            User.id != exclude_user_id
+        ).order_by(User.last_name_norm, User.id).limit(limit))
+
+    results = {}
+    for statement in statements:
+        for row in db.session.execute(statement):
+            results.setdefault(row.id, {
+                "id": row.id,
+                "username": row.username,
+                "first_name": row.user_fName,
+                "last_name": row.user_lName,
+            })
+            if len(results) >= limit:
+                return list(results.values())
+    return list(results.values())
@@ -0,0 +1,170 @@
+import json
+from datetime import datetime, date
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from app import db
+from app.models.portfolio import PortfolioVersion
+from app.services.calculation import calculate_portfolio_metrics
+from app.services.data_version import current_price_version
+from app.services.executor import run_analytics
+
+# Portfolio version history. Every PORTFOLIO_VERSION_SNAPSHOT_INTERVAL-th version
+# (1, 1 + K, 1 + 2K, ...) is a full snapshot; the versions in between only store
+# what changed since the previous one. Rebuilding any version therefore reads
+# one snapshot plus at most K - 1 deltas, located through the
+# (portfolio_id, version_number) index.
+#
+# A version's state is a dict:
+#   {"allocation": {code: weight}, "portfolio_name": str, "start_date": "YYYY-MM-DD", "initial_amount": float}
+# and a delta holds "set" (changed weights), "remove" (dropped codes) and any
+# changed scalar fields.
+
+SCALAR_FIELDS = ("portfolio_name", "start_date", "initial_amount")
+
+
+def _date_str(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def state_from_portfolio(portfolio) -> dict:
+    return {
+        "allocation": json.loads(portfolio.allocation_json or "{}"),
+        "portfolio_name": portfolio.portfolio_name,
+        "start_date": _date_str(portfolio.start_date),
+        "initial_amount": portfolio.initial_amount,
+    }
+
+
+def _state_from_snapshot(row) -> dict:
+    return {
+        "allocation": json.loads(row.allocation_json or "{}"),
+        "portfolio_name": row.portfolio_name,
+        "start_date": _date_str(row.start_date),
+        "initial_amount": row.initial_amount,
+    }
+
+
+def diff_states(old: dict, new: dict) -> dict:
+    delta = {}
+    changed = {code: weight for code, weight in new["allocation"].items() if old["allocation"].get(code) != weight}
+    removed = [code for code in old["allocation"] if code not in new["allocation"]]
+    if changed:
+        delta["set"] = changed
+    if removed:
+        delta["remove"] = removed
+    for field in SCALAR_FIELDS:
+        if old[field] != new[field]:
+            delta[field] = new[field]
+    return delta
+
+
+def apply_delta(state: dict, delta: dict) -> dict:
+    allocation = dict(state["allocation"])
+    for code in delta.get("remove", []):
+        allocation.pop(code, None)
+    allocation.update(delta.get("set", {}))
+
+    new_state = dict(state, allocation=allocation)
+    for field in SCALAR_FIELDS:
+        if field in delta:
+            new_state[field] = delta[field]
+    return new_state
+
+
+def _version_rows(portfolio_id, version_number):
+    """The nearest snapshot at or before version_number and the deltas after it."""
+    snapshot_number = select(func.max(PortfolioVersion.version_number)).where(
+        PortfolioVersion.portfolio_id == portfolio_id,
+        PortfolioVersion.is_snapshot == True,
+        PortfolioVersion.version_number <= version_number
+    ).scalar_subquery()
+
+    return PortfolioVersion.query.filter(
+        PortfolioVersion.portfolio_id == portfolio_id,
+        PortfolioVersion.version_number <= version_number,
+        PortfolioVersion.version_number >= snapshot_number
+    ).order_by(PortfolioVersion.version_number).all()
+
+
+def reconstruct_version(portfolio_id, version_number):
+    """Return (row, state) for the version, or (None, None) if it does not exist."""
+    rows = _version_rows(portfolio_id, version_number)
+    if not rows or not rows[0].is_snapshot or rows[-1].version_number != version_number:
+        return None, None
+
+    state = _state_from_snapshot(rows[0])
+    for row in rows[1:]:
+        state = apply_delta(state, json.loads(row.delta_json or "{}"))
+    return rows[-1], state
+
+
+def latest_version_number(portfolio):
+    if portfolio.latest_version_number is not None:
+        return portfolio.latest_version_number
+    # Portfolios created before the column existed
+    return db.session.query(func.max(PortfolioVersion.version_number))\
+        .filter_by(portfolio_id=portfolio.portfolio_id).scalar() or 0
+
+
+def record_version(portfolio, updated_by, updated_at=None):
+    """Add a version holding the portfolio's current state. The caller commits."""
+    interval = current_app.config.get("PORTFOLIO_VERSION_SNAPSHOT_INTERVAL", 20)
+    previous_number = latest_version_number(portfolio)
+    number = previous_number + 1
+    state = state_from_portfolio(portfolio)
+
+    previous_state = None
+    if previous_number and (number - 1) % interval != 0:
+        _, previous_state = reconstruct_version(portfolio.portfolio_id, previous_number)
+
+    version = PortfolioVersion(
+        portfolio_id=portfolio.portfolio_id,
+        version_number=number,
+        updated_by=updated_by,
+        updated_at=updated_at or datetime.utcnow()
+    )
+    if previous_state is None:
+        version.is_snapshot = True
+        version.allocation_json = json.dumps(state["allocation"])
+        version.portfolio_name = portfolio.portfolio_name
+        version.start_date = portfolio.start_date
+        version.initial_amount = portfolio.initial_amount
+    else:
+        version.is_snapshot = False
+        version.delta_json = json.dumps(diff_states(previous_state, state))
+
+    db.session.add(version)
+    portfolio.latest_version_number = number
+    return version
+
+
+def serialize_version(row, state=None) -> dict:
+    data = {
+        "version_number": row.version_number,
+        "updated_by": row.updated_by,
+        "updated_at": row.updated_at.isoformat() if row.updated_at else None,
+        "is_snapshot": row.is_snapshot,
+    }
+    if state is not None:
+        data.update(state)
+    return data
+
+
+def version_metrics(row, state) -> dict:
+    """Metrics for a historical version, cached on the row per price data version."""
+    data_version = current_price_version()
+    if row.metrics_json is not None and row.metrics_data_version == data_version:
+        return json.loads(row.metrics_json)
+
+    metrics = run_analytics(
+        calculate_portfolio_metrics,
+        state["allocation"],
+        state["start_date"],
+        state["initial_amount"]
+    )
+    row.metrics_json = json.dumps(metrics, default=str)
+    row.metrics_data_version = data_version
+    db.session.commit()
+    return metrics
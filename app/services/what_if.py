@@ -0,0 +1,110 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from flask import current_app
+
+from app.services.data_version import current_price_version
+
+# Live metrics for the allocation sliders on the portfolio form.
+# A buy-and-hold portfolio's value is linear in its weights once each asset's
+# price path is normalized to its close on the start date:
+#     value[t] = initial_amount * sum_i(weight_i * close_i[t] / close_i[start])
+# so the normalized paths for an asset set and start date are built once (one
+# load and join, cached per price data version) and every new weight vector is a
+# single matrix-vector product plus one fused numpy pass for the metrics. The
+# metrics match calculate_portfolio_metrics, which computes them with quantstats.
+
+TRADING_DAYS = 252
+
+
+class NormalizedPaths:
+    """Closes of an asset set on their common dates, each divided by its first close."""
+
+    __slots__ = ("assets", "paths", "calculated_at", "years")
+
+    def __init__(self, combined):
+        self.assets = list(combined.columns)
+        values = combined.to_numpy(dtype=float)
+        self.paths = np.ascontiguousarray(values / values[0])
+        self.calculated_at = combined.index[-1].strftime("%Y-%m-%d")
+        # quantstats measures CAGR years between the first and last *return* dates
+        self.years = (combined.index[-1] - combined.index[min(1, len(combined) - 1)]).days / TRADING_DAYS
+
+    def evaluate(self, weights, initial_amount):
+        """Summary metrics for weights (aligned with self.assets)."""
+        value = self.paths @ weights
+        current_value = float(initial_amount * value[-1])
+        result = {
+            "calculated_at": self.calculated_at,
+            "current_value": current_value,
+            "profit": current_value - initial_amount,
+            "return_percent": (current_value - initial_amount) / initial_amount,
+        }
+
+        if value.size < 3:
+            result.update(cagr=None, volatility=None, max_drawdown=None)
+            return result
+
+        returns = value[1:] / value[:-1] - 1
+        growth = value[-1] / value[0]
+        # quantstats rebuilds prices from the returns, so the start day is not a peak
+        held = value[1:]
+        result.update(
+            cagr=float(abs(growth) ** (1.0 / self.years) - 1) if self.years > 0 else None,
+            volatility=float(returns.std(ddof=1) * np.sqrt(TRADING_DAYS)),
+            max_drawdown=float((held / np.maximum.accumulate(held)).min() - 1),
+        )
+        return result
+
+
+class PathCache:
+    """NormalizedPaths per (assets, start date) for one price data version, least recently used evicted."""
+
+    def __init__(self, version, max_entries):
+        self.version = version
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, assets, start_date):
+        from app.services.calculation import _load_price_frame
+
+        key = (assets, start_date)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+
+        combined = _load_price_frame(dict.fromkeys(assets, 0.0), start_date)
+        paths = NormalizedPaths(combined) if combined is not None else None
+        with self._lock:
+            self._entries[key] = paths
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return paths
+
+
+def _path_cache():
+    version = current_price_version()
+    cache = current_app.extensions.get("what_if_paths")
+    if cache is None or cache.version != version:
+        cache = PathCache(version, current_app.config.get("WHAT_IF_CACHE_SIZE", 64))
+        current_app.extensions["what_if_paths"] = cache
+    return cache
+
+
+def what_if_metrics(allocation: dict[str, float], start_date: str, initial_amount: float) -> dict:
+    """Summary metrics for allocation, from cached normalized paths; {} when there are no prices."""
+    initial_amount = float(initial_amount)
+    if not initial_amount > 0:
+        raise ValueError("initial_investment must be greater than 0")
+    start_date = pd.Timestamp(start_date).strftime("%Y-%m-%d")
+    assets = tuple(sorted(allocation))
+    paths = _path_cache().get(assets, start_date)
+    if paths is None or len(paths.assets) != len(assets):
+        return {}  # Some asset has no prices from start_date
+
+    weights = np.array([float(allocation[a]) for a in paths.assets])
+    return paths.evaluate(weights, initial_amount)
@@ -3,17 +3,38 @@ import { renderHeatmapChart } from "./charts/heatmapChart.js";
 import { renderPortfolioSummary } from "./charts/summary.js";
 import { renderTopMoversChart } from "./charts/topMoversChart.js";
 import { renderUnderwaterChart } from "./charts/underwaterChart.js";
+import { watchPriceVersion } from "./priceVersion.js";
+
+const CHART_CANVAS_IDS = [
+  "cumulativeChart",
+  "heatmapChart",
+  "topMoversChart",
+  "underwaterChart",
+];
 
 document.addEventListener("DOMContentLoaded", () => {
   const weights = window.dashboardData?.weights || { MSFT: 0.6, TSLA: 0.4 };
   const start_date = window.dashboardData?.start_date || "2015-01-01";
   const initial_investment = window.dashboardData?.initial_investment || 10000;
 
-  renderCumulativeChart(weights, start_date, initial_investment);
-  renderHeatmapChart(weights, start_date, initial_investment);
-  renderPortfolioSummary(weights, start_date, initial_investment);
-  renderTopMoversChart(weights);
-  renderUnderwaterChart(weights, start_date, initial_investment);
+  const renderCharts = () => {
+    renderCumulativeChart(weights, start_date, initial_investment);
+    renderHeatmapChart(weights, start_date, initial_investment);
+    renderPortfolioSummary(weights, start_date, initial_investment);
+    renderTopMoversChart(weights);
+    renderUnderwaterChart(weights, start_date, initial_investment);
+  };
+
+  renderCharts();
+
+  // Refetch the charts only when new price data has actually been loaded
+  watchPriceVersion(window.dashboardData?.data_version, () => {
+    CHART_CANVAS_IDS.forEach((id) => {
+      const canvas = document.getElementById(id);
+      if (canvas) Chart.getChart(canvas)?.destroy();
+    });
+    renderCharts();
+  }, { stream: Boolean(window.dashboardData?.price_stream) });
 
   // Inject portfolio overview values
   const data = window.dashboardData || {};
@@ -386,6 +386,8 @@ document.addEventListener('DOMContentLoaded', function() {
                     createButton.disabled = true;
                 }
             }
+
+            scheduleWhatIfPreview();
         }
         
         /**
@@ -502,6 +504,65 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         }
         
+        /**
+         * Live metrics for the current allocation (see /api/what-if)
+         */
+        const whatIfPreview = document.getElementById('what-if-preview');
+        let whatIfTimer = null;
+        let whatIfController = null;
+
+        function scheduleWhatIfPreview() {
+            if (!whatIfPreview) return;
+            clearTimeout(whatIfTimer);
+            whatIfTimer = setTimeout(updateWhatIfPreview, 120);
+        }
+
+        function updateWhatIfPreview() {
+            const weights = {};
+            Object.entries(allocations).forEach(([code, percent]) => {
+                if (percent > 0) weights[code] = percent / 100;
+            });
+
+            if (whatIfController) whatIfController.abort();
+            if (Object.keys(weights).length === 0) {
+                whatIfPreview.classList.add('d-none');
+                return;
+            }
+
+            const startDateInput = document.getElementById('start_date');
+            const initialAmountInput = document.getElementById('initial_amount');
+            whatIfController = new AbortController();
+            fetch('/api/what-if', {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify({
+                    weights: weights,
+                    start_date: startDateInput ? startDateInput.value : '2015-01-01',
+                    initial_investment: initialAmountInput ? parseFloat(initialAmountInput.value) : 1000
+                }),
+                signal: whatIfController.signal
+            })
+                .then(response => response.ok ? response.json() : null)
+                .then(data => {
+                    if (!data) {
+                        whatIfPreview.classList.add('d-none');
+                        return;
+                    }
+                    whatIfPreview.querySelectorAll('[data-metric]').forEach(el => {
+                        const value = data[el.dataset.metric];
+                        el.textContent = value === null || value === undefined ? '–' : `${(value * 100).toFixed(2)}%`;
+                        el.classList.toggle('positive', value > 0);
+                        el.classList.toggle('negative', value < 0);
+                    });
+                    whatIfPreview.classList.remove('d-none');
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        console.error('Error updating the allocation preview:', error);
+                    }
+                });
+        }
+
         /**
          * Form validation
          */
@@ -576,190 +637,34 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         }
         
-        // Setup sort functionality for table columns
+        // Setup sort functionality for table columns.
+        // The list is paginated on the server, so a header click reloads the first
+        // page in the new order: none -> desc -> asc -> none (default, creation time)
         const sortableHeaders = document.querySelectorAll('.sortable');
-        let currentSortColumn = null;
-        let currentSortDirection = 'none';
-        
-        if (sortableHeaders.length > 0) {
-            console.log('Found sortable headers, initializing sort functionality');
-            
-            sortableHeaders.forEach(header => {
-                // Initialize sort icons
-                const iconImg = header.querySelector('.sort-icon');
-                if (iconImg) {
-                    iconImg.src = "/static/icons/sort-neutral.svg";
-                }
-                
-                header.addEventListener('click', function() {
-                    const sortKey = this.dataset.sort;
-                    console.log('Sort by:', sortKey);
-                    
-                    // Check if we're clicking the same column
-                    if (currentSortColumn === sortKey) {
-                        // Cycle through sort directions:
-                        // none -> desc -> asc -> none (default/creation time)
-                        if (currentSortDirection === 'none') {
-                            currentSortDirection = 'desc'; // First click: largest first (descending)
-                            const icon = this.querySelector('.sort-icon');
-                            if (icon) icon.src = "/static/icons/sort-desc.svg";
-                        } else if (currentSortDirection === 'desc') {
-                            currentSortDirection = 'asc'; // Second click: smallest first (ascending)
-                            const icon = this.querySelector('.sort-icon');
-                            if (icon) icon.src = "/static/icons/sort-asc.svg";
-                        } else {
-                            // Third click: back to default sort
-                            currentSortDirection = 'none';
-                            currentSortColumn = null;
-                            const icon = this.querySelector('.sort-icon');
-                            if (icon) icon.src = "/static/icons/sort-neutral.svg";
-                        }
-                    } else {
-                        // Reset all other headers
-                        sortableHeaders.forEach(h => {
-                            h.setAttribute('data-direction', 'none');
-                            const icon = h.querySelector('.sort-icon');
-                            if (icon) icon.src = "/static/icons/sort-neutral.svg";
-                        });
-                        
-                        // New column, start with desc (largest first)
-                        currentSortDirection = 'desc';
-                        currentSortColumn = sortKey;
-                        const icon = this.querySelector('.sort-icon');
-                        if (icon) icon.src = "/static/icons/sort-desc.svg";
-                    }
-                    
-                    // Set data attribute for visual indication
-                    this.setAttribute('data-direction', currentSortDirection);
-                    
-                    // Sort the table based on current state
-                    if (currentSortColumn === null || currentSortDirection === 'none') {
-                        // Reset to default sort (by creation time, newest first)
-                        sortByCreationTime();
-                    } else {
-                        // Sort by selected column and direction
-                        sortPortfolioTable(currentSortColumn, currentSortDirection);
-                    }
-                });
-            });
-            
-            // Initial sort by creation time
-            sortByCreationTime();
-        }
-        
-        /**
-         * Sort portfolios by creation time (newest first)
-         * This is the default sort order
-         */
-        function sortByCreationTime() {
-            const table = document.querySelector('.portfolios-table');
-            if (!table) {
-                console.error('Portfolio table not found');
-                return;
-            }
-            
-            const tbody = table.querySelector('tbody');
-            if (!tbody) {
-                console.error('Table body not found');
-                return;
-            }
-            
-            // Get all rows except the "no data" row
-            const rows = Array.from(tbody.querySelectorAll('tr:not(#noDataRow)'));
-            
-            // Sort rows by creation timestamp (newest first)
-            // Using data attribute for creation time
-            rows.sort((a, b) => {
-                // Try to get timestamp from data attribute
-                const timeA = parseInt(a.dataset.createdAt || '0');
-                const timeB = parseInt(b.dataset.createdAt || '0');
-                
-                // Descending order (newest first)
-                return timeB - timeA;
-            });
-            
-            // Re-append rows in the sorted order
-            rows.forEach(row => {
-                tbody.appendChild(row);
-            });
-            
-            console.log('Sorted table by creation time (newest first)');
-        }
         
-        /**
-         * Sort the portfolio table based on column and direction
-         * @param {string} column - The column identifier to sort by
-         * @param {string} direction - The sort direction ('asc' or 'desc')
-         */
-        function sortPortfolioTable(column, direction) {
-            const table = document.querySelector('.portfolios-table');
-            if (!table) {
-                console.error('Portfolio table not found');
-                return;
-            }
-            
-            const tbody = table.querySelector('tbody');
-            if (!tbody) {
-                console.error('Table body not found');
-                return;
-            }
-            
-            // Get all rows except the "no data" row
-            const rows = Array.from(tbody.querySelectorAll('tr:not(#noDataRow)'));
-            
-            // Sort the rows
-            rows.sort((a, b) => {
-                let valueA, valueB;
-                
-                // Extract values based on the column being sorted
-                switch(column) {
-                    case 'current-value':
-                        valueA = parseFloat(a.querySelector('.current-value').textContent.replace(/[^0-9.-]+/g, ''));
-                        valueB = parseFloat(b.querySelector('.current-value').textContent.replace(/[^0-9.-]+/g, ''));
-                        break;
-                    case 'return-percent':
-                        valueA = parseFloat(a.querySelector('.return-positive').textContent.replace(/[^0-9.-]+/g, ''));
-                        valueB = parseFloat(b.querySelector('.return-positive').textContent.replace(/[^0-9.-]+/g, ''));
-                        break;
-                    case 'cagr':
-                        // For CAGR, we need to target the second .return-positive cell in the row
-                        const cagrCellsA = a.querySelectorAll('.return-positive');
-                        const cagrCellsB = b.querySelectorAll('.return-positive');
-                        valueA = parseFloat(cagrCellsA[1]?.textContent.replace(/[^0-9.-]+/g, '') || '0');
-                        valueB = parseFloat(cagrCellsB[1]?.textContent.replace(/[^0-9.-]+/g, '') || '0');
-                        break;
-                    case 'volatility':
-                        valueA = parseFloat(a.querySelector('.metric-value').textContent.replace(/[^0-9.-]+/g, ''));
-                        valueB = parseFloat(b.querySelector('.metric-value').textContent.replace(/[^0-9.-]+/g, ''));
-                        break;
-                    case 'max-drawdown':
-                        valueA = parseFloat(a.querySelector('.return-negative').textContent.replace(/[^0-9.-]+/g, ''));
-                        valueB = parseFloat(b.querySelector('.return-negative').textContent.replace(/[^0-9.-]+/g, ''));
-                        break;
-                    default:
-                        console.warn('Unsupported sort column:', column);
-                        return 0;
-                }
+        sortableHeaders.forEach(header => {
+            header.addEventListener('click', function() {
+                const sortKey = this.dataset.sort;
+                const direction = this.dataset.direction || 'none';
+                const params = new URLSearchParams(window.location.search);
+                params.delete('cursor');
                 
-                // Handle NaN values
-                if (isNaN(valueA)) valueA = 0;
-                if (isNaN(valueB)) valueB = 0;
-                
-                // Sort based on direction
-                if (direction === 'asc') {
-                    return valueA - valueB; // Ascending: smallest first
+                if (direction === 'none') {
+                    params.set('sort', sortKey);
+                    params.set('order', 'desc'); // First click: largest first (descending)
+                } else if (direction === 'desc') {
+                    params.set('sort', sortKey);
+                    params.set('order', 'asc'); // Second click: smallest first (ascending)
                 } else {
-                    return valueB - valueA; // Descending: largest first
+                    // Third click: back to default sort
+                    params.delete('sort');
+                    params.delete('order');
                 }
+                
+                const query = params.toString();
+                window.location.href = window.location.pathname + (query ? `?${query}` : '');
             });
-            
-            // Re-append rows in the sorted order
-            rows.forEach(row => {
-                tbody.appendChild(row);
-            });
-            
-            console.log(`Sorted table by ${column} in ${direction} order`);
-        }
+        });
         
         // Portfolio filtering functionality
         const filterRadios = document.querySelectorAll('input[name="portfolioFilter"]');
@@ -1320,7 +1225,11 @@ document.addEventListener('DOMContentLoaded', function() {
         const userSearchResults = document.getElementById('userSearchResults');
         const sharePortfolioBtn = document.getElementById('sharePortfolioBtn');
         let selectedUserId = null; // State to store the selected user ID
-        let allUsers = []; // Cache for all users
+        let allUsers = []; // Users loaded so far, one page at a time
+        let nextUserCursor = null; // Cursor for the next page of users, null on the last page
+        const SEARCH_DEBOUNCE_MS = 200;
+        let searchDebounceTimer = null; // Pending type-ahead search
+        let searchController = null; // Aborts the in-flight search when the term changes
 
         // Load users when the modal is shown - use both Bootstrap 4 and 5 event syntax
         modalEl.addEventListener('shown.bs.modal', function () {
@@ -1389,6 +1298,7 @@ document.addEventListener('DOMContentLoaded', function() {
          * Reset modal state
          */
         function resetModalState() {
+            cancelUserSearch();
             if (userSearchInput) userSearchInput.value = '';
             if (userSearchResults) {
                 userSearchResults.innerHTML = '';
@@ -1398,19 +1308,23 @@ document.addEventListener('DOMContentLoaded', function() {
         }
 
         /**
-         * Load users from the server
+         * Load a page of users from the server
          * @param {boolean} showDropdown - Whether to show the dropdown after loading
+         * @param {boolean} append - Load the page after the ones already loaded
          */
-        function loadUsers(showDropdown = true) {
+        function loadUsers(showDropdown = true, append = false) {
             console.log('Loading users...');
             
             // Only show loading state if we're going to show the dropdown
-            if (showDropdown && userSearchResults) {
+            if (showDropdown && userSearchResults && !append) {
                 userSearchResults.innerHTML = '<div class="text-center p-2">Loading users...</div>';
                 userSearchResults.style.display = 'block';
             }
             
-            fetch('/portfolios/api/users')
+            const params = new URLSearchParams();
+            if (append && nextUserCursor) params.set('cursor', nextUserCursor);
+            
+            fetch(`/portfolios/api/users?${params}`)
                 .then(response => {
                     if (!response.ok) {
                         throw new Error('Failed to fetch users');
@@ -1419,7 +1333,8 @@ document.addEventListener('DOMContentLoaded', function() {
                 })
                 .then(data => {
                     console.log('Loaded users:', data);
-                    allUsers = data.users || [];
+                    allUsers = append ? allUsers.concat(data.users || []) : (data.users || []);
+                    nextUserCursor = data.next_cursor || null;
                     
                     // Check if there are no other users to share with
                     if (allUsers.length === 0) {
@@ -1432,7 +1347,7 @@ document.addEventListener('DOMContentLoaded', function() {
                     
                     // Only filter and show users if showDropdown is true
                     if (showDropdown) {
-                        filterUsers(''); // Display all users initially
+                        filterUsers(userSearchInput ? userSearchInput.value.trim().toLowerCase() : '');
                     }
                 })
                 .catch(error => {
@@ -1472,35 +1387,96 @@ document.addEventListener('DOMContentLoaded', function() {
                 return;
             }
             
-            userSearchResults.innerHTML = '';
+            // Typed terms are searched on the server, debounced per keystroke
+            if (searchTerm) {
+                scheduleUserSearch(searchTerm);
+                return;
+            }
+            cancelUserSearch();
 
-            // If we don't have users yet and we're trying to filter, load them first
+            // If we don't have users yet, load the first page of the directory
             if (allUsers.length === 0) {
+                userSearchResults.innerHTML = '';
                 loadUsers();
                 return;
             }
 
-            const filteredUsers = allUsers.filter(user =>
-                user.username.toLowerCase().includes(searchTerm)
-            );
+            renderUsers(allUsers, true);
+        }
+
+        /**
+         * Search users on the server once typing pauses, cancelling the previous request
+         * @param {string} searchTerm - The prefix to search for
+         */
+        function scheduleUserSearch(searchTerm) {
+            cancelUserSearch();
+            searchDebounceTimer = setTimeout(() => {
+                searchController = new AbortController();
+                const params = new URLSearchParams({ q: searchTerm, limit: 10 });
+
+                fetch(`/portfolios/api/users/search?${params}`, { signal: searchController.signal })
+                    .then(response => {
+                        if (response.status === 429) {
+                            // Rate limited: keep the current results and retry when allowed
+                            const retryAfter = parseInt(response.headers.get('Retry-After') || '1', 10);
+                            searchDebounceTimer = setTimeout(() => scheduleUserSearch(searchTerm), retryAfter * 1000);
+                            return null;
+                        }
+                        if (!response.ok) {
+                            throw new Error('Failed to search users');
+                        }
+                        return response.json();
+                    })
+                    .then(data => {
+                        if (data) renderUsers(data.users || [], false);
+                    })
+                    .catch(error => {
+                        if (error.name === 'AbortError') return; // Superseded by a newer keystroke
+                        console.error('Error searching users:', error);
+                        userSearchResults.innerHTML = '<div class="text-center p-2 text-danger">Failed to search users</div>';
+                    });
+            }, SEARCH_DEBOUNCE_MS);
+        }
+
+        /**
+         * Drop any pending or in-flight user search
+         */
+        function cancelUserSearch() {
+            clearTimeout(searchDebounceTimer);
+            if (searchController) {
+                searchController.abort();
+                searchController = null;
+            }
+        }
 
-            console.log(`Found ${filteredUsers.length} users matching "${searchTerm}"`);
+        /**
+         * Show users in the results dropdown
+         * @param {Array} users - Users to list
+         * @param {boolean} withLoadMore - Offer the next directory page
+         */
+        function renderUsers(users, withLoadMore) {
+            userSearchResults.innerHTML = '';
 
-            if (filteredUsers.length === 0) {
+            if (users.length === 0) {
                 userSearchResults.innerHTML = '<div class="user-item no-results">No users found</div>';
+                if (withLoadMore) appendLoadMoreUsers();
+                userSearchResults.style.display = 'block';
                 return;
             }
 
-            filteredUsers.forEach(user => {
+            users.forEach(user => {
                 const userItem = document.createElement('div');
                 userItem.className = 'user-item';
                 userItem.dataset.userId = user.id;
                 
                 // Create HTML structure with username and "Select" text (no button)
-                userItem.innerHTML = `
-                    <span class="username">${user.username}</span>
-                    <span class="select-text">Select</span>
-                `;
+                const username = document.createElement('span');
+                username.className = 'username';
+                username.textContent = user.username;
+                const selectText = document.createElement('span');
+                selectText.className = 'select-text';
+                selectText.textContent = 'Select';
+                userItem.append(username, selectText);
                 
                 // Add click event to the entire user item
                 userItem.addEventListener('click', function() {
@@ -1509,11 +1485,29 @@ document.addEventListener('DOMContentLoaded', function() {
 
                 userSearchResults.appendChild(userItem);
             });
+            if (withLoadMore) appendLoadMoreUsers();
             
             // Show the results
             userSearchResults.style.display = 'block';
         }
 
+        /**
+         * Add a "Load more users" item when the server has more pages
+         */
+        function appendLoadMoreUsers() {
+            if (!nextUserCursor) return;
+
+            const loadMoreItem = document.createElement('div');
+            loadMoreItem.className = 'user-item load-more';
+            loadMoreItem.innerHTML = '<span class="select-text">Load more users</span>';
+            loadMoreItem.addEventListener('click', function(e) {
+                e.stopPropagation();
+                loadMoreItem.innerHTML = '<span class="select-text">Loading...</span>';
+                loadUsers(true, true);
+            });
+            userSearchResults.appendChild(loadMoreItem);
+        }
+
         /**
          * Select a user for sharing
          * @param {number} userId - The ID of the selected user
@@ -0,0 +1,56 @@
+// Polling interval used when the server has no free stream for this page
+const POLL_INTERVAL_MS = 30000;
+
+// Watches /api/prices/stream and calls onChange(snapshot) once the price data
+// version moves past the one the page was rendered with: a completed refresh or
+// a newly loaded ticker. Polls /api/prices/version instead when streaming is
+// off on the server (stream: false), the server refuses the stream (503) or the
+// browser has no EventSource.
+export function watchPriceVersion(initialVersion, onChange, { stream = true } = {}) {
+  let knownVersion = Number(initialVersion) || 0;
+
+  const check = (snapshot) => {
+    // A refresh bumps the version when it completes, a newly loaded ticker right away
+    if (snapshot && snapshot.version > knownVersion) {
+      knownVersion = snapshot.version;
+      onChange(snapshot);
+    }
+  };
+
+  const poll = () => {
+    const timer = window.setInterval(() => {
+      fetch("/api/prices/version")
+        .then((response) => (response.ok ? response.json() : null))
+        .then(check)
+        .catch((err) => console.warn("Price version check failed", err));
+    }, POLL_INTERVAL_MS);
+    window.addEventListener("beforeunload", () => window.clearInterval(timer));
+  };
+
+  if (!stream || !window.EventSource) {
+    poll();
+    return null;
+  }
+
+  const source = new EventSource("/api/prices/stream");
+
+  source.addEventListener("version", (event) => {
+    let snapshot;
+    try {
+      snapshot = JSON.parse(event.data);
+    } catch (err) {
+      console.warn("Invalid price version event", err);
+      return;
+    }
+    check(snapshot);
+  });
+
+  // The server closes the stream periodically and EventSource reconnects on its
+  // own; a refused stream (503) closes it for good, so poll instead
+  source.addEventListener("error", () => {
+    if (source.readyState === EventSource.CLOSED) poll();
+  });
+
+  window.addEventListener("beforeunload", () => source.close());
+  return source;
+}
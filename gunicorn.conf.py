@@ -0,0 +1,60 @@
+# Gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:app
+# Every value can be overridden with the usual GUNICORN_CMD_ARGS / command line flags.
+import gc
+import multiprocessing
+import os
+import signal
+
+# Each gunicorn worker is a process of its own, so calculations run inline in it
+# against the warm state inherited from the master instead of in a second
+# per-worker process pool (see app/services/executor.py).
+os.environ.setdefault("ANALYTICS_WORKERS", "0")
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get("GUNICORN_THREADS", "2"))
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", "60"))
+graceful_timeout = int(os.environ.get("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = 5
+max_requests = int(os.environ.get("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = 50
+
+# Import and warm the app once in the master; workers share it copy-on-write
+preload_app = True
+
+accesslog = "-"
+errorlog = "-"
+
+
+def when_ready(server):
+    from app.services.prefork import watch_price_version
+
+    app = server.app.wsgi()
+    # Keep the cyclic GC from touching (and so copying) the warm objects in workers
+    gc.freeze()
+
+    def on_change():
+        # HUP makes the arbiter run on_reload below, then start new workers and
+        # drain the old ones; the watcher thread itself never touches warm state
+        os.kill(server.pid, signal.SIGHUP)
+
+    interval = app.config.get("PREFORK_VERSION_CHECK_INTERVAL", 5.0)
+    if interval:
+        watch_price_version(app, on_change, interval)
+
+
+def on_reload(server):
+    from app.services.prefork import warm_up
+
+    # Runs on the arbiter's main thread, before the new workers are forked
+    state = warm_up(server.app.wsgi())
+    gc.freeze()
+    server.log.info(f"Price data version {state['version']} warmed up, replacing workers")
+
+
+def post_fork(server, worker):
+    from app.services.database import dispose_engines
+
+    # Pooled connections inherited from the master belong to the master
+    with server.app.wsgi().app_context():
+        dispose_engines(close=False)
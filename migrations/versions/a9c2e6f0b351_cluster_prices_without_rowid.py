@@ -0,0 +1,28 @@
+"""Cluster prices as a WITHOUT ROWID table
+
+Revision ID: a9c2e6f0b351
+Revises: 6e1b9d4f2a87
+Create Date: 2026-10-19 17:20:36.118542
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a9c2e6f0b351'
+down_revision = '6e1b9d4f2a87'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Rebuild prices (copying every row) so it is stored in (asset_code, date) order.
+    # Alembic does not autogenerate table option changes.
+    with op.batch_alter_table('prices', schema=None, recreate='always',
+                              table_kwargs={'sqlite_with_rowid': False}):
+        pass
+
+
+def downgrade():
+    with op.batch_alter_table('prices', schema=None, recreate='always'):
+        pass
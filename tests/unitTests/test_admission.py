@@ -0,0 +1,71 @@
+import unittest
+
+from app import create_app, db
+from app.config import TestConfig
+from app.services.admission import Admission
+
+SUMMARY = {"weights": {"MSFT": 1.0}, "start_date": "2020-01-01", "initial_investment": 1000}
+COMPARISON = {"weights_a": {"MSFT": 1.0}, "weights_b": {"SPY": 1.0}, "start_date": "2020-01-01"}
+
+
+class AdmissionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.config.update(ANALYTICS_RATE=0.01, ANALYTICS_BURST=10)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def post(self, path, body, ip="10.0.0.1"):
+        return self.client.post(path, json=body, environ_base={"REMOTE_ADDR": ip})
+
+    def test_buckets_are_weighted_by_endpoint_cost(self):
+        # comparison_timeseries costs 6 of the 10 tokens, portfolio-summary 1
+        self.assertNotEqual(self.post("/api/comparison_timeseries", COMPARISON).status_code, 429)
+        response = self.post("/api/comparison_timeseries", COMPARISON)
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response.headers["Retry-After"]), 1)
+
+        for _ in range(4):
+            self.assertEqual(self.post("/api/portfolio-summary", SUMMARY).status_code, 400)  # No prices
+        self.assertEqual(self.post("/api/portfolio-summary", SUMMARY).status_code, 429)
+
+        # Another client has its own budget
+        self.assertNotEqual(self.post("/api/comparison_timeseries", COMPARISON, ip="10.0.0.2").status_code, 429)
+        print("✔ admission: each client's bucket is drained by endpoint cost, 429 with Retry-After")
+
+    def test_heavy_requests_are_capped(self):
+        admission = self.app.extensions["admission"] = Admission(max_concurrent=1)
+        self.assertTrue(admission.enter())  # Another request is running
+        response = self.post("/api/portfolio-summary", SUMMARY)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers["Retry-After"], "1")
+
+        admission.leave()
+        self.assertEqual(self.post("/api/portfolio-summary", SUMMARY).status_code, 400)
+        self.assertEqual(admission.in_flight, 0)
+        print("✔ admission: heavy requests beyond the concurrency cap get 503 with Retry-After")
+
+    def test_counters_are_exposed(self):
+        self.post("/api/comparison_timeseries", COMPARISON)
+        self.post("/api/comparison_timeseries", COMPARISON)
+        self.post("/api/comparison-radar", COMPARISON)
+        self.post("/api/comparison-radar", COMPARISON)
+        self.post("/api/comparison-radar", COMPARISON)
+
+        stats = self.client.get("/api/admission").get_json()
+        self.assertEqual(stats["admitted"], {"api.comparison_timeseries": 1, "api.comparison_radar": 2})
+        self.assertEqual(stats["rejected"], {"api.comparison_timeseries": {"rate_limited": 1},
+                                             "api.comparison_radar": {"rate_limited": 1}})
+        self.assertEqual((stats["rejected_total"], stats["in_flight"], stats["burst"]), (2, 0, 10))
+        print("✔ /api/admission: admitted and refused requests per endpoint")
+
+
+if __name__ == "__main__":
+    unittest.main()
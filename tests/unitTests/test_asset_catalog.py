@@ -0,0 +1,66 @@
+import unittest
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Asset
+from app.services.asset_catalog import get_asset_catalog, invalidate_asset_catalog
+from app.services.data_version import complete_refresh
+
+
+class AssetCatalogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+        db.session.add_all([
+            Asset(asset_code="TSLA", display_name="Tesla", full_name="Tesla, Inc.", type="stock"),
+            Asset(asset_code="AAPL", display_name="Apple", full_name="Apple Inc.", type="stock"),
+            Asset(asset_code="SPY", display_name="S&P 500", full_name="SPDR S&P 500 ETF", type="etf"),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_lookups(self):
+        catalog = get_asset_catalog()
+        self.assertEqual(catalog.get("AAPL").full_name, "Apple Inc.")
+        self.assertIsNone(catalog.get("NOPE"))
+        self.assertEqual([a.asset_code for a in catalog.lookup(["TSLA", "NOPE", "SPY"])], ["TSLA", "SPY"])
+        self.assertEqual([a["code"] for a in catalog.form_options()], ["AAPL", "TSLA"])
+        print("✔ Asset catalog: lookups by code and non-ETF form options sorted by name")
+
+    def test_cached_until_invalidated(self):
+        get_asset_catalog()
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            get_asset_catalog()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(statements, [])
+
+        db.session.add(Asset(asset_code="NVDA", display_name="Nvidia", type="stock"))
+        db.session.commit()
+        self.assertIsNone(get_asset_catalog().get("NVDA"))
+
+        invalidate_asset_catalog()
+        self.assertIsNotNone(get_asset_catalog().get("NVDA"))
+        print("✔ Asset catalog: served from memory until invalidated")
+
+    def test_reloads_on_new_price_version(self):
+        get_asset_catalog()
+        db.session.add(Asset(asset_code="AMD", display_name="AMD", type="stock"))
+        complete_refresh()
+        self.assertIsNotNone(get_asset_catalog().get("AMD"))
+        print("✔ Asset catalog: reloads when the price data version changes")
+
+
+if __name__ == "__main__":
+    unittest.main()
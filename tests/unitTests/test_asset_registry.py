@@ -0,0 +1,165 @@
+import sys
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+import pandas as pd
+from flask import session
+from flask_wtf.csrf import generate_csrf
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Asset, Price, User
+from app.services.asset_catalog import get_asset_catalog, invalidate_asset_catalog
+from app.services.asset_registry import _claim, register_asset
+from app.services.data_version import current_price_version
+
+
+def download_stub(ticker, **kwargs):
+    dates = pd.bdate_range("2024-01-01", periods=60)
+    frame = pd.DataFrame({"Close": [100.0 + i for i in range(60)]}, index=dates)
+    frame.index.name = "Date"
+    return frame
+
+
+class AssetRegistryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        db.session.add(Asset(asset_code="MSFT", display_name="MSFT", full_name="Microsoft Corp", type="stock"))
+        db.session.add(Price(asset_code="MSFT", date=pd.Timestamp("2024-01-02").date(), close_price=370))
+        db.session.add(User(username="rich1", user_email="rich1@example.com", user_pswd="x",
+                            user_fName="Rich", user_lName="One"))
+        db.session.commit()
+
+        self._stdout, sys.stdout = sys.stdout, StringIO()
+
+    def tearDown(self):
+        sys.stdout = self._stdout
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def login(self):
+        with self.client.session_transaction() as session:
+            session["_user_id"] = "1"
+
+    def test_register_validates_and_dedupes(self):
+        asset, created = register_asset(" qqq ", display_name="Nasdaq 100", type="etf")
+        self.assertTrue(created)
+        self.assertEqual((asset.asset_code, asset.history_status), ("QQQ", "pending"))
+        self.assertFalse(register_asset("QQQ")[1])
+        for bad in ("", "DROP TABLE", "A" * 30, "<script>"):
+            with self.assertRaises(ValueError):
+                register_asset(bad)
+
+        register_asset("ARKK")
+        # Pending tickers are not offered in the portfolio form until they have prices
+        self.assertEqual([o["code"] for o in get_asset_catalog().form_options()], ["MSFT"])
+        print("✔ register_asset: normalizes tickers, rejects invalid ones and ignores duplicates")
+
+    @patch("pandas.DataFrame.to_csv")
+    @patch("app.services.fetch_price.yf.download", side_effect=download_stub)
+    def test_first_request_loads_only_that_ticker(self, mock_download, mock_to_csv):
+        register_asset("ARKK", display_name="ARK Innovation")
+        version = current_price_version()
+
+        response = self.client.get("/api/assets/arkk")
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual(body["history_status"], "ready")
+        self.assertEqual(body["first_date"], "2024-01-01")
+
+        self.assertEqual(mock_download.call_count, 1)
+        self.assertEqual(mock_download.call_args.args[0], "ARKK")
+        self.assertEqual(Price.query.filter_by(asset_code="ARKK").count(), 60)
+        self.assertEqual(Price.query.filter_by(asset_code="MSFT").count(), 1)
+        self.assertGreater(current_price_version(), version)
+        self.assertIn("ARKK", [o["code"] for o in get_asset_catalog().form_options()])
+
+        # Later requests are served from what is stored
+        self.client.get("/api/assets/ARKK")
+        self.assertEqual(mock_download.call_count, 1)
+        print("✔ /api/assets/<code>: the first request downloads that ticker alone, then it is cached")
+
+    @patch("pandas.read_csv", side_effect=Exception("stooq down"))
+    @patch("app.services.fetch_price.yf.download", side_effect=Exception("yfinance down"))
+    def test_failed_loads_are_not_retried_immediately(self, mock_download, mock_read_csv):
+        register_asset("ZZZZ")
+        body = self.client.get("/api/assets/ZZZZ").get_json()
+        self.assertEqual(body["history_status"], "failed")
+        self.assertTrue(body["history_error"])
+
+        self.client.get("/api/assets/ZZZZ")
+        self.assertEqual(mock_download.call_count, 1)
+        self.assertEqual(self.client.get("/api/assets/NOPE").status_code, 404)
+        print("✔ /api/assets/<code>: failed downloads are recorded and retried only after a delay")
+
+    def test_claim_is_exclusive(self):
+        register_asset("ARKK")
+        past = pd.Timestamp("2000-01-01").to_pydatetime()
+        self.assertTrue(_claim("ARKK", past))
+        self.assertFalse(_claim("ARKK", past))
+        self.assertEqual(db.session.get(Asset, "ARKK").history_status, "loading")
+        print("✔ asset registry: only one worker can claim a pending ticker")
+
+    def test_stale_loading_is_reclaimed(self):
+        register_asset("ARKK")
+        self.assertTrue(_claim("ARKK", pd.Timestamp("2000-01-01").to_pydatetime()))
+        # A worker that died mid-load leaves the ticker 'loading' until the retry delay has passed
+        self.assertFalse(_claim("ARKK", pd.Timestamp("2000-01-01").to_pydatetime()))
+        self.assertTrue(_claim("ARKK", pd.Timestamp("2100-01-01").to_pydatetime()))
+        print("✔ asset registry: a ticker stuck in 'loading' is taken over after the retry delay")
+
+    def test_reactivation_refreshes_catalog(self):
+        db.session.get(Asset, "MSFT").is_active = False
+        db.session.commit()
+        invalidate_asset_catalog()
+        self.assertNotIn("MSFT", [o["code"] for o in get_asset_catalog().form_options()])
+
+        self.assertFalse(register_asset("MSFT")[1])
+        self.assertIn("MSFT", [o["code"] for o in get_asset_catalog().form_options()])
+        print("✔ register_asset: re-activating a ticker refreshes the asset catalog")
+
+    def test_adding_requires_login(self):
+        self.assertEqual(self.client.post("/api/assets", json={"code": "ARKK"}).status_code, 401)
+        self.assertIsNone(db.session.get(Asset, "ARKK"))
+        print("✔ POST /api/assets: anonymous requests get 401")
+
+    def test_adding_requires_csrf_token(self):
+        self.app.config["WTF_CSRF_ENABLED"] = True
+        with self.app.test_request_context():
+            token = generate_csrf()
+            raw_token = session["csrf_token"]
+        with self.client.session_transaction() as client_session:
+            client_session["_user_id"] = "1"
+            client_session["csrf_token"] = raw_token
+
+        self.assertEqual(self.client.post("/api/assets", json={"code": "ARKK"}).status_code, 400)
+        self.assertIsNone(db.session.get(Asset, "ARKK"))
+        response = self.client.post("/api/assets", json={"code": "ARKK"}, headers={"X-CSRFToken": token})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.client.get("/api/assets").status_code, 200)
+        print("✔ POST /api/assets: needs the X-CSRFToken header")
+
+    def test_add_via_api_and_cli(self):
+        self.login()
+        response = self.client.post("/api/assets", json={"code": "arkk", "name": "ARK", "type": "etf"})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()["history_status"], "pending")
+        self.assertEqual(self.client.post("/api/assets", json={"code": "arkk"}).status_code, 200)
+        self.assertEqual(self.client.post("/api/assets", json={"code": "!!"}).status_code, 400)
+
+        result = self.app.test_cli_runner().invoke(args=["add-asset", "qqq", "--name", "Nasdaq 100", "--type", "etf"])
+        self.assertIn("Added: QQQ (pending)", result.output)
+        codes = [a["asset_code"] for a in self.client.get("/api/assets").get_json()["assets"]]
+        self.assertEqual(codes, ["ARKK", "MSFT", "QQQ"])
+        print("✔ asset registry: tickers can be added through POST /api/assets and the add-asset command")
+
+
+if __name__ == "__main__":
+    unittest.main()
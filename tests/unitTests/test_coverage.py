@@ -0,0 +1,69 @@
+import unittest
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price, AssetCoverage
+from app.services.coverage import refresh_asset_coverage, common_window, global_window, get_coverage
+
+
+class AssetCoverageTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # MSFT: 2020-01-01 .. 2020-01-20 with a one-week hole; TSLA: 2020-01-05 .. 2020-01-31
+        msft = [date(2020, 1, 1) + timedelta(days=i) for i in range(20) if not 5 <= i < 12]
+        tsla = [date(2020, 1, 5) + timedelta(days=i) for i in range(27)]
+        db.session.add_all([Price(asset_code="MSFT", date=d, close_price=1) for d in msft] +
+                           [Price(asset_code="TSLA", date=d, close_price=1) for d in tsla])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_refresh_builds_rows(self):
+        refresh_asset_coverage()
+        db.session.commit()
+        msft = db.session.get(AssetCoverage, "MSFT")
+        self.assertEqual((msft.first_date, msft.last_date), (date(2020, 1, 1), date(2020, 1, 20)))
+        self.assertEqual(msft.row_count, 13)
+        self.assertEqual(msft.gap_count, 1)
+        self.assertEqual(db.session.get(AssetCoverage, "TSLA").gap_count, 0)
+        print("✔ Asset coverage: first/last date, row count and gap count per asset")
+
+    def test_windows_without_touching_prices(self):
+        refresh_asset_coverage()
+        db.session.commit()
+        # Load the in-memory copy; unknown codes are looked up once per data version
+        common_window(["NOPE"])
+
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            window = common_window(["MSFT", "TSLA", "NOPE"])
+            bounds = global_window()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(window, (date(2020, 1, 5), date(2020, 1, 20)))
+        self.assertEqual(bounds, (date(2020, 1, 1), date(2020, 1, 31)))
+        self.assertFalse([s for s in statements if "prices" in s], statements)
+        print("✔ Asset coverage: common and global windows are answered without scanning prices")
+
+    def test_falls_back_to_prices_before_backfill(self):
+        self.assertEqual(common_window(["MSFT", "TSLA"]), (date(2020, 1, 5), date(2020, 1, 20)))
+        self.assertEqual(global_window(), (date(2020, 1, 1), date(2020, 1, 31)))
+        self.assertEqual(get_coverage(["MSFT"])["MSFT"].row_count, 13)
+        print("✔ Asset coverage: falls back to the prices table for assets without a coverage row")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+from datetime import date
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price
+from app.services.data_version import begin_refresh, complete_refresh, current_price_version
+
+
+class PriceDataVersionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.config["PRICE_STREAM_ENABLED"] = True
+        self.app.config["PRICE_STREAM_MAX_DURATION"] = 0.1
+        self.app.config["PRICE_STREAM_POLL_INTERVAL"] = 0.05
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_refresh_bumps_version(self):
+        self.assertEqual(current_price_version(), 0)
+        db.session.add(Price(asset_code="MSFT", date=date(2024, 5, 1), close_price=400))
+        begin_refresh(1)
+        self.assertEqual(self.client.get("/api/prices/version").get_json()["status"], "running")
+
+        self.assertEqual(complete_refresh(), 1)
+        self.assertEqual(current_price_version(), 1)
+        snapshot = self.client.get("/api/prices/version").get_json()
+        self.assertEqual(snapshot["status"], "complete")
+        self.assertEqual(snapshot["latest_date"], "2024-05-01")
+        print("✔ Price data version: completing a refresh bumps the version and records the latest date")
+
+    def test_stream_sends_version_event(self):
+        complete_refresh()
+        response = self.client.get("/api/prices/stream")
+        self.assertEqual(response.mimetype, "text/event-stream")
+        body = response.get_data(as_text=True)
+        self.assertIn("retry: 3000", body)
+        self.assertIn("event: version", body)
+        self.assertIn('"version": 1', body)
+        print("✔ /api/prices/stream: emits the current data version as a Server-Sent Event")
+
+    def test_stream_is_off_by_default(self):
+        self.assertFalse(TestConfig.PRICE_STREAM_ENABLED)
+        self.assertGreater(TestConfig.PRICE_STREAM_MAX_CONNECTIONS, 1)
+        self.app.config["PRICE_STREAM_ENABLED"] = False
+        self.assertEqual(self.client.get("/api/prices/stream").status_code, 404)
+        self.assertEqual(self.client.get("/api/prices/version").status_code, 200)
+        print("✔ /api/prices/stream: off unless PRICE_STREAM_ENABLED, pages poll the version instead")
+
+    def test_stream_connections_are_capped(self):
+        self.app.config["PRICE_STREAM_MAX_CONNECTIONS"] = 1
+        open_stream = self.client.get("/api/prices/stream", buffered=False)
+        refused = self.client.get("/api/prices/stream")
+        self.assertEqual(refused.status_code, 503)
+        self.assertEqual(refused.headers["Retry-After"], "1")
+        self.assertIn("/api/prices/version", refused.get_json()["error"])
+
+        # Closing a stream frees its slot, even before the client read anything
+        open_stream.close()
+        response = self.client.get("/api/prices/stream")
+        self.assertEqual(response.status_code, 200)
+        response.get_data()
+        response.close()
+        print("✔ /api/prices/stream: refuses streams beyond PRICE_STREAM_MAX_CONNECTIONS with 503 Retry-After")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, timedelta
+
+from sqlalchemy import func, select, text
+
+from app import create_app, db
+from app.config import ProductionConfig
+from app.models import Price
+from app.services.database import analytics_bind
+
+
+class SQLiteProfileTestCase(unittest.TestCase):
+    """The production SQLite profile on a temporary database file."""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        path = os.path.join(self.tmpdir, "portfolio_data.db")
+
+        class FileConfig(ProductionConfig):
+            TESTING = True
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + path
+            ANALYTICS_DATABASE_URI = f"sqlite:///file:{path}?mode=ro&uri=true"
+            ANALYTICS_WORKERS = 0
+            ANALYTICS_JOB_WORKERS = 0
+
+        self.app = create_app(FileConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        start = date(2000, 1, 1)
+        db.session.add_all(Price(asset_code="MSFT", date=start + timedelta(days=i), close_price=i)
+                           for i in range(1000))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        analytics_bind().dispose()
+        self.ctx.pop()
+        shutil.rmtree(self.tmpdir)
+
+    def test_pragmas_applied(self):
+        with db.engine.connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA journal_mode")).scalar(), "wal")
+            self.assertEqual(conn.execute(text("PRAGMA synchronous")).scalar(), 1)  # NORMAL
+            self.assertEqual(conn.execute(text("PRAGMA busy_timeout")).scalar(), 5000)
+
+        with analytics_bind().connect() as conn:
+            self.assertEqual(conn.execute(text("PRAGMA query_only")).scalar(), 1)
+            with self.assertRaises(Exception):
+                conn.execute(text("DELETE FROM prices"))
+        print("✔ ProductionConfig: WAL and tuned pragmas on the write engine, read-only analytics engine")
+
+    def test_readers_continue_during_ingest(self):
+        in_transaction = threading.Event()
+        committing = threading.Event()
+        done = threading.Event()
+        reads, errors, uncommitted_reads = [], [], []
+        engine = analytics_bind()
+
+        def ingest():
+            # One long write transaction, like fetch_all_history
+            with self.app.app_context():
+                start = date(2010, 1, 1)
+                db.session.add_all(Price(asset_code="TSLA", date=start + timedelta(days=i), close_price=i)
+                                   for i in range(20000))
+                db.session.flush()
+                in_transaction.set()
+                time.sleep(0.5)
+                committing.set()
+                db.session.commit()
+                db.session.remove()
+            done.set()
+
+        def read():
+            in_transaction.wait()
+            while not done.is_set():
+                try:
+                    with engine.connect() as conn:
+                        count = conn.execute(select(func.count()).select_from(Price)).scalar()
+                    reads.append(count)
+                    # Finished while the writer still held its transaction open
+                    if not committing.is_set():
+                        uncommitted_reads.append(count)
+                except Exception as e:
+                    errors.append(e)
+
+        writer = threading.Thread(target=ingest)
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for thread in [writer, *readers]:
+            thread.start()
+        for thread in [writer, *readers]:
+            thread.join()
+
+        self.assertFalse(errors)
+        self.assertGreater(len(reads), 20)
+        # Readers see either the old or the new snapshot, never a partial ingest
+        self.assertTrue(set(reads) <= {1000, 21000}, set(reads))
+        # Under WAL the writer's lock does not block readers: they keep completing,
+        # on the old snapshot, while the ingest transaction is open
+        self.assertTrue(uncommitted_reads)
+        self.assertEqual(set(uncommitted_reads), {1000})
+        print(f"✔ WAL: {len(uncommitted_reads)} reads completed during a 0.5 s ingest transaction")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import time
+import unittest
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price
+from app.services.calculation import calculate_comparison_radar_metrics, calculate_portfolio_metrics
+from app.services.executor import Deadline, DeadlineExceeded, deadline_scope, run_analytics
+
+COMPARISON = {"weights_a": {"MSFT": 1.0}, "weights_b": {"MSFT": 0.5, "SPY": 0.5}, "start_date": "2021-01-01"}
+
+
+class RecordingDeadline(Deadline):
+    """Expires once `budget` stage checks have passed."""
+
+    def __init__(self, budget):
+        super().__init__(time.time() + 60)
+        self.budget = budget
+        self.stages = []
+
+    def check(self, stage):
+        self.stages.append(stage)
+        if len(self.stages) > self.budget:
+            raise DeadlineExceeded(f"Calculation took too long and was stopped during {stage}")
+
+
+class DeadlineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        start = date(2021, 1, 1)
+        db.session.execute(Price.__table__.insert(), [
+            {"asset_code": asset, "date": start + timedelta(days=n), "close_price": 100.0 + n * (i + 1) + n % 3}
+            for i, asset in enumerate(("MSFT", "SPY")) for n in range(300)
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_stages_are_checked_and_work_stops(self):
+        deadline = RecordingDeadline(budget=100)
+        with deadline_scope(deadline):
+            calculate_portfolio_metrics({"MSFT": 0.5, "SPY": 0.5}, "2021-01-01", 1000)
+        self.assertEqual(deadline.stages, ["load", "load", "align", "metrics"])
+
+        # Out of time after loading MSFT: SPY is never read
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            with deadline_scope(RecordingDeadline(budget=1)), self.assertRaises(DeadlineExceeded) as caught:
+                calculate_portfolio_metrics({"MSFT": 0.5, "SPY": 0.5}, "2021-01-01", 1000)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertIn("during load", str(caught.exception))
+        self.assertEqual(sum("prices" in s for s in statements), 1)
+        print("✔ deadline: calculations check it at load/align/metrics and stop when it passes")
+
+    def test_radar_aborts_between_portfolios(self):
+        deadline = RecordingDeadline(budget=4)
+        with deadline_scope(deadline), self.assertRaises(DeadlineExceeded):
+            calculate_comparison_radar_metrics(COMPARISON["weights_a"], COMPARISON["weights_b"], "2021-01-01", 1000)
+        self.assertEqual(deadline.stages, ["load", "align", "series", "load", "load"])
+        print("✔ deadline: the radar calculation stops part way through portfolio B")
+
+    def test_run_analytics_enforces_the_timeout(self):
+        self.assertTrue(run_analytics(calculate_portfolio_metrics, {"MSFT": 1.0}, "2021-01-01", 1000, timeout=5))
+        with self.assertRaises(DeadlineExceeded) as caught:
+            run_analytics(calculate_portfolio_metrics, {"MSFT": 1.0}, "2021-01-01", 1000, timeout=1e-9)
+        self.assertEqual(caught.exception.status_code, 504)
+        print("✔ run_analytics: calls run under a deadline of their timeout")
+
+    def test_expired_requests_get_504(self):
+        self.app.config["ANALYTICS_TIMEOUT"] = 1e-9
+        client = self.app.test_client()
+        for path in ("/api/comparison-radar", "/api/comparison_timeseries"):
+            response = client.post(path, json=COMPARISON)
+            self.assertEqual(response.status_code, 504)
+            self.assertIn("too long", response.get_json()["error"])
+        response = client.post("/api/portfolio-summary",
+                               json={"weights": {"MSFT": 1.0}, "start_date": "2021-01-01", "initial_investment": 1000})
+        self.assertEqual(response.status_code, 504)
+        print("✔ calculation endpoints: a passed deadline returns 504")
+
+
+if __name__ == "__main__":
+    unittest.main()
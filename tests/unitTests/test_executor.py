@@ -0,0 +1,129 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from app import create_app, db
+from app.config import TestConfig
+from app.services.executor import AnalyticsPool, AnalyticsBusy, AnalyticsTimeout, AnalyticsUnavailable
+
+
+class AnalyticsPoolTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # One warm worker shared by the tests; workers build their own TestConfig app
+        cls.pool = AnalyticsPool(TestConfig, workers=1, max_pending=1, timeout=10)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown(wait=True)
+
+    def test_runs_in_worker(self):
+        self.assertEqual(self.pool.run(pow, (2, 10)), 1024)
+        print("✔ AnalyticsPool: returns the result computed in the worker process")
+
+    def test_rejects_when_saturated(self):
+        self.pool.run(pow, (2, 1))  # make sure the worker is warm
+        busy = threading.Thread(target=self.pool.run, args=(time.sleep, (1,)))
+        busy.start()
+        time.sleep(0.2)
+        with self.assertRaises(AnalyticsBusy) as ctx:
+            self.pool.run(pow, (2, 2))
+        busy.join()
+        self.assertEqual(ctx.exception.status_code, 503)
+        print("✔ AnalyticsPool: rejects calls beyond the pending limit with a 503 error")
+
+    def test_timeout(self):
+        self.pool.run(pow, (2, 1))
+        with self.assertRaises(AnalyticsTimeout) as ctx:
+            self.pool.run(time.sleep, (1,), timeout=0.1)
+        self.assertEqual(ctx.exception.status_code, 504)
+        time.sleep(1)  # let the abandoned call release its slot
+        print("✔ AnalyticsPool: abandons calls that exceed their timeout")
+
+
+class AnalyticsPoolRestartTestCase(unittest.TestCase):
+    def setUp(self):
+        self.pool = AnalyticsPool(TestConfig, workers=1, max_pending=6, timeout=10)
+        self.pool.use_version(1)
+        self.pool.run(pow, (2, 1))  # make sure the worker is warm
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+
+    def run_in_threads(self, calls):
+        results = [None] * len(calls)
+
+        def call(i, func, args):
+            try:
+                results[i] = self.pool.run(func, args)
+            except AnalyticsUnavailable as e:
+                results[i] = e
+
+        threads = [threading.Thread(target=call, args=(i, func, args)) for i, (func, args) in enumerate(calls)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        return threads, results
+
+    def test_version_change_lets_queued_calls_finish(self):
+        threads, results = self.run_in_threads([(time.sleep, (0.5,))] + [(pow, (2, n)) for n in range(4)])
+        # Several requests notice the new version at once; the old workers are retired once
+        old = self.pool._executor
+        swaps = [threading.Thread(target=self.pool.use_version, args=(2,)) for _ in range(4)]
+        for thread in swaps:
+            thread.start()
+        for thread in swaps + threads:
+            thread.join()
+
+        self.assertEqual(results, [None, 1, 2, 4, 8])
+        self.assertEqual(self.pool.data_version, 2)
+        self.assertIsNone(self.pool._executor)
+        self.assertEqual(self.pool.run(pow, (3, 2)), 9)
+        self.assertIsNot(self.pool._executor, old)
+        print("✔ AnalyticsPool: a data version change retires the workers once and queued calls still finish")
+
+    def test_cancelled_calls_are_unavailable(self):
+        threads, results = self.run_in_threads([(time.sleep, (0.5,))] + [(pow, (2, n)) for n in range(4)])
+        self.pool._executor.shutdown(wait=False, cancel_futures=True)
+        for thread in threads:
+            thread.join()
+
+        cancelled = [r for r in results if isinstance(r, AnalyticsUnavailable)]
+        self.assertTrue(cancelled)
+        self.assertEqual(cancelled[0].status_code, 503)
+        self.assertEqual(cancelled[0].retry_after, 1)
+        print("✔ AnalyticsPool: calls cancelled by a pool shutdown become 503 Retry-After instead of 500")
+
+
+class AnalyticsApiTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_busy_pool_returns_503(self):
+        payload = {"weights_a": {"MSFT": 1.0}, "weights_b": {"TSLA": 1.0}}
+        with patch("app.services.api.run_analytics", side_effect=AnalyticsBusy("busy", retry_after=2)):
+            response = self.client.post("/api/comparison-radar", json=payload)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers.get("Retry-After"), "2")
+        print("✔ /api/comparison-radar: returns 503 with Retry-After when the analytics pool is saturated")
+
+    def test_busy_pool_returns_503_without_try_block(self):
+        payload = {"weights": {"MSFT": 1.0}, "start_date": "2020-01-01", "initial_investment": 1000}
+        with patch("app.services.api.run_analytics", side_effect=AnalyticsBusy("busy")):
+            response = self.client.post("/api/portfolio-summary", json=payload)
+        self.assertEqual(response.status_code, 503)
+        print("✔ /api/portfolio-summary: app-level handler turns AnalyticsBusy into a 503")
+
+
+if __name__ == "__main__":
+    unittest.main()
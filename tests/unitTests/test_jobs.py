@@ -0,0 +1,122 @@
+import unittest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+
+from flask import session
+from flask_wtf.csrf import generate_csrf
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price, AnalyticsJob
+from app.services.calculation import calculate_comparison_radar_metrics
+from app.services.executor import AnalyticsBusy, AnalyticsTimeout, AnalyticsUnavailable
+
+
+class AnalyticsJobTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        start = date.today() - timedelta(days=29)
+        for i in range(30):
+            d = start + timedelta(days=i)
+            db.session.add_all([
+                Price(asset_code="MSFT", date=d, close_price=100 + i + (i % 3)),
+                Price(asset_code="TSLA", date=d, close_price=200 + 2 * i - (i % 4)),
+            ])
+        db.session.commit()
+        self.start_date = start.strftime("%Y-%m-%d")
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def submit(self, job_type, params):
+        return self.client.post("/api/jobs", json={"type": job_type, "params": params})
+
+    def test_radar_job_roundtrip(self):
+        params = {
+            "weights_a": {"MSFT": 1.0},
+            "weights_b": {"TSLA": 1.0},
+            "start_date": self.start_date,
+            "initial_amount": 1000,
+        }
+        response = self.submit("comparison_radar", params)
+        self.assertEqual(response.status_code, 202)
+        job = response.get_json()
+
+        status = self.client.get(job["status_url"]).get_json()
+        self.assertEqual(status["status"], "succeeded")
+
+        result = self.client.get(job["result_url"]).get_json()
+        expected = calculate_comparison_radar_metrics(**params)
+        self.assertAlmostEqual(result["result"]["portfolio_a"]["cagr"], expected["portfolio_a"]["cagr"])
+        print("✔ /api/jobs: comparison_radar job runs and its stored result matches a direct call")
+
+    def test_unknown_type_and_bad_params(self):
+        self.assertEqual(self.submit("mine_bitcoin", {}).status_code, 400)
+        self.assertEqual(self.submit("comparison_radar", {"weights_a": {}}).status_code, 400)
+        print("✔ /api/jobs: rejects unknown job types and invalid params with 400")
+
+    def test_failed_job_reports_error(self):
+        response = self.submit("comparison_timeseries", {
+            "weights_a": {"MSFT": 1.0}, "weights_b": {"TSLA": 1.0},
+            "start_date": self.start_date, "initial_amount": "not a number",
+        })
+        job = response.get_json()
+        self.assertEqual(job["status"], "failed")
+        self.assertEqual(self.client.get(job["result_url"]).status_code, 500)
+        print("✔ /api/jobs: failed jobs expose their error through the result endpoint")
+
+    def test_busy_workers_are_retried(self):
+        self.app.config["ANALYTICS_JOB_RETRY_DELAY"] = 0.01
+        params = {"allocation": {"MSFT": 1.0}, "start_date": self.start_date, "initial_amount": 1000}
+        outcomes = [AnalyticsBusy("busy", retry_after=0), AnalyticsUnavailable("restarting", retry_after=0), {"values": []}]
+        with patch("app.services.jobs.run_analytics", side_effect=outcomes) as run:
+            job = self.submit("drawdown", params).get_json()
+        self.assertEqual(job["status"], "succeeded")
+        self.assertEqual(run.call_count, 3)
+
+        # Busy for longer than the job may take, or a calculation timeout: failed
+        self.app.config["ANALYTICS_JOB_TIMEOUT"] = 0.05
+        with patch("app.services.jobs.run_analytics", side_effect=AnalyticsBusy("busy", retry_after=0)):
+            job = self.submit("drawdown", params).get_json()
+        self.assertEqual((job["status"], job["error"]), ("failed", "busy"))
+        with patch("app.services.jobs.run_analytics", side_effect=AnalyticsTimeout("too slow")) as run:
+            job = self.submit("drawdown", params).get_json()
+        self.assertEqual((job["status"], run.call_count), ("failed", 1))
+        print("✔ /api/jobs: busy or restarting workers are retried until ANALYTICS_JOB_TIMEOUT")
+
+    def test_submit_requires_csrf_token(self):
+        self.app.config["WTF_CSRF_ENABLED"] = True
+        with self.app.test_request_context():
+            token = generate_csrf()
+            raw_token = session["csrf_token"]
+        with self.client.session_transaction() as client_session:
+            client_session["csrf_token"] = raw_token
+
+        params = {"allocation": {"MSFT": 1.0}, "start_date": self.start_date, "initial_amount": 1000}
+        self.assertEqual(self.submit("drawdown", params).status_code, 400)
+        response = self.client.post("/api/jobs", json={"type": "drawdown", "params": params},
+                                    headers={"X-CSRFToken": token})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.client.get(response.get_json()["status_url"]).status_code, 200)
+        print("✔ /api/jobs: submitting needs the X-CSRFToken header")
+
+    def test_expired_job_returns_410(self):
+        job = AnalyticsJob(job_id="a" * 32, job_type="drawdown", status="succeeded",
+                           params_json="{}", result_json="{}",
+                           expires_at=datetime.utcnow() - timedelta(seconds=1))
+        db.session.add(job)
+        db.session.commit()
+        self.assertEqual(self.client.get(f"/api/jobs/{'a' * 32}/result").status_code, 410)
+        self.assertIsNone(db.session.get(AnalyticsJob, "a" * 32))
+        print("✔ /api/jobs: expired results return 410 and are deleted")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+import json
+import unittest
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import User, PortfolioSummary
+
+
+class KeysetPaginationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        # Usernames repeat so the id tiebreaker matters
+        for i in range(30):
+            db.session.add(User(username=f"member{i % 12:02d}", user_email=f"member{i}@example.com",
+                                user_pswd="x", user_fName="Test", user_lName=f"Member{i}"))
+        db.session.commit()
+        self.owner = db.session.get(User, 1)
+
+        created = datetime(2024, 1, 1)
+        for i in range(25):
+            db.session.add(PortfolioSummary(
+                portfolio_name=f"Portfolio {i % 8}", user_id=self.owner.id, creator_id=self.owner.id,
+                user_username=self.owner.username, user_email=self.owner.user_email,
+                creator_username=self.owner.username, creator_email=self.owner.user_email,
+                allocation_json=json.dumps({"MSFT": 1.0}), start_date=date(2020, 1, 1),
+                initial_amount=1000, created_at=created + timedelta(days=i % 5),
+                current_value=None if i % 9 == 0 else 1000 + i % 11, profit=i,
+                # Some portfolios have no metrics yet
+                return_percent=None if i % 6 == 0 else float(i % 7),
+                cagr=None if i % 4 == 0 else (i % 3) / 10,
+                volatility=(i % 4) / 10, max_drawdown=-(i % 5) / 10
+            ))
+        db.session.commit()
+
+        with self.client.session_transaction() as session:
+            session["_user_id"] = str(self.owner.id)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def collect(self, url, key, **params):
+        """Follow next_cursor until the last page; returns every item in order."""
+        items, cursor, pages = [], None, 0
+        while True:
+            query = dict(params, **({"cursor": cursor} if cursor else {}))
+            response = self.client.get(url, query_string=query)
+            self.assertEqual(response.status_code, 200)
+            data = response.get_json()
+            items.extend(data[key])
+            pages += 1
+            cursor = data["next_cursor"]
+            if cursor is None:
+                return items, pages
+
+    def expected_ids(self, column, descending):
+        portfolios = PortfolioSummary.query.all()
+
+        def sort_key(p):
+            value = getattr(p, column)
+            # SQLite ordering: NULLs sort before every value
+            return (value is not None, value if value is not None else 0, p.portfolio_id)
+
+        return [p.portfolio_id for p in sorted(portfolios, key=sort_key, reverse=descending)]
+
+    def test_portfolio_pages_cover_every_sort(self):
+        columns = {"name": "portfolio_name", "created_at": "created_at", "current_value": "current_value",
+                   "return_percent": "return_percent", "cagr": "cagr",
+                   "volatility": "volatility", "max_drawdown": "max_drawdown"}
+        for sort, column in columns.items():
+            for order in ("asc", "desc"):
+                items, pages = self.collect("/portfolios/api/list", "portfolios", sort=sort, order=order, limit=7)
+                ids = [p["portfolio_id"] for p in items]
+                self.assertEqual(ids, self.expected_ids(column, order == "desc"), f"{sort} {order}")
+                self.assertEqual(pages, 4)
+        print("✔ /portfolios/api/list: keyset pages cover every portfolio once for each sort key and order")
+
+    def test_user_directory_pages(self):
+        users, pages = self.collect("/portfolios/api/users", "users", limit=8)
+        expected = sorted((u.username, u.id) for u in User.query.filter(User.id != self.owner.id))
+        self.assertEqual([(u["username"], u["id"]) for u in users], expected)
+        self.assertEqual(pages, 4)
+        print("✔ /portfolios/api/users: user directory is paged by username without gaps or repeats")
+
+    def test_invalid_cursors_are_rejected(self):
+        first = self.client.get("/portfolios/api/list", query_string={"sort": "name", "limit": 5}).get_json()
+        # A cursor only replays against the sort it was issued for
+        response = self.client.get("/portfolios/api/list",
+                                   query_string={"sort": "cagr", "cursor": first["next_cursor"]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/portfolios/api/users?cursor=garbage").status_code, 400)
+        self.assertEqual(self.client.get("/portfolios/?cursor=garbage").status_code, 400)
+        print("✔ pagination: malformed or mismatched cursors return 400")
+
+    def test_list_page_links_to_next_page(self):
+        self.app.config["PORTFOLIO_PAGE_SIZE"] = 10
+        # The list template renders every metric
+        PortfolioSummary.query.filter(PortfolioSummary.return_percent.is_(None)).update({"return_percent": 0.0})
+        PortfolioSummary.query.filter(PortfolioSummary.cagr.is_(None)).update({"cagr": 0.0})
+        PortfolioSummary.query.filter(PortfolioSummary.current_value.is_(None)).update({"current_value": 1000.0})
+        db.session.commit()
+        response = self.client.get("/portfolios/?sort=return_percent&order=desc")
+        self.assertEqual(response.status_code, 200)
+        html = response.get_data(as_text=True)
+        self.assertIn("Next page", html)
+        self.assertNotIn("First page", html)
+        self.assertEqual(html.count('class="portfolio-card"'), 10)
+        # Header sorts reload from the server; rows keep the server's order
+        self.assertIn('data-sort="return_percent" data-direction="desc"', html)
+        self.assertIn('data-sort="cagr" data-direction="none"', html)
+        self.assertNotIn("data-created-at", html)
+        print("✔ portfolios.list: renders one page with a link to the next one")
+
+    def test_sort_queries_read_rows_in_index_order(self):
+        for column in ("portfolio_name", "created_at", "current_value", "return_percent", "cagr", "volatility", "max_drawdown"):
+            plan = db.session.execute(text(
+                f"EXPLAIN QUERY PLAN SELECT * FROM portfolio_summary "
+                f"WHERE user_id = 1 AND is_shown = 1 AND ({column}, portfolio_id) > ('0', 0) "
+                f"ORDER BY {column} DESC, portfolio_id DESC LIMIT 51"
+            )).fetchall()
+            detail = " ".join(row[-1] for row in plan)
+            self.assertIn(f"ix_portfolio_summary_user_id_is_shown_{column}", detail)
+            self.assertNotIn("TEMP B-TREE", detail)
+        print("✔ pagination: every portfolio sort key is served by an index without a sort step")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import json
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import User, PortfolioSummary, PortfolioVersion, PortfolioChangeLog
+from app.services.versions import record_version
+
+
+class PortfolioEditTransactionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        db.session.add(User(username="user1", user_email="user1@example.com", user_pswd="x",
+                            user_fName="Test", user_lName="User"))
+        portfolio = PortfolioSummary(
+            portfolio_name="Mix", user_id=1, creator_id=1,
+            user_username="user1", user_email="user1@example.com",
+            creator_username="user1", creator_email="user1@example.com",
+            allocation_json=json.dumps({"MSFT": 0.6, "TSLA": 0.4}),
+            start_date=date(2015, 1, 1), initial_amount=1000, cagr=0.1
+        )
+        db.session.add(portfolio)
+        db.session.flush()
+        record_version(portfolio, updated_by=1)
+        db.session.commit()
+        self.portfolio_id = portfolio.portfolio_id
+
+        with self.client.session_transaction() as session:
+            session["_user_id"] = "1"
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def post_edit(self, name, allocation):
+        form = {"portfolio_name": name}
+        form.update({f"allocation[{code}]": str(pct) for code, pct in allocation.items()})
+
+        commits = []
+        record = lambda conn: commits.append(conn)
+        event.listen(db.engine, "commit", record)
+        try:
+            with patch("app.routes.portfolio.calculate_portfolio_metrics", return_value={"cagr": 0.2}) as calc:
+                response = self.client.post(f"/portfolios/{self.portfolio_id}/edit", data=form)
+        finally:
+            event.remove(db.engine, "commit", record)
+        self.assertEqual(response.status_code, 302)
+        db.session.expire_all()
+        return calc, len(commits)
+
+    def test_unchanged_edit_writes_nothing(self):
+        calc, commits = self.post_edit("Mix", {"MSFT": 60, "TSLA": 40})
+        calc.assert_not_called()
+        self.assertEqual(commits, 0)
+        self.assertEqual(PortfolioVersion.query.count(), 1)
+        self.assertEqual(PortfolioChangeLog.query.count(), 0)
+        print("✔ portfolios.edit: an unchanged form writes nothing")
+
+    def test_rename_skips_metrics(self):
+        calc, commits = self.post_edit("Renamed", {"MSFT": 60, "TSLA": 40})
+        calc.assert_not_called()
+        self.assertEqual(commits, 1)
+        self.assertEqual([log.field_changed for log in PortfolioChangeLog.query.all()], ["portfolio_name"])
+        portfolio = db.session.get(PortfolioSummary, self.portfolio_id)
+        self.assertEqual((portfolio.portfolio_name, portfolio.cagr, portfolio.latest_version_number), ("Renamed", 0.1, 2))
+        print("✔ portfolios.edit: a rename is one commit and does not recompute metrics")
+
+    def test_allocation_change_is_one_transaction(self):
+        calc, commits = self.post_edit("Renamed", {"MSFT": 50, "AMD": 50})
+        calc.assert_called_once()
+        self.assertEqual(commits, 1)
+        self.assertEqual(sorted(log.field_changed for log in PortfolioChangeLog.query.all()),
+                         ["allocation", "portfolio_name"])
+        self.assertEqual(db.session.get(PortfolioSummary, self.portfolio_id).cagr, 0.2)
+        print("✔ portfolios.edit: summary, version and change logs are saved in one commit")
+
+
+if __name__ == "__main__":
+    unittest.main()
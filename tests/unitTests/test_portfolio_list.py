@@ -0,0 +1,108 @@
+import json
+import unittest
+from datetime import date, datetime
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import User, Price, PortfolioSummary, PortfolioShareLog
+
+
+class PortfolioListQueryCountTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.config["PRICE_VERSION_CHECK_INTERVAL"] = 60  # keep query counts deterministic
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        self.users = []
+        for i in range(1, 4):
+            user = User(username=f"user{i}", user_email=f"user{i}@example.com", user_pswd="x",
+                        user_fName="Test", user_lName=f"User{i}")
+            db.session.add(user)
+            self.users.append(user)
+        db.session.add_all([
+            Price(asset_code="MSFT", date=date(2020, 1, 1), close_price=150),
+            Price(asset_code="MSFT", date=date(2024, 1, 1), close_price=370),
+        ])
+        db.session.commit()
+        self.user_ids = [user.id for user in self.users]
+
+        with self.client.session_transaction() as session:
+            session["_user_id"] = str(self.user_ids[0])
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def add_shared_portfolios(self, count):
+        owner, *recipients = [db.session.get(User, user_id) for user_id in self.user_ids]
+        for i in range(count):
+            portfolio = self.make_portfolio(owner, owner, f"Portfolio {i}")
+            for recipient in recipients:
+                copy = self.make_portfolio(recipient, owner, f"Portfolio {i}", shared=True)
+                db.session.add(PortfolioShareLog(
+                    from_user_id=owner.id, to_user_id=recipient.id,
+                    from_portfolio_id=portfolio.portfolio_id, to_portfolio_id=copy.portfolio_id
+                ))
+        db.session.commit()
+
+    def make_portfolio(self, user, creator, name, shared=False):
+        portfolio = PortfolioSummary(
+            portfolio_name=name, user_id=user.id, creator_id=creator.id,
+            shared_from_id=creator.id if shared else None,
+            user_username=user.username, user_email=user.user_email,
+            creator_username=creator.username, creator_email=creator.user_email,
+            allocation_json=json.dumps({"MSFT": 1.0}),
+            start_date=date(2020, 1, 1), initial_amount=1000, created_at=datetime.utcnow(),
+            current_value=2466.67, profit=1466.67, return_percent=146.67, cagr=0.25,
+            volatility=0.3, max_drawdown=-0.2
+        )
+        db.session.add(portfolio)
+        db.session.flush()
+        return portfolio
+
+    def count_list_queries(self):
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        db.session.remove()  # start from an empty identity map, like a new request
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            response = self.client.get("/portfolios/")
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(response.status_code, 200)
+        return response, len(statements)
+
+    def test_query_count_does_not_grow_with_portfolios(self):
+        self.add_shared_portfolios(2)
+        self.count_list_queries()  # warm the per-process caches
+        response, small = self.count_list_queries()
+        self.assertIn(b"user2", response.data)
+
+        self.add_shared_portfolios(20)
+        response, large = self.count_list_queries()
+        self.assertIn(b"user3", response.data)
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 4)
+        print(f"✔ portfolios.list: renders with {large} queries regardless of portfolio and share count")
+
+    def test_recent_share_alert(self):
+        self.add_shared_portfolios(2)
+        with self.client.session_transaction() as session:
+            session["_user_id"] = str(self.user_ids[1])
+        response, _ = self.count_list_queries()
+        self.assertIn(b"user1 has shared 2 portfolios with you.", response.data)
+        print("✔ portfolios.list: recent share alert counts shares across all pages")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from datetime import date, timedelta
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price
+from app.services import calculation
+from app.services.data_version import bump_price_version
+from app.services import prefork
+from app.services.prefork import reload_if_stale, warm_up, watch_price_version
+from app.services.price_store import active_price_store, deactivate_price_store
+
+
+class PreforkTestCase(unittest.TestCase):
+    def setUp(self):
+        # warm_up closes pooled connections, which would drop an in-memory database
+        self.directory = tempfile.mkdtemp()
+
+        class FileConfig(TestConfig):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(self.directory, "test.sqlite")
+            SQLALCHEMY_ENGINE_OPTIONS = {}
+
+        self.app = create_app(FileConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+    def tearDown(self):
+        deactivate_price_store()
+        db.session.remove()
+        db.drop_all()
+        db.engine.dispose()
+        self.ctx.pop()
+        shutil.rmtree(self.directory)
+
+    def add_prices(self):
+        start = date(2022, 1, 3)
+        db.session.execute(Price.__table__.insert(), [
+            {"asset_code": asset, "date": start + timedelta(days=n), "close_price": 100.0 + n}
+            for asset in ("MSFT", "SPY") for n in range(200)
+        ])
+        db.session.commit()
+        bump_price_version()
+
+    def test_health_and_readiness(self):
+        self.assertEqual(self.client.get("/healthz").get_json()["status"], "ok")
+        response = self.client.get("/readyz")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()["checks"], {"database": True, "prices": False})
+        print("✔ /healthz answers; /readyz is 503 until the database holds prices")
+
+    def test_ready_once_prices_exist(self):
+        self.add_prices()
+        warm_up(self.app)
+        body = self.client.get("/readyz").get_json()
+        self.assertEqual(body["status"], "ready")
+        self.assertEqual(body["warm_version"], body["data_version"])
+        print("✔ /readyz: ready with the warmed data version")
+
+    def test_forked_workers_inherit_warm_state(self):
+        self.add_prices()
+        state = warm_up(self.app)
+        self.assertEqual((state["version"], state["assets"]), (1, 2))
+        self.assertIn("asset_catalog", self.app.extensions)
+
+        read, write = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            # Worker: serve a calculation from inherited memory without touching the database
+            status = 1
+            try:
+                os.close(read)
+                statements = []
+                event.listen(db.engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+                with self.app.app_context():
+                    frame = calculation._load_asset_prices("MSFT", "2022-03-01")
+                    version_reads = [s for s in statements if "price_data_version" in s]
+                os.write(write, f"{len(frame)} {len(statements) - len(version_reads)}".encode())
+                status = 0
+            finally:
+                os._exit(status)
+
+        os.close(write)
+        _, status = os.waitpid(pid, 0)
+        result = os.read(read, 100).decode()
+        os.close(read)
+        self.assertEqual(status, 0)
+        self.assertEqual(result, "143 0")
+        print("✔ warm_up: forked workers serve prices from the master's store with no price queries")
+
+    def test_reload_on_new_data_version(self):
+        self.add_prices()
+        warm_up(self.app)
+        reloads = []
+        self.assertFalse(reload_if_stale(self.app, reloads.append))
+
+        db.session.add(Price(asset_code="MSFT", date=date(2023, 1, 1), close_price=1.0))
+        db.session.commit()
+        bump_price_version()
+        # Stale warm state is not served while the reload is pending
+        self.assertIsNone(active_price_store())
+
+        self.assertTrue(reload_if_stale(self.app, reloads.append))
+        self.assertEqual([state["version"] for state in reloads], [2])
+        self.assertEqual(active_price_store().version, 2)
+        self.assertEqual(calculation._load_asset_prices("MSFT", "2022-12-31").iloc[-1, 0], 1.0)
+        print("✔ reload_if_stale: a new data version re-warms the master and triggers a worker reload")
+
+    def test_watcher_only_signals(self):
+        self.add_prices()
+        state = warm_up(self.app)
+        changes = []
+        stop = threading.Event()
+        watcher = watch_price_version(self.app, lambda: changes.append(threading.current_thread().name), 0.02, stop)
+
+        bump_price_version()
+        time.sleep(0.3)
+        stop.set()
+        watcher.join()
+        # One signal per new version; re-warming is left to the thread that forks
+        self.assertEqual(changes, ["price-version-watch"])
+        self.assertIs(self.app.extensions["warm_state"], state)
+        print("✔ watch_price_version: the watcher thread signals a new version once and never re-warms")
+
+    def test_fork_waits_for_version_check(self):
+        def check():
+            with prefork._fork_guard:
+                time.sleep(0.3)
+
+        holder = threading.Thread(target=check)
+        holder.start()
+        time.sleep(0.05)
+        began = time.perf_counter()
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if prefork._fork_guard.acquire(blocking=False) else 1)
+        waited = time.perf_counter() - began
+        _, status = os.waitpid(pid, 0)
+        holder.join()
+        self.assertGreater(waited, 0.2)
+        self.assertEqual(status, 0)  # The child starts with the guard free
+        print("✔ prefork: a fork waits for a running version check")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import time
+import unittest
+from datetime import date, timedelta
+
+import pandas as pd
+from sqlalchemy import event, text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price, PriceChunk
+from app.services import calculation
+from app.services.calculation import calculate_portfolio_metrics
+from app.services.price_chunks import load_asset_history, refresh_price_chunks
+from app.services.price_store import active_price_store, deactivate_price_store
+
+ASSETS = ["MSFT", "TSLA", "SPY", "NVDA", "AAPL", "AMD"]
+
+
+class PriceChunkTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Weekdays only, spanning several year boundaries
+        start = date(2016, 11, 1)
+        days = [start + timedelta(days=i) for i in range(3000)]
+        days = [d for d in days if d.weekday() < 5]
+        db.session.execute(Price.__table__.insert(), [
+            {"asset_code": asset, "date": d, "close_price": 50 + n * (i + 1) * 0.01 + (n % 7)}
+            for i, asset in enumerate(ASSETS) for n, d in enumerate(days)
+        ])
+        db.session.commit()
+        self.days = len(days)
+
+    def tearDown(self):
+        deactivate_price_store()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_chunks_match_row_reads(self):
+        row_frames = {(a, s): calculation._load_asset_prices(a, s)
+                      for a in ("MSFT", "SPY") for s in ("2015-01-01", "2019-12-31", "2020-01-01", "2021-06-15")}
+
+        self.assertEqual(refresh_price_chunks(), len(ASSETS) * 10)  # 2016 to 2025
+        db.session.commit()
+
+        for (asset, start), expected in row_frames.items():
+            pd.testing.assert_frame_equal(load_asset_history(asset, start), expected)
+            pd.testing.assert_frame_equal(calculation._load_asset_prices(asset, start), expected)
+        self.assertIsNone(load_asset_history("MSFT", "2030-01-01"))
+        print("✔ price_chunks: decoded histories match row reads for every start date")
+
+    def test_metrics_unchanged_and_single_read(self):
+        allocation = {"MSFT": 0.6, "TSLA": 0.4}
+        before = calculate_portfolio_metrics(allocation, "2018-03-01", 1000)
+        refresh_price_chunks()
+        db.session.commit()
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            after = calculate_portfolio_metrics(allocation, "2018-03-01", 1000)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        for key in ("current_value", "return_percent", "cagr", "volatility", "max_drawdown"):
+            self.assertAlmostEqual(after[key], before[key], places=9)
+        self.assertEqual(sum("price_chunks" in s for s in statements), 2)
+        self.assertFalse(any("FROM prices" in s for s in statements))
+        print("✔ calculate_portfolio_metrics: same metrics from chunks, one read per asset")
+
+    def test_preload_mixes_chunks_and_rows(self):
+        refresh_price_chunks(["MSFT", "TSLA"])
+        db.session.commit()
+        self.assertEqual(calculation.preload_prices(), len(ASSETS))
+        self.assertEqual(len(active_price_store().frame("SPY")), self.days)
+        self.assertEqual(len(active_price_store().frame("MSFT")), self.days)
+        print("✔ preload_prices: chunked assets decoded, unchunked assets read from prices")
+
+    def test_storage_and_load_benchmark(self):
+        try:
+            db.session.execute(text("SELECT 1 FROM dbstat LIMIT 1"))
+        except OperationalError:
+            self.skipTest("SQLite built without dbstat")
+
+        refresh_price_chunks()
+        db.session.commit()
+
+        def table_bytes(name):
+            # Table plus its indexes
+            return db.session.execute(text(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = :name "
+                "OR name IN (SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :name)"
+            ), {"name": name}).scalar()
+
+        prices_bytes, chunk_bytes = table_bytes("prices"), table_bytes("price_chunks")
+
+        def time_loads(load):
+            began = time.perf_counter()
+            for _ in range(5):
+                for asset in ASSETS:
+                    load(asset)
+            return time.perf_counter() - began
+
+        chunk_time = time_loads(lambda asset: load_asset_history(asset, "2015-01-01"))
+        db.session.query(PriceChunk).delete()
+        db.session.commit()
+        row_time = time_loads(lambda asset: calculation._load_asset_prices(asset, "2015-01-01"))
+
+        self.assertLess(chunk_bytes * 2, prices_bytes)
+        self.assertLess(chunk_time * 2, row_time)
+        print(f"✔ price_chunks: {prices_bytes // 1024} KiB -> {chunk_bytes // 1024} KiB "
+              f"({prices_bytes / chunk_bytes:.1f}x), full-history loads "
+              f"{row_time * 1000:.0f} ms -> {chunk_time * 1000:.0f} ms ({row_time / chunk_time:.1f}x)")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price
+from app.services import calculation
+from app.services.calculation import calculate_portfolio_metrics
+from app.services.data_version import bump_price_version
+from app.services.price_matrix import get_price_matrix, publish_price_matrix
+
+ASSETS = ["BTC-USD", "MSFT", "SPY"]
+
+
+class PriceMatrixTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "price-matrix.bin")
+
+        self.app = create_app(TestConfig)
+        self.app.config["PRICE_MATRIX_PATH"] = self.path
+        self.app.config["PRICE_VERSION_CHECK_INTERVAL"] = 0
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        start = date(2020, 1, 1)
+        days = [start + timedelta(days=i) for i in range(900)]
+        db.session.execute(Price.__table__.insert(), [
+            {"asset_code": a, "date": d, "close_price": 100 + n * (i + 1) * 0.1 + (n % 3)}
+            for i, a in enumerate(ASSETS) for n, d in enumerate(days)
+            if a == "BTC-USD" or d.weekday() < 5
+        ])
+        db.session.commit()
+        bump_price_version()
+
+    def tearDown(self):
+        self.app.extensions.pop("price_matrix", None)
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+        shutil.rmtree(self.directory)
+
+    def read_from_database(self):
+        self.app.config["PRICE_MATRIX_PATH"] = None
+        try:
+            return {a: calculation._load_asset_prices(a, "2020-03-15") for a in ASSETS}, \
+                calculate_portfolio_metrics({"MSFT": 0.5, "BTC-USD": 0.5}, "2020-03-15", 1000)
+        finally:
+            self.app.config["PRICE_MATRIX_PATH"] = self.path
+
+    def test_mapped_frames_match_database_reads(self):
+        frames, metrics = self.read_from_database()
+        self.assertIsNone(get_price_matrix())  # Nothing exported yet
+
+        self.assertEqual(publish_price_matrix(), 3)
+        matrix = get_price_matrix()
+        self.assertIsNotNone(matrix)
+        self.assertFalse(matrix.closes.flags.writeable)
+        self.assertEqual(os.path.getsize(self.path), 64 + 3 * 900 * 8)
+
+        for asset, frame in frames.items():
+            pd.testing.assert_frame_equal(calculation._load_asset_prices(asset, "2020-03-15"), frame)
+        self.assertIsNone(calculation._load_asset_prices("NOPE", "2020-03-15"))
+        after = calculate_portfolio_metrics({"MSFT": 0.5, "BTC-USD": 0.5}, "2020-03-15", 1000)
+        for key in ("current_value", "return_percent", "cagr", "volatility", "max_drawdown"):
+            self.assertAlmostEqual(after[key], metrics[key], places=9)
+
+        index, values = matrix.matrix(["SPY", "NOPE"], "2019-12-30", "2020-01-05")
+        self.assertEqual(index[0], pd.Timestamp("2020-01-01"))
+        self.assertEqual(np.isnan(values[:, 0]).tolist(), [False, False, False, True, True])
+        print("✔ price matrix: mapped histories and metrics match database reads")
+
+    def test_workers_swap_to_a_new_file_on_version_bump(self):
+        publish_price_matrix()
+        old = get_price_matrix()
+        old_frame = old.frame("MSFT")
+
+        db.session.add(Price(asset_code="MSFT", date=date(2022, 6, 20), close_price=999.0))
+        db.session.commit()
+        version = bump_price_version()
+        # Until the new file is written the stale mapping is not served
+        self.assertIsNone(get_price_matrix())
+
+        publish_price_matrix()
+        new = get_price_matrix()
+        self.assertIsNot(new, old)
+        self.assertEqual(new.version, version)
+        self.assertEqual(new.frame("MSFT").iloc[-1, 0], 999.0)
+        # Arrays handed out from the old mapping stay readable after the swap
+        self.assertEqual(len(old.frame("MSFT")), len(old_frame))
+        self.assertEqual(os.listdir(self.directory), ["price-matrix.bin"])
+        print("✔ price matrix: a refresh replaces the file atomically and readers remap it")
+
+    def test_corrupt_files_are_ignored(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not a price matrix" * 10)
+        self.assertIsNone(get_price_matrix())
+        self.assertEqual(len(calculation._load_asset_prices("MSFT", "2020-01-01")), 643)
+        print("✔ price matrix: unreadable files fall back to database reads")
+
+
+if __name__ == "__main__":
+    unittest.main()
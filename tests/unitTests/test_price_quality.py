@@ -0,0 +1,142 @@
+import sys
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price, PriceQualityReport
+from app.services.coverage import Coverage, refresh_asset_coverage
+from app.services.fetch_price import store_ticker_history
+from app.services.price_quality import check_price_history, extract_closes
+
+
+def yfinance_frame(closes, dates, ticker="MSFT"):
+    """A download shaped like yfinance's: (field, ticker) MultiIndex columns."""
+    columns = pd.MultiIndex.from_tuples([("Close", ticker), ("Volume", ticker)], names=["Price", "Ticker"])
+    frame = pd.DataFrame(np.column_stack([closes, np.ones(len(closes))]), index=pd.DatetimeIndex(dates), columns=columns)
+    frame.index.name = "Date"
+    return frame
+
+
+class PriceQualityTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        self.dates = pd.bdate_range("2020-01-01", periods=300)
+        self.closes = 100 + np.arange(300) * 0.1
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_extracts_close_from_every_source_shape(self):
+        stooq = pd.DataFrame({"Close": self.closes[:3]}, index=self.dates[:3])
+        for frame in (yfinance_frame(self.closes[:3], self.dates[:3]), stooq):
+            closes = extract_closes(frame, "MSFT")
+            self.assertEqual(list(closes), list(self.closes[:3]))
+            self.assertEqual(closes.index[0], pd.Timestamp("2020-01-01"))
+        self.assertTrue(extract_closes(pd.DataFrame({"Open": [1.0]}), "MSFT").empty)
+        print("✔ extract_closes: handles yfinance MultiIndex, Stooq and cache frames")
+
+    def test_repairs_and_flags_anomalies(self):
+        closes = self.closes.copy()
+        closes[10] = np.nan
+        closes[20] = 0.0
+        closes[30] = -5.0
+        closes[40] = closes[39] * 3     # one-day spike
+        closes[200:] = closes[200:] / 2 # unadjusted 2:1 split
+        dates = self.dates.tolist()
+        dates[51] = dates[50]           # duplicate date
+        dates[100:] = [d + pd.Timedelta(days=14) for d in dates[100:]]  # two-week hole
+
+        result = check_price_history(yfinance_frame(closes, dates), "MSFT", source="yfinance")
+        report = result.report
+
+        self.assertEqual(report["status"], "repaired")
+        self.assertEqual((report["missing_count"], report["non_positive_count"],
+                          report["duplicate_count"], report["spike_count"]), (1, 2, 1, 1))
+        self.assertEqual(report["rows_out"], 300 - 5)
+        self.assertEqual(report["jump_count"], 1)
+        self.assertEqual(report["gap_count"], 1)
+        self.assertEqual(report["max_gap_days"], 15)
+        self.assertTrue(result.closes.index.is_monotonic_increasing)
+        self.assertTrue((result.closes > 0).all())
+        print("✔ check_price_history: drops NaN/non-positive/duplicate/spike rows, flags jumps and gaps")
+
+    def test_rejects_truncated_downloads(self):
+        frame = yfinance_frame(self.closes[:100], self.dates[:100])
+        stored = Coverage("MSFT", self.dates[0].date(), self.dates[-1].date(), 300, 0)
+        self.assertEqual(check_price_history(frame, "MSFT", existing=stored).report["status"], "rejected")
+
+        # Ends on time but most of the history is missing
+        frame = yfinance_frame(self.closes[200:], self.dates[200:])
+        self.assertEqual(check_price_history(frame, "MSFT", existing=stored).report["status"], "rejected")
+
+        self.assertEqual(check_price_history(pd.DataFrame(), "MSFT").report["status"], "rejected")
+        print("✔ check_price_history: rejects empty downloads and ones shorter than the stored history")
+
+    @patch("pandas.DataFrame.to_csv")
+    @patch("app.services.fetch_price.yf.download")
+    def test_ingest_never_overwrites_good_history(self, mock_download, mock_to_csv):
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            mock_download.return_value = yfinance_frame(self.closes, self.dates)
+            store_ticker_history("MSFT", "2020-01-01", "2021-03-01")
+            refresh_asset_coverage(["MSFT"])
+            db.session.commit()
+
+            truncated = self.closes[:50] * 0.5
+            mock_download.return_value = yfinance_frame(truncated, self.dates[:50])
+            store_ticker_history("MSFT", "2020-01-01", "2021-03-01")
+            db.session.commit()
+        finally:
+            sys.stdout = stdout
+
+        self.assertEqual(Price.query.filter_by(asset_code="MSFT").count(), 300)
+        first = db.session.get(Price, ("MSFT", self.dates[0].date()))
+        self.assertAlmostEqual(first.close_price, self.closes[0])
+        self.assertEqual(mock_to_csv.call_count, 1)  # the rejected download is not cached either
+
+        statuses = [r.status for r in PriceQualityReport.query.order_by(PriceQualityReport.id)]
+        self.assertEqual(statuses, ["accepted", "rejected"])
+
+        reports = self.app.test_client().get("/api/prices/quality").get_json()["reports"]
+        self.assertEqual([(r["asset_code"], r["status"]) for r in reports], [("MSFT", "rejected")])
+        print("✔ store_ticker_history: a truncated download is reported and leaves prices untouched")
+
+    @patch("pandas.DataFrame.to_csv")
+    @patch("app.services.fetch_price.yf.download")
+    def test_ingest_removes_stored_anomalies(self, mock_download, mock_to_csv):
+        # A spike and a non-positive close stored by an earlier, unchecked ingest
+        spike, zero = self.dates[100].date(), self.dates[200].date()
+        db.session.add(Price(asset_code="MSFT", date=spike, close_price=1000.0))
+        db.session.add(Price(asset_code="MSFT", date=zero, close_price=0.0))
+        db.session.commit()
+
+        closes = self.closes.copy()
+        closes[100], closes[200] = 1000.0, 0.0
+        mock_download.return_value = yfinance_frame(closes, self.dates)
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            store_ticker_history("MSFT", "2020-01-01", "2021-03-01")
+            db.session.commit()
+        finally:
+            sys.stdout = stdout
+
+        self.assertIsNone(db.session.get(Price, ("MSFT", spike)))
+        self.assertIsNone(db.session.get(Price, ("MSFT", zero)))
+        self.assertEqual(Price.query.filter_by(asset_code="MSFT").count(), 298)
+        self.assertEqual(PriceQualityReport.query.one().status, "repaired")
+        print("✔ store_ticker_history: stored rows for dates the cleaning drops are deleted")
+
+
+if __name__ == "__main__":
+    unittest.main()
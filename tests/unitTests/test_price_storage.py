@@ -0,0 +1,36 @@
+import unittest
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.config import TestConfig
+
+
+class ClusteredPriceTableTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_prices_table_is_clustered(self):
+        ddl = db.session.execute(text("SELECT sql FROM sqlite_master WHERE name = 'prices'")).scalar()
+        self.assertIn("WITHOUT ROWID", ddl)
+
+        plan = db.session.execute(text(
+            "EXPLAIN QUERY PLAN SELECT date, close_price FROM prices "
+            "WHERE asset_code = 'MSFT' AND date >= '2015-01-01' ORDER BY date"
+        )).fetchall()
+        detail = " ".join(row[-1] for row in plan)
+        self.assertIn("SEARCH prices USING PRIMARY KEY", detail)
+        self.assertNotIn("TEMP B-TREE", detail)
+        print("✔ prices: WITHOUT ROWID table, per-asset ranges are a primary key range scan")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price
+from app.services import calculation
+from app.services.calculation import calculate_portfolio_metrics
+from app.services.price_chunks import refresh_price_chunks
+from app.services.price_store import (
+    PriceCalendar, PriceStore, activate_price_store, deactivate_price_store
+)
+
+STOCKS = ["MSFT", "TSLA", "SPY"]
+
+
+class PriceStoreTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        # Stocks trade on weekdays, bitcoin every day
+        start = date(2019, 6, 1)
+        days = [start + timedelta(days=i) for i in range(1200)]
+        rows = [{"asset_code": a, "date": d, "close_price": 100 + n * (i + 1) * 0.05 + (n % 5)}
+                for i, a in enumerate(STOCKS) for n, d in enumerate(days) if d.weekday() < 5]
+        rows += [{"asset_code": "BTC-USD", "date": d, "close_price": 9000 + n * 3.0} for n, d in enumerate(days)]
+        db.session.execute(Price.__table__.insert(), rows)
+        db.session.commit()
+
+    def tearDown(self):
+        deactivate_price_store()
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_frames_and_metrics_match_database_reads(self):
+        refresh_price_chunks(["MSFT"])  # MSFT from chunks, the rest from rows
+        db.session.commit()
+        starts = ("2019-06-01", "2020-02-29", "2021-01-01")
+        expected = {(a, s): calculation._load_asset_prices(a, s) for a in STOCKS + ["BTC-USD"] for s in starts}
+        allocation = {"MSFT": 0.5, "BTC-USD": 0.5}
+        before = calculate_portfolio_metrics(allocation, "2020-01-01", 1000)
+
+        self.assertEqual(calculation.preload_prices(), 4)
+        for (asset, start), frame in expected.items():
+            pd.testing.assert_frame_equal(calculation._load_asset_prices(asset, start), frame)
+        self.assertIsNone(calculation._load_asset_prices("NOPE", "2019-06-01"))
+        self.assertIsNone(calculation._load_asset_prices("MSFT", "2030-01-01"))
+
+        after = calculate_portfolio_metrics(allocation, "2020-01-01", 1000)
+        for key in ("current_value", "return_percent", "cagr", "volatility", "max_drawdown"):
+            self.assertAlmostEqual(after[key], before[key], places=9)
+        print("✔ price store: frames and metrics match database reads")
+
+    def test_matrix_aligns_on_shared_calendar(self):
+        store = activate_price_store()
+        index, values = store.matrix(["BTC-USD", "SPY", "NOPE"], "2020-01-01", "2020-01-31")
+
+        self.assertEqual(len(index), 31)
+        self.assertEqual(values.shape, (31, 3))
+        self.assertTrue(np.isnan(values[:, 2]).all())
+        self.assertFalse(np.isnan(values[:, 0]).any())
+        self.assertEqual(int(np.isnan(values[:, 1]).sum()), 8)  # Four weekends in January 2020
+
+        joined = pd.concat([calculation._load_asset_prices(a, "2020-01-01") for a in ("BTC-USD", "SPY")], axis=1)
+        joined = joined[joined.index <= "2020-01-31"].reindex(index)
+        np.testing.assert_array_equal(values[:, :2], joined.to_numpy())
+        print("✔ price store: matrix lines assets up on one calendar, NaN where an asset did not trade")
+
+    def test_memory_is_bounded_for_thousands_of_assets(self):
+        calendar = PriceCalendar("2015-01-01", "2024-12-31")
+        dates = pd.bdate_range("2015-01-01", "2024-12-31").values.astype("datetime64[D]")
+        loads = []
+
+        def loader(asset):
+            loads.append(asset)
+            return dates, np.full(dates.size, float(len(asset)))
+
+        per_asset = dates.size * 12  # int32 position + float64 close per day
+        store = PriceStore(calendar, max_bytes=per_asset * 100, loader=loader)
+        universe = [f"T{i:04d}" for i in range(3000)]
+
+        index, values = store.matrix(universe, "2024-01-01")
+        stats = store.stats()
+        self.assertEqual(values.shape[1], 3000)
+        self.assertLessEqual(stats["resident_bytes"], stats["max_bytes"])
+        self.assertEqual(stats["resident_assets"], 100)
+        self.assertEqual(stats["evictions"], 2900)
+
+        # Recently used assets are hits; evicted ones load again
+        store.get("T2999")
+        store.get("T0000")
+        self.assertEqual((store.hits, loads.count("T0000")), (1, 2))
+
+        # Histories larger than the whole budget are served but never kept
+        small = PriceStore(calendar, max_bytes=per_asset // 2, loader=loader)
+        self.assertIsNotNone(small.frame("BIG"))
+        self.assertEqual(small.stats()["resident_bytes"], 0)
+        print(f"✔ price store: 3000 assets through a {stats['max_bytes'] // 1024} KiB budget, "
+              f"{stats['resident_assets']} resident")
+
+    def test_stats_endpoint(self):
+        client = self.app.test_client()
+        self.assertFalse(client.get("/api/prices/store").get_json()["active"])
+
+        self.app.config["PRICE_STORE_MAX_BYTES"] = 30000  # Room for two of the histories
+        activate_price_store()
+        stats = client.get("/api/prices/store").get_json()
+        self.assertTrue(stats["active"])
+        self.assertEqual(stats["resident_assets"], 2)
+        self.assertLessEqual(stats["resident_bytes"], 30000)
+        self.assertEqual(stats["calendar_start"], "2019-06-01")
+        self.assertGreater(stats["process_max_rss_bytes"], 0)
+        print("✔ /api/prices/store: reports resident assets and bytes against the budget")
+
+
+if __name__ == "__main__":
+    unittest.main()
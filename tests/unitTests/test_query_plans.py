@@ -0,0 +1,82 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, text
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import PortfolioSummary, PortfolioShareLog, PortfolioVersion, Price
+
+
+class QueryPlanTestCase(unittest.TestCase):
+    """EXPLAIN QUERY PLAN checks: the hot queries must use an index, not scan the table."""
+
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def query_plan(self, query):
+        statement = query.statement if hasattr(query, "statement") else query
+        sql = str(statement.compile(dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}))
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        return [row[-1] for row in rows]
+
+    def assert_uses_index(self, query, table, index=None):
+        plan = self.query_plan(query)
+        scans = [step for step in plan if step.startswith(f"SCAN {table}")]
+        self.assertFalse(scans, f"Full scan of {table}: {plan}")
+
+        searches = [step for step in plan if step.startswith(f"SEARCH {table} USING")]
+        self.assertTrue(searches, f"No index used on {table}: {plan}")
+        if index:
+            self.assertTrue(any(index in step for step in searches), plan)
+
+    def test_portfolio_list_queries(self):
+        self.assert_uses_index(
+            PortfolioSummary.query.filter_by(user_id=1, is_shown=True), "portfolio_summary"
+        )
+        self.assert_uses_index(
+            PortfolioSummary.query.filter(
+                PortfolioSummary.user_id == 1,
+                PortfolioSummary.shared_from_id.isnot(None),
+                PortfolioSummary.created_at >= datetime.utcnow() - timedelta(hours=24),
+                PortfolioSummary.is_shown == True
+            ),
+            "portfolio_summary"
+        )
+        self.assert_uses_index(
+            PortfolioShareLog.query.filter_by(from_portfolio_id=1), "portfolio_share_log"
+        )
+        print("✔ Query plans: portfolio list and share history queries use indexes")
+
+    def test_latest_version_query(self):
+        self.assert_uses_index(
+            db.session.query(func.max(PortfolioVersion.version_number)).filter_by(portfolio_id=1),
+            "portfolio_version"
+        )
+        print("✔ Query plans: latest portfolio version lookup uses an index")
+
+    def test_price_date_range_queries(self):
+        for agg in (func.min, func.max):
+            self.assert_uses_index(
+                db.session.query(agg(Price.date))
+                .filter(Price.asset_code.in_(["MSFT", "TSLA"]))
+                .group_by(Price.asset_code),
+                "prices"
+            )
+            self.assert_uses_index(db.session.query(agg(Price.date)), "prices", index="ix_prices_date")
+        self.assert_uses_index(
+            Price.query.filter(Price.asset_code == "MSFT", Price.date >= "2020-01-01"), "prices"
+        )
+        print("✔ Query plans: price date range lookups use the primary key or date index")
+
+
+if __name__ == "__main__":
+    unittest.main()
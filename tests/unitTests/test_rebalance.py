@@ -0,0 +1,167 @@
+import json
+import time
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import AnalyticsJob, Price
+from app.services.calculation import _load_price_frame, calculate_portfolio_metrics, get_portfolio_timeseries
+from app.services.rebalance import parse_rebalance, rebalanced_value
+
+ASSETS = ["BTC-USD", "MSFT", "SPY"]
+WEIGHTS = {"BTC-USD": 0.2, "MSFT": 0.5, "SPY": 0.3}
+
+
+def reference_value(combined, allocation, initial_amount, rebalance):
+    """Day-by-day simulation: hold shares, and re-buy the target weights after each rebalance day's close."""
+    assets = list(allocation)
+    weights = np.array([allocation[a] for a in assets]) / sum(allocation.values())
+    closes = combined[assets].to_numpy()
+    value = initial_amount * sum(allocation.values())
+    shares = value * weights / closes[0]
+    values = []
+    for row in range(len(closes)):
+        value = float(shares @ closes[row])
+        values.append(value)
+        if row + 1 == len(closes):
+            break
+        day, next_day = combined.index[row], combined.index[row + 1]
+        if rebalance == "monthly":
+            due = (day.year, day.month) != (next_day.year, next_day.month)
+        elif rebalance == "quarterly":
+            due = (day.year, day.quarter) != (next_day.year, next_day.quarter)
+        elif rebalance == "annual":
+            due = day.year != next_day.year
+        else:
+            threshold = float(rebalance.split(":")[1])
+            due = np.abs(shares * closes[row] / value - weights).max() > threshold
+        if due:
+            shares = value * weights / closes[row]
+    return pd.Series(values, index=combined.index)
+
+
+class RebalanceTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        rng = np.random.default_rng(11)
+        start = date(2019, 12, 30)
+        days = [start + timedelta(days=n) for n in range(1500)]
+        rows = []
+        for asset in ASSETS:
+            volatility = 0.04 if asset == "BTC-USD" else 0.015
+            closes = 100 * np.exp(np.cumsum(rng.normal(0.0004, volatility, len(days))))
+            rows += [{"asset_code": asset, "date": d, "close_price": float(c)}
+                     for d, c in zip(days, closes) if asset == "BTC-USD" or d.weekday() < 5]
+        db.session.execute(Price.__table__.insert(), rows)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_matches_daily_simulation(self):
+        combined = _load_price_frame(WEIGHTS, "2020-01-01")
+        for rebalance in ("monthly", "quarterly", "annual", "threshold:0.05", "threshold:0.2"):
+            expected = reference_value(combined, WEIGHTS, 1000, rebalance)
+            result = rebalanced_value(combined, WEIGHTS, 1000, rebalance)
+            np.testing.assert_allclose(result.to_numpy(), expected.to_numpy(), rtol=1e-12, err_msg=rebalance)
+            self.assertTrue(result.index.equals(combined.index))
+
+        # Rebalancing a single asset changes nothing
+        single = _load_price_frame({"MSFT": 1.0}, "2020-01-01")
+        np.testing.assert_allclose(rebalanced_value(single, {"MSFT": 1.0}, 1000, "monthly").to_numpy(),
+                                   1000 * single["MSFT"].to_numpy() / single["MSFT"].iloc[0], rtol=1e-12)
+        print("✔ rebalanced_value: matches a day-by-day share simulation for every mode")
+
+    def test_buy_and_hold_unchanged(self):
+        buy_and_hold = calculate_portfolio_metrics(WEIGHTS, "2020-01-01", 1000)
+        self.assertEqual(calculate_portfolio_metrics(WEIGHTS, "2020-01-01", 1000, rebalance=parse_rebalance("none")),
+                         buy_and_hold)
+
+        monthly = calculate_portfolio_metrics(WEIGHTS, "2020-01-01", 1000, rebalance="monthly")
+        self.assertEqual(set(monthly), set(buy_and_hold))
+        self.assertNotAlmostEqual(monthly["current_value"], buy_and_hold["current_value"], places=2)
+
+        series = get_portfolio_timeseries(WEIGHTS, "2020-01-01", 1000, rebalance="quarterly")
+        self.assertAlmostEqual(list(series["portfolio_value_series"].values())[-1],
+                               calculate_portfolio_metrics(WEIGHTS, "2020-01-01", 1000, rebalance="quarterly")["current_value"])
+        print("✔ calculate_portfolio_metrics: buy and hold by default, rebalanced on request")
+
+    def test_parse_rebalance(self):
+        self.assertIsNone(parse_rebalance(None))
+        self.assertIsNone(parse_rebalance("none"))
+        self.assertEqual(parse_rebalance(" Monthly "), "monthly")
+        self.assertEqual(parse_rebalance("threshold"), "threshold:0.05")
+        self.assertEqual(parse_rebalance("threshold", "0.1"), "threshold:0.1")
+        self.assertEqual(parse_rebalance("threshold:0.25"), "threshold:0.25")
+        for mode, threshold in (("weekly", None), ("threshold", 0), ("threshold", 1.5), ("threshold", "x")):
+            with self.assertRaises(ValueError):
+                parse_rebalance(mode, threshold)
+        print("✔ parse_rebalance: normalizes modes and rejects unknown ones")
+
+    def test_endpoints_accept_rebalance(self):
+        body = {"weights": WEIGHTS, "start_date": "2020-01-01", "initial_investment": 1000}
+        buy_and_hold = self.client.post("/api/portfolio-summary", json=body).get_json()
+        annual = self.client.post("/api/portfolio-summary", json={**body, "rebalance": "annual"}).get_json()
+        self.assertAlmostEqual(annual["netWorth"],
+                               calculate_portfolio_metrics(WEIGHTS, "2020-01-01", 1000, rebalance="annual")["current_value"])
+        self.assertNotAlmostEqual(annual["netWorth"], buy_and_hold["netWorth"], places=2)
+
+        threshold = {**body, "rebalance": "threshold", "rebalance_threshold": 0.1}
+        self.assertEqual(self.client.post("/api/timeseries", json=threshold).status_code, 200)
+
+        comparison = {"weights_a": WEIGHTS, "weights_b": {"SPY": 1.0}, "start_date": "2020-01-01", "rebalance": "monthly"}
+        summary = self.client.post("/api/comparison_metrics", json=comparison).get_json()["summary"]
+        self.assertAlmostEqual(summary["portfolio_a"]["cagr"],
+                               calculate_portfolio_metrics(WEIGHTS, "2020-01-01", 1000, rebalance="monthly")["cagr"])
+
+        for invalid in ({**body, "rebalance": "weekly"}, {**body, "rebalance": "threshold", "rebalance_threshold": 2}):
+            response = self.client.post("/api/portfolio-summary", json=invalid)
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("Invalid rebalance", response.get_json()["error"])
+        self.assertEqual(self.client.post("/api/comparison-radar", json={**comparison, "rebalance": "daily"}).status_code, 400)
+
+        # Weights adding up to 0 or less cannot be rebalanced
+        zero = {"MSFT": 0.5, "SPY": -0.5}
+        response = self.client.post("/api/portfolio-summary", json={**body, "weights": zero, "rebalance": "monthly"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("more than 0", response.get_json()["error"])
+        self.assertEqual(self.client.post("/api/comparison_metrics", json={**comparison, "weights_b": zero}).status_code, 400)
+        job = {"type": "drawdown", "params": {"allocation": WEIGHTS, "start_date": "2020-01-01",
+                                              "initial_amount": 1000, "rebalance": "daily"}}
+        self.assertEqual(self.client.post("/api/jobs", json=job).status_code, 400)
+        job["params"].update(rebalance="threshold", rebalance_threshold=0.1)
+        response = self.client.post("/api/jobs", json=job)
+        self.assertEqual(response.status_code, 202)
+        params = json.loads(db.session.get(AnalyticsJob, response.get_json()["job_id"]).params_json)
+        self.assertEqual(params["rebalance"], "threshold:0.1")
+        print("✔ /api/portfolio-summary, /api/timeseries, comparison endpoints and jobs: take a rebalance mode, 400 when invalid or unbalanceable")
+
+    def test_faster_than_daily_loop(self):
+        combined = _load_price_frame(WEIGHTS, "2020-01-01")
+        began = time.perf_counter()
+        for _ in range(20):
+            rebalanced_value(combined, WEIGHTS, 1000, "monthly")
+            rebalanced_value(combined, WEIGHTS, 1000, "threshold:0.05")
+        vectorized = (time.perf_counter() - began) / 20
+
+        began = time.perf_counter()
+        reference_value(combined, WEIGHTS, 1000, "monthly")
+        reference_value(combined, WEIGHTS, 1000, "threshold:0.05")
+        looped = time.perf_counter() - began
+        self.assertLess(vectorized, looped)
+        print(f"✔ rebalanced_value: {vectorized * 1000:.2f} ms vs {looped * 1000:.2f} ms for a daily loop")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import json
+import unittest
+from datetime import date
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import User, PortfolioSummary, PortfolioShareLog, PortfolioVersion
+from app.services.sharing import share_portfolio_with_users
+
+
+class BulkShareTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        db.create_all()
+
+        db.session.add_all(
+            User(username=f"user{i}", user_email=f"user{i}@example.com", user_pswd="x",
+                 user_fName="Test", user_lName=f"User{i}")
+            for i in range(1, 202)
+        )
+        db.session.commit()
+        self.owner = db.session.get(User, 1)
+        self.portfolio = PortfolioSummary(
+            portfolio_name="Growth", user_id=1, creator_id=1,
+            user_username="user1", user_email="user1@example.com",
+            creator_username="user1", creator_email="user1@example.com",
+            allocation_json=json.dumps({"MSFT": 0.5, "TSLA": 0.5}),
+            start_date=date(2020, 1, 1), initial_amount=1000, cagr=0.2
+        )
+        db.session.add(self.portfolio)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_share_with_many_users(self):
+        recipients = list(range(2, 202)) + [9999, "bad"]
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            shared_with = share_portfolio_with_users(self.portfolio, self.owner, recipients)
+            db.session.commit()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        self.assertEqual(len(shared_with), 200)
+        self.assertLess(len(statements), 12)
+
+        copies = PortfolioSummary.query.filter(PortfolioSummary.shared_from_id == 1).all()
+        self.assertEqual(len(copies), 200)
+        copy = next(c for c in copies if c.user_id == 57)
+        self.assertEqual(copy.user_username, "user57")
+        self.assertEqual(copy.portfolio_name, "Growth (Shared by user1)")
+        self.assertFalse(copy.is_editable or copy.is_shareable or copy.is_deletable)
+
+        log = PortfolioShareLog.query.filter_by(to_portfolio_id=copy.portfolio_id).one()
+        self.assertEqual((log.from_portfolio_id, log.to_user_id), (self.portfolio.portfolio_id, 57))
+        version = PortfolioVersion.query.filter_by(portfolio_id=copy.portfolio_id).one()
+        self.assertEqual(version.version_number, 1)
+        print(f"✔ Bulk share: 200 recipients shared with {len(statements)} SQL statements")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import unittest
+from datetime import date
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import User, PortfolioSummary
+from app.services.user_info import refresh_all_user_info
+
+
+class RefreshUserInfoTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        for i in (1, 2):
+            db.session.add(User(username=f"user{i}", user_email=f"user{i}@example.com", user_pswd="x",
+                                user_fName=f"First{i}", user_lName=f"Last{i}"))
+        db.session.commit()
+
+        # Copies created under old names
+        for i in range(5):
+            db.session.add(PortfolioSummary(
+                portfolio_name=f"P{i}", user_id=2, creator_id=1, shared_from_id=1,
+                user_username="old2", user_email="old2@example.com",
+                creator_username="old1", creator_email="old1@example.com",
+                shared_from_username="old1", shared_from_email="old1@example.com",
+                allocation_json=json.dumps({"MSFT": 1.0}), start_date=date(2020, 1, 1), initial_amount=1000
+            ))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_refresh_all_in_chunks(self):
+        progress = []
+        refresh_all_user_info(chunk_size=2, progress=lambda done, total: progress.append((done, total)))
+        self.assertEqual(progress, [(2, 5), (4, 5), (5, 5)])
+
+        for p in PortfolioSummary.query.all():
+            self.assertEqual((p.user_username, p.user_email), ("user2", "user2@example.com"))
+            self.assertEqual((p.creator_username, p.shared_from_email), ("user1", "user1@example.com"))
+
+        # Nothing is rewritten once the copies are up to date
+        self.assertEqual(refresh_all_user_info(), 0)
+        print("✔ refresh_all_user_info: set-based updates per chunk with progress")
+
+    def test_cli_command(self):
+        result = self.app.test_cli_runner().invoke(args=["refresh-user-info", "--chunk-size", "3"])
+        self.assertIn("5/5 portfolios checked", result.output)
+        self.assertEqual(PortfolioSummary.query.first().creator_username, "user1")
+        print("✔ flask refresh-user-info: reports progress and refreshes the copies")
+
+    def test_user_update_refreshes_portfolios(self):
+        with self.client.session_transaction() as session:
+            session["_user_id"] = "1"
+        # The route redirects to an account page that is not registered here,
+        # so only the database side effects are checked
+        self.app.config["PROPAGATE_EXCEPTIONS"] = False
+        self.client.post("/user/update", data={
+            "id": 1, "firstname": "New", "lastname": "Name", "email": "renamed@example.com"
+        })
+        db.session.expire_all()
+        for p in PortfolioSummary.query.all():
+            self.assertEqual((p.creator_email, p.shared_from_email), ("renamed@example.com", "renamed@example.com"))
+            self.assertEqual(p.user_email, "old2@example.com")  # other users untouched
+        print("✔ user.update: email change is copied to the user's portfolios")
+
+
+if __name__ == "__main__":
+    unittest.main()
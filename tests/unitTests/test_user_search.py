@@ -0,0 +1,97 @@
+import unittest
+
+from sqlalchemy import text
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import User
+from app.services.rate_limit import TokenBucket
+from app.services.user_search import SEARCH_COLUMNS, _prefix_query, search_users
+
+
+class UserSearchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        db.session.add(User(username="Owner", user_email="owner@example.com", user_pswd="x",
+                            user_fName="Olivia", user_lName="Owner"))
+        db.session.add(User(username="JaneS", user_email="jane.smith@corp.example", user_pswd="x",
+                            user_fName="Jane", user_lName="Smith"))
+        db.session.add(User(username="jsmythe", user_email="jo@example.com", user_pswd="x",
+                            user_fName="Jo", user_lName="Smythe"))
+        for i in range(300):
+            db.session.add(User(username=f"trader{i:03d}", user_email=f"trader{i}@example.com",
+                                user_pswd="x", user_fName="Alex", user_lName=f"Trader{i}"))
+        db.session.commit()
+        self.owner = User.query.filter_by(username="Owner").first()
+
+        with self.client.session_transaction() as session:
+            session["_user_id"] = str(self.owner.id)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def usernames(self, query, **kwargs):
+        return [u["username"] for u in search_users(query, exclude_user_id=self.owner.id, **kwargs)]
+
+    def test_prefix_matches_every_field(self):
+        self.assertEqual(self.usernames("JANE"), ["JaneS"])             # username, any case
+        self.assertEqual(self.usernames("smy"), ["jsmythe"])            # last name
+        self.assertEqual(self.usernames("jo@"), ["jsmythe"])            # email
+        self.assertEqual(self.usernames("jane sm"), ["JaneS"])          # first + last name
+        self.assertEqual(self.usernames("j"), ["JaneS", "jsmythe"])     # username matches rank first
+        self.assertEqual(self.usernames("owner"), [])                   # never the caller
+        self.assertEqual(self.usernames("  "), [])
+        print("✔ search_users: matches username, first/last name and email prefixes case-insensitively")
+
+    def test_results_are_capped(self):
+        self.assertEqual(len(self.usernames("trader", limit=5)), 5)
+        self.assertEqual(len(self.usernames("alex", limit=500)), 20)
+        print("✔ search_users: returns at most the requested top-k")
+
+    def test_updates_keep_search_columns_in_sync(self):
+        user = User.query.filter_by(username="jsmythe").first()
+        user.user_lName = "Zimmer"
+        db.session.commit()
+        self.assertEqual(self.usernames("zim"), ["jsmythe"])
+        self.assertEqual(self.usernames("smy"), [])
+        print("✔ search_users: edited names are searchable immediately")
+
+    def test_prefix_queries_use_indexes(self):
+        for column in SEARCH_COLUMNS:
+            statement = _prefix_query(column, "tra", self.owner.id, 10)
+            compiled = statement.compile(db.engine, compile_kwargs={"literal_binds": True})
+            plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).fetchall()
+            detail = " ".join(row[-1] for row in plan)
+            self.assertIn(f"USING INDEX ix_user_{column.key}", detail)
+            self.assertNotIn("TEMP B-TREE", detail)
+        print("✔ search_users: every prefix lookup is an index range scan")
+
+    def test_endpoint_rate_limits_bursts(self):
+        self.app.config.update(USER_SEARCH_RATE=0.5, USER_SEARCH_BURST=3)
+        statuses = [self.client.get("/portfolios/api/users/search?q=tr").status_code for _ in range(4)]
+        self.assertEqual(statuses, [200, 200, 200, 429])
+
+        response = self.client.get("/portfolios/api/users/search?q=tra")
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response.headers["Retry-After"]), 1)
+        print("✔ /portfolios/api/users/search: keystroke bursts beyond the bucket get 429 with Retry-After")
+
+    def test_token_bucket_refills(self):
+        bucket = TokenBucket(rate=2, burst=2)
+        start = bucket.updated
+        self.assertEqual(bucket.acquire(now=start), 0)
+        self.assertEqual(bucket.acquire(now=start), 0)
+        self.assertAlmostEqual(bucket.acquire(now=start), 0.5)
+        self.assertEqual(bucket.acquire(now=start + 0.5), 0)
+        print("✔ TokenBucket: refills at the configured rate up to the burst size")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import User, PortfolioSummary, PortfolioVersion
+from app.services.versions import record_version, reconstruct_version
+
+
+class PortfolioVersionTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.app.config["PORTFOLIO_VERSION_SNAPSHOT_INTERVAL"] = 5
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        db.session.add(User(username="user1", user_email="user1@example.com", user_pswd="x",
+                            user_fName="Test", user_lName="User"))
+        self.portfolio = PortfolioSummary(
+            portfolio_name="Mix", user_id=1, creator_id=1,
+            user_username="user1", user_email="user1@example.com",
+            creator_username="user1", creator_email="user1@example.com",
+            allocation_json=json.dumps({"MSFT": 1.0}), start_date=date(2020, 1, 1), initial_amount=1000
+        )
+        db.session.add(self.portfolio)
+        db.session.commit()
+
+        # 12 versions: the MSFT weight drifts, TSLA comes and goes, the name changes once
+        self.history = []
+        for i in range(1, 13):
+            allocation = {"MSFT": round(1 - i / 100, 2)}
+            if i % 3:
+                allocation["TSLA"] = round(i / 100, 2)
+            self.portfolio.allocation_json = json.dumps(allocation)
+            if i == 7:
+                self.portfolio.portfolio_name = "Renamed"
+            record_version(self.portfolio, updated_by=1)
+            db.session.commit()
+            self.history.append((allocation, self.portfolio.portfolio_name))
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_snapshots_and_deltas(self):
+        rows = PortfolioVersion.query.order_by(PortfolioVersion.version_number).all()
+        self.assertEqual([r.version_number for r in rows if r.is_snapshot], [1, 6, 11])
+        self.assertTrue(all(r.allocation_json is None for r in rows if not r.is_snapshot))
+        self.assertEqual(self.portfolio.latest_version_number, 12)
+        print("✔ Portfolio versions: snapshot every N versions, deltas in between")
+
+    def test_reconstruct_every_version(self):
+        for number, (allocation, name) in enumerate(self.history, start=1):
+            row, state = reconstruct_version(self.portfolio.portfolio_id, number)
+            self.assertEqual(state["allocation"], allocation)
+            self.assertEqual(state["portfolio_name"], name)
+            self.assertEqual(state["start_date"], "2020-01-01")
+        self.assertEqual(reconstruct_version(self.portfolio.portfolio_id, 99), (None, None))
+        print("✔ Portfolio versions: every version is rebuilt exactly from snapshot + deltas")
+
+    def test_reconstruction_reads_one_snapshot_window(self):
+        statements = []
+        record = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            reconstruct_version(self.portfolio.portfolio_id, 10)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        self.assertEqual(len(statements), 1)
+        print("✔ Portfolio versions: reconstruction is a single query")
+
+    def test_versions_api_with_cached_metrics(self):
+        with self.client.session_transaction() as session:
+            session["_user_id"] = "1"
+
+        listing = self.client.get(f"/portfolios/{self.portfolio.portfolio_id}/versions").get_json()
+        self.assertEqual(len(listing["versions"]), 12)
+        self.assertEqual(listing["versions"][0]["version_number"], 12)
+
+        metrics = {"cagr": 0.1, "return_percent": 5.0}
+        with patch("app.services.versions.calculate_portfolio_metrics", return_value=metrics) as calc:
+            url = f"/portfolios/{self.portfolio.portfolio_id}/versions/8?metrics=1"
+            first = self.client.get(url).get_json()
+            second = self.client.get(url).get_json()
+        self.assertEqual(first["allocation"], self.history[7][0])
+        self.assertEqual(second["metrics"], metrics)
+        calc.assert_called_once_with(self.history[7][0], "2020-01-01", 1000)
+        self.assertEqual(self.client.get(f"/portfolios/{self.portfolio.portfolio_id}/versions/40").status_code, 404)
+        print("✔ /portfolios/<id>/versions: lists history, rebuilds versions and caches their metrics")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import time
+import unittest
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import event
+
+from app import create_app, db
+from app.config import TestConfig
+from app.models import Price
+from app.services.calculation import calculate_portfolio_metrics
+from app.services.what_if import what_if_metrics
+
+ASSETS = ["BTC-USD", "MSFT", "SPY", "TSLA"]
+METRICS = ("current_value", "profit", "return_percent", "cagr", "volatility", "max_drawdown")
+
+
+class WhatIfTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app(TestConfig)
+        self.ctx = self.app.app_context()
+        self.ctx.push()
+        self.client = self.app.test_client()
+        db.create_all()
+
+        # Random walks, with a first-day drop for MSFT and gaps for the stocks
+        rng = np.random.default_rng(7)
+        start = date(2019, 12, 30)
+        days = [start + timedelta(days=n) for n in range(1500)]
+        rows = []
+        for asset in ASSETS:
+            closes = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.02, len(days))))
+            if asset == "MSFT":
+                closes[3] = closes[2] * 0.9
+            rows += [{"asset_code": asset, "date": d, "close_price": float(c)}
+                     for d, c in zip(days, closes) if asset == "BTC-USD" or d.weekday() < 5]
+        db.session.execute(Price.__table__.insert(), rows)
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+        self.ctx.pop()
+
+    def test_matches_full_calculation(self):
+        rng = np.random.default_rng(1)
+        for start_date in ("2020-01-01", "2021-07-15"):
+            for _ in range(5):
+                weights = dict(zip(ASSETS, rng.dirichlet(np.ones(len(ASSETS)))))
+                expected = calculate_portfolio_metrics(weights, start_date, 1000)
+                result = what_if_metrics(weights, start_date, 1000)
+                self.assertEqual(result["calculated_at"], expected["calculated_at"])
+                for key in METRICS:
+                    self.assertAlmostEqual(result[key], expected[key], places=9, msg=key)
+
+        single = what_if_metrics({"MSFT": 1.0}, "1/1/2020", 1000)
+        self.assertAlmostEqual(single["max_drawdown"],
+                               calculate_portfolio_metrics({"MSFT": 1.0}, "2020-01-01", 1000)["max_drawdown"], places=12)
+        self.assertEqual(what_if_metrics({"MSFT": 0.5, "NOPE": 0.5}, "2020-01-01", 1000), {})
+        print("✔ what_if_metrics: same metrics as calculate_portfolio_metrics (quantstats)")
+
+    def test_slider_moves_skip_the_database(self):
+        what_if_metrics(dict.fromkeys(ASSETS, 0.25), "2020-01-01", 1000)
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        rng = np.random.default_rng(2)
+        moves = [dict(zip(ASSETS, rng.dirichlet(np.ones(len(ASSETS))))) for _ in range(200)]
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            began = time.perf_counter()
+            for weights in moves:
+                what_if_metrics(weights, "2020-01-01", 1000)
+            per_call = (time.perf_counter() - began) / len(moves)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+
+        began = time.perf_counter()
+        for weights in moves[:10]:
+            calculate_portfolio_metrics(weights, "2020-01-01", 1000)
+        full = (time.perf_counter() - began) / 10
+
+        # After the first call a weight change is served from memory: no price queries
+        self.assertFalse([s for s in statements if "price_data_version" not in s])
+        print(f"✔ what_if_metrics: no price queries per weight change, {per_call * 1e6:.0f} µs each "
+              f"(full calculation {full * 1000:.1f} ms, {full / per_call:.0f}x)")
+
+    def test_endpoint(self):
+        body = {"weights": {"MSFT": 0.6, "SPY": 0.4}, "start_date": "1/1/2015", "initial_investment": 1000}
+        response = self.client.post("/api/what-if", json=body)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()
+        self.assertEqual(set(METRICS) | {"calculated_at", "elapsed_ms"}, set(data))
+
+        for bad in ({"weights": {"NOPE": 1.0}}, {"weights": {"MSFT": "x"}}, {"weights": []}, {}):
+            self.assertEqual(self.client.post("/api/what-if", json=bad).status_code, 400)
+        for amount in (0, -100, "nan"):
+            response = self.client.post("/api/what-if", json={**body, "initial_investment": amount})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("initial_investment", response.get_json()["error"])
+        print("✔ /api/what-if: returns summary metrics, 400 for unknown assets, bad weights or amounts")
+
+
+if __name__ == "__main__":
+    unittest.main()
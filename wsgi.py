@@ -0,0 +1,19 @@
+# Production entry point for a pre-fork WSGI server:
+#     gunicorn -c gunicorn.conf.py wsgi:app
+# With preload_app (see gunicorn.conf.py) this module is imported once in the
+# master, which builds the app and warms its caches before forking workers.
+# Prices are refreshed by `flask refresh-history`, never while serving.
+import os
+
+os.environ.setdefault("FLASK_DEBUG", "0")  # ProductionConfig
+os.environ.setdefault("FLASK_CLI_COMMAND", "wsgi")  # Not `flask run`: no refresh at startup
+
+from app import create_app
+from app.services.prefork import warm_up
+
+app = create_app()
+
+if os.environ.get("WSGI_WARM_UP", "1") == "1":
+    state = warm_up(app)
+    app.logger.info(f"✅ Warmed up price data version {state['version']} "
+                    f"({state['assets']} assets resident) in {state['seconds']} s")